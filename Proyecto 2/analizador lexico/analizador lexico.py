@@ -1,7 +1,20 @@
+import io
+import json
 import os
+import sys
+import time
 import datetime
 import re
 
+# plantillas_html.py y colector_errores.py estan en la raiz del repositorio porque los comparten los dos proyectos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from colector_errores import ColectorErrores
+from plantillas_html import plantilla
+
+TAMANO_BUFFER_REPORTE = 1024 * 1024  # bytes de buffer al escribir los reportes
+ARCHIVO_METRICAS = 'metricas_analizador'  # se escribe en .prom (Prometheus) y .json despues de cada analisis
+
 class Token:
     def __init__(self, tipo, lexema, linea, columna):
         self.tipo = tipo
@@ -12,6 +25,237 @@ class Token:
     def __str__(self):
         return f"Token({self.tipo}, '{self.lexema}', {self.linea}, {self.columna})"
 
+# Operandos que acepta cada operacion: (minimo, maximo); None es sin limite
+ARIDAD_OPERACIONES = {
+    'SUMA': (2, None),
+    'RESTA': (2, None),
+    'MULTIPLICACION': (2, None),
+    'DIVISION': (2, None),
+    'MOD': (2, None),
+    'POTENCIA': (1, 1),
+    'RAIZ': (1, 1),
+    'INVERSO': (1, 1),
+}
+
+# Etiqueta de parametro que exige cada operacion, ademas de sus operandos
+PARAMETRO_OPERACION = {'POTENCIA': 'P', 'RAIZ': 'R'}
+
+# Como se escribe cada etiqueta en los mensajes
+NOMBRE_ETIQUETA = {'OPERACION': 'Operacion', 'NUMERO_KW': 'Numero', 'P': 'P', 'R': 'R'}
+
+class MetricasAnalizador:
+    """Contadores acumulados de todas las llamadas a analizar, para exportar como Prometheus o JSON"""
+    
+    def __init__(self, nombres_patrones):
+        self.nombres_patrones = list(nombres_patrones)  # en el orden en que se prueban
+        self.llamadas = 0
+        self.segundos_total = 0.0
+        self.segundos_ultima = 0.0
+        self.caracteres = 0
+        self.bytes_escaneados = 0
+        self.tokens_por_tipo = dict.fromkeys(self.nombres_patrones, 0)
+        self.errores_por_tipo = {}
+    
+    def registrar_llamada(self, segundos, codigo, errores):
+        """Suma una llamada; los tokens por tipo ya los fue contando el analizador"""
+        self.llamadas += 1
+        self.segundos_total += segundos
+        self.segundos_ultima = segundos
+        self.caracteres += len(codigo)
+        # isascii no recorre el texto (CPython guarda si es ASCII al crearlo): solo
+        # un texto con tildes u otros caracteres se codifica para contar sus bytes
+        self.bytes_escaneados += len(codigo) if codigo.isascii() else len(codigo.encode('utf-8'))
+        for tipo, cantidad in errores.resumen_clases():
+            self.errores_por_tipo[tipo] = self.errores_por_tipo.get(tipo, 0) + cantidad
+    
+    def patrones_probados(self):
+        """(posiciones, patrones probados): se deduce de los conteos sin tocar el ciclo principal"""
+        # Un token del patron i se reconoce despues de probar i + 1 patrones;
+        # un caracter no reconocido los prueba todos
+        lexicos = self.errores_por_tipo.get('Error Lexico', 0)
+        posiciones = sum(self.tokens_por_tipo.values()) + lexicos
+        probados = sum(cantidad * (i + 1) for i, cantidad in enumerate(self.tokens_por_tipo.values()))
+        return posiciones, probados + lexicos * len(self.nombres_patrones)
+    
+    def como_dict(self):
+        """Instantanea de los contadores como diccionario"""
+        posiciones, probados = self.patrones_probados()
+        return {
+            'llamadas': self.llamadas,
+            'segundos_total': round(self.segundos_total, 6),
+            'segundos_ultima_llamada': round(self.segundos_ultima, 6),
+            'caracteres': self.caracteres,
+            'bytes_escaneados': self.bytes_escaneados,
+            'tokens_por_tipo': dict(self.tokens_por_tipo),
+            'errores_por_tipo': dict(self.errores_por_tipo),
+            'posiciones': posiciones,
+            'patrones_probados': probados,
+            'patrones_por_posicion': round(probados / posiciones, 4) if posiciones else 0,
+        }
+    
+    def como_prometheus(self):
+        """Instantanea en el formato de texto de Prometheus"""
+        datos = self.como_dict()
+        lineas = []
+        
+        def metrica(nombre, tipo, ayuda, valores):
+            lineas.append(f"# HELP analizador_lexico_{nombre} {ayuda}")
+            lineas.append(f"# TYPE analizador_lexico_{nombre} {tipo}")
+            for etiquetas, valor in valores:
+                lineas.append(f"analizador_lexico_{nombre}{etiquetas} {valor}")
+        
+        metrica('llamadas_total', 'counter', 'Llamadas a analizar', [("", datos['llamadas'])])
+        metrica('segundos_total', 'counter', 'Tiempo total dentro de analizar', [("", datos['segundos_total'])])
+        metrica('segundos_ultima_llamada', 'gauge', 'Tiempo de la ultima llamada', [("", datos['segundos_ultima_llamada'])])
+        metrica('bytes_escaneados_total', 'counter', 'Bytes UTF-8 analizados', [("", datos['bytes_escaneados'])])
+        metrica('tokens_total', 'counter', 'Tokens reconocidos por tipo',
+                [(f'{{tipo="{tipo}"}}', cantidad) for tipo, cantidad in datos['tokens_por_tipo'].items()])
+        metrica('errores_total', 'counter', 'Errores por tipo',
+                [(f'{{tipo="{tipo}"}}', cantidad) for tipo, cantidad in datos['errores_por_tipo'].items()])
+        metrica('posiciones_total', 'counter', 'Posiciones donde se probaron patrones', [("", datos['posiciones'])])
+        metrica('patrones_probados_total', 'counter', 'Patrones probados en total', [("", datos['patrones_probados'])])
+        return "\n".join(lineas) + "\n"
+    
+    def guardar(self, ruta, formato='prometheus'):
+        """Escribe la instantanea de forma atomica: el lector nunca ve un archivo a medio escribir"""
+        texto = json.dumps(self.como_dict(), indent=2) + "\n" if formato == 'json' else self.como_prometheus()
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        os.replace(temporal, ruta)
+
+class ValidadorEstructura:
+    """Revisa el anidamiento de etiquetas y los operandos a medida que llegan los tokens, con una pila"""
+    
+    def __init__(self, errores):
+        self.errores = errores
+        # Cada elemento abierto: [etiqueta, operacion, linea, columna, operandos, parametro, valores]
+        self.pila = []
+        self.etiqueta = None  # tokens de la etiqueta que se esta leyendo, desde '<'
+    
+    def error(self, linea, columna, lexema, descripcion):
+        """Registra un error estructural en el mismo colector que los errores lexicos"""
+        self.errores.registrar('Error Estructural', {
+            'lexema': lexema,
+            'linea': linea,
+            'columna': columna,
+            'tipo': 'Error Estructural',
+            'descripcion': descripcion
+        })
+    
+    def procesar(self, token):
+        """Avanza con un token recien reconocido por el analizador lexico"""
+        if token.tipo == 'OPEN_TAG':
+            if self.etiqueta is not None:
+                inicio = self.etiqueta[0]
+                self.error(inicio.linea, inicio.columna, self.texto_etiqueta(), "Etiqueta sin '>'")
+            self.etiqueta = [token]
+        elif self.etiqueta is not None:
+            self.etiqueta.append(token)
+            if token.tipo == 'CLOSE_TAG':
+                self.cerrar_etiqueta()
+        elif token.tipo == 'NUMBER':
+            self.valor(token)
+        else:
+            self.error(token.linea, token.columna, token.lexema, "Token fuera de una etiqueta")
+    
+    def texto_etiqueta(self):
+        """Texto de la etiqueta en curso, para mostrarlo en los errores"""
+        return "".join(token.lexema for token in self.etiqueta)
+    
+    def cerrar_etiqueta(self):
+        """Interpreta la etiqueta completa: apertura, cierre o mal formada"""
+        partes = [token.tipo for token in self.etiqueta[1:-1]]
+        inicio = self.etiqueta[0]
+        texto = self.texto_etiqueta()
+        self.etiqueta = None
+        
+        if len(partes) == 3 and partes[0] == 'OPERACION' and partes[1] == 'EQUALS' and partes[2] in ARIDAD_OPERACIONES:
+            self.abrir('OPERACION', partes[2], inicio, texto)
+        elif len(partes) == 1 and partes[0] in ('NUMERO_KW', 'P', 'R'):
+            self.abrir(partes[0], None, inicio, texto)
+        elif len(partes) == 2 and partes[0] == 'SLASH' and partes[1] in NOMBRE_ETIQUETA:
+            self.cerrar(partes[1], inicio, texto)
+        else:
+            self.error(inicio.linea, inicio.columna, texto, "Etiqueta mal formada")
+    
+    def abrir(self, etiqueta, operacion, inicio, texto):
+        """Apila un elemento y lo cuenta como operando o parametro de la operacion que lo contiene"""
+        padre = self.pila[-1] if self.pila else None
+        
+        if padre is not None and padre[0] != 'OPERACION':
+            self.error(inicio.linea, inicio.columna, texto,
+                       f"<{NOMBRE_ETIQUETA[padre[0]]}> solo puede contener un numero")
+        elif etiqueta in ('P', 'R'):
+            if padre is None or PARAMETRO_OPERACION.get(padre[1]) != etiqueta:
+                self.error(inicio.linea, inicio.columna, texto,
+                           f"<{etiqueta}> solo va dentro de una operacion {'POTENCIA' if etiqueta == 'P' else 'RAIZ'}")
+            elif padre[5]:
+                self.error(inicio.linea, inicio.columna, texto, f"<{etiqueta}> repetido en {padre[1]}")
+            else:
+                padre[5] = True
+        elif etiqueta == 'NUMERO_KW' and padre is None:
+            self.error(inicio.linea, inicio.columna, texto, "<Numero> fuera de una operacion")
+        elif padre is not None:
+            padre[4] += 1
+        
+        self.pila.append([etiqueta, operacion, inicio.linea, inicio.columna, 0, False, 0])
+    
+    def cerrar(self, etiqueta, inicio, texto):
+        """Desapila hasta el elemento que cierra la etiqueta; lo que quede abierto en el medio es un error"""
+        if not any(elemento[0] == etiqueta for elemento in self.pila):
+            self.error(inicio.linea, inicio.columna, texto, f"Cierre </{NOMBRE_ETIQUETA[etiqueta]}> sin apertura")
+            return
+        
+        while self.pila[-1][0] != etiqueta:
+            self.sin_cerrar(self.pila.pop(), f"antes de {texto}")
+        self.revisar(self.pila.pop())
+    
+    def valor(self, token):
+        """Un numero solo puede ir dentro de <Numero>, <P> o <R>, y una sola vez"""
+        elemento = self.pila[-1] if self.pila else None
+        if elemento is None or elemento[0] == 'OPERACION':
+            self.error(token.linea, token.columna, token.lexema, "Numero fuera de <Numero>, <P> o <R>")
+        elif elemento[6]:
+            self.error(token.linea, token.columna, token.lexema,
+                       f"Mas de un numero en <{NOMBRE_ETIQUETA[elemento[0]]}>")
+        else:
+            elemento[6] = 1
+    
+    def revisar(self, elemento):
+        """Al cerrar un elemento: un valor en <Numero>, <P> y <R>; operandos y parametro en la operacion"""
+        etiqueta, operacion, linea, columna, operandos, parametro, valores = elemento
+        nombre = NOMBRE_ETIQUETA[etiqueta]
+        
+        if etiqueta != 'OPERACION':
+            if not valores:
+                self.error(linea, columna, f"<{nombre}>", f"<{nombre}> sin numero")
+            return
+        
+        minimo, maximo = ARIDAD_OPERACIONES[operacion]
+        if operandos < minimo or (maximo is not None and operandos > maximo):
+            esperado = f"{minimo}" if minimo == maximo else f"al menos {minimo}"
+            self.error(linea, columna, f"<Operacion= {operacion}>",
+                       f"{operacion} necesita {esperado} operando(s) y tiene {operandos}")
+        if operacion in PARAMETRO_OPERACION and not parametro:
+            self.error(linea, columna, f"<Operacion= {operacion}>",
+                       f"{operacion} sin <{PARAMETRO_OPERACION[operacion]}>")
+    
+    def sin_cerrar(self, elemento, donde):
+        """Error por un elemento que no se cerro"""
+        nombre = NOMBRE_ETIQUETA[elemento[0]]
+        texto = f"<Operacion= {elemento[1]}>" if elemento[0] == 'OPERACION' else f"<{nombre}>"
+        self.error(elemento[2], elemento[3], texto, f"Falta </{nombre}> {donde}")
+    
+    def finalizar(self):
+        """Al terminar el archivo, lo que siga abierto es un error"""
+        if self.etiqueta is not None:
+            inicio = self.etiqueta[0]
+            self.error(inicio.linea, inicio.columna, self.texto_etiqueta(), "Etiqueta sin '>'")
+            self.etiqueta = None
+        while self.pila:
+            self.sin_cerrar(self.pila.pop(), "al final del archivo")
+
 class AnalizadorLexico:
     def __init__(self):
         
@@ -46,10 +290,18 @@ class AnalizadorLexico:
         self.patrones = []
         for nombre, patron in self.tokens_def:
             self.patrones.append((nombre, re.compile(patron)))
+        
+        # Contadores de todas las llamadas; en el ciclo solo se cuenta el token reconocido
+        self.metricas = MetricasAnalizador(nombre for nombre, _ in self.tokens_def)
 
     def analizar(self, codigo):
+        inicio = time.perf_counter()
+        tokens_por_tipo = self.metricas.tokens_por_tipo
         tokens = []
-        errores = []
+        # Guarda los primeros errores, una muestra y el conteo por tipo, no uno por caracter
+        errores = ColectorErrores()
+        # La estructura se revisa en la misma pasada, token por token, sin armar un arbol
+        validador = ValidadorEstructura(errores)
         linea = 1
         columna = 1
         pos = 0
@@ -75,7 +327,10 @@ class AnalizadorLexico:
                 match = patron.match(codigo, pos)
                 if match:
                     lexema = match.group()
-                    tokens.append(Token(nombre, lexema, linea, columna))
+                    token = Token(nombre, lexema, linea, columna)
+                    tokens.append(token)
+                    tokens_por_tipo[nombre] += 1
+                    validador.procesar(token)
                     columna += len(lexema)
                     pos = match.end()
                     match_encontrado = True
@@ -85,94 +340,93 @@ class AnalizadorLexico:
             if not match_encontrado:
                 # Caracter individual no reconocido
                 char = codigo[pos]
-                errores.append({
+                errores.registrar('Error Lexico', {
                     'lexema': char,
                     'linea': linea,
                     'columna': columna,
-                    'tipo': 'Error Lexico'
+                    'tipo': 'Error Lexico',
+                    'descripcion': 'Caracter no reconocido'
                 })
                 columna += 1
                 pos += 1
 
+        validador.finalizar()
+        self.metricas.registrar_llamada(time.perf_counter() - inicio, codigo, errores)
         return tokens, errores
 
-class GeneradorHTML:
-    @staticmethod
-    def generar_reporte_tokens(tokens, nombre_archivo):
-        """Genera reporte HTML de tokens encontrados"""
-        
-        html = f"""<!DOCTYPE html>
+# Plantillas de los reportes; se analizan una sola vez al importar el modulo
+REPORTE_TOKENS_INICIO = plantilla("""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
-    <title>Reporte de Tokens - {nombre_archivo}</title>
+    <title>Reporte de Tokens - {{nombre_archivo}}</title>
     <style>
-        body {{
+        body {
             font-family: Arial, sans-serif;
             margin: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             background: white;
             padding: 20px;
             border-radius: 10px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        h1 {{
+        }
+        h1 {
             color: #2c3e50;
             text-align: center;
             border-bottom: 3px solid #3498db;
             padding-bottom: 10px;
-        }}
-        .info {{
+        }
+        .info {
             background: #d4edda;
             padding: 15px;
             border-radius: 5px;
             margin-bottom: 20px;
             border-left: 5px solid #28a745;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 20px 0;
-        }}
-        th, td {{
+        }
+        th, td {
             border: 1px solid #ddd;
             padding: 12px;
             text-align: left;
-        }}
-        th {{
+        }
+        th {
             background-color: #34495e;
             color: white;
             font-weight: bold;
-        }}
-        tr:nth-child(even) {{
+        }
+        tr:nth-child(even) {
             background-color: #f8f9fa;
-        }}
-        tr:hover {{
+        }
+        tr:hover {
             background-color: #e3f2fd;
-        }}
-        .timestamp {{
+        }
+        .timestamp {
             text-align: right;
             color: #6c757d;
             font-style: italic;
             margin-top: 20px;
-        }}
-        .token-count {{
+        }
+        .token-count {
             background: #007bff;
             color: white;
             padding: 5px 10px;
             border-radius: 15px;
             font-weight: bold;
-        }}
-        .success {{
+        }
+        .success {
             background: #28a745;
             color: white;
             padding: 10px;
             border-radius: 5px;
             text-align: center;
             margin: 10px 0;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -180,8 +434,8 @@ class GeneradorHTML:
         <h1> Reporte de Tokens </h1>
         
         <div class="info">
-            <strong> Archivo analizado:</strong> {nombre_archivo}<br>
-            <strong> Total de tokens:</strong> <span class="token-count">{len(tokens)}</span><br>
+            <strong> Archivo analizado:</strong> {{nombre_archivo}}<br>
+            <strong> Total de tokens:</strong> <span class="token-count">{{total}}</span><br>
             <strong> Orden corregido:</strong> Palabras completas  Simbolos individuales
         </div>
         
@@ -199,114 +453,104 @@ class GeneradorHTML:
                     <th>Columna</th>
                 </tr>
             </thead>
-            <tbody>"""
-        
-        for i, token in enumerate(tokens, 1):
-            html += f"""
+            <tbody>""")
+FILA_TOKEN = plantilla("""
                 <tr>
-                    <td>{i}</td>
-                    <td><strong>{token.tipo}</strong></td>
-                    <td><code>{token.lexema}</code></td>
-                    <td>{token.linea}</td>
-                    <td>{token.columna}</td>
-                </tr>"""
-        
-        html += f"""
+                    <td>{{numero}}</td>
+                    <td><strong>{{tipo}}</strong></td>
+                    <td><code>{{lexema}}</code></td>
+                    <td>{{linea}}</td>
+                    <td>{{columna}}</td>
+                </tr>""")
+REPORTE_TOKENS_FIN = plantilla("""
             </tbody>
         </table>
         
         <div class="timestamp">
-             Generado el: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+             Generado el: {{fecha}}
         </div>
     </div>
 </body>
-</html>"""
-        
-        return html
-
-    @staticmethod
-    def generar_reporte_errores(errores, nombre_archivo):
-        """Genera reporte HTML de errores encontrados"""
-        
-        html = f"""<!DOCTYPE html>
+</html>""")
+REPORTE_ERRORES_INICIO = plantilla("""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
-    <title>Reporte de Errores - {nombre_archivo}</title>
+    <title>Reporte de Errores - {{nombre_archivo}}</title>
     <style>
-        body {{
+        body {
             font-family: Arial, sans-serif;
             margin: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             background: white;
             padding: 20px;
             border-radius: 10px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        h1 {{
+        }
+        h1 {
             color: #dc3545;
             text-align: center;
             border-bottom: 3px solid #dc3545;
             padding-bottom: 10px;
-        }}
-        .info {{
+        }
+        .info {
             background: #f8d7da;
             padding: 15px;
             border-radius: 5px;
             margin-bottom: 20px;
             border-left: 5px solid #dc3545;
-        }}
-        .no-errors {{
+        }
+        .no-errors {
             background: #d4edda;
             padding: 30px;
             border-radius: 5px;
             text-align: center;
             border-left: 5px solid #28a745;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 20px 0;
-        }}
-        th, td {{
+        }
+        th, td {
             border: 1px solid #ddd;
             padding: 12px;
             text-align: left;
-        }}
-        th {{
+        }
+        th {
             background-color: #dc3545;
             color: white;
             font-weight: bold;
-        }}
-        tr:nth-child(even) {{
+        }
+        tr:nth-child(even) {
             background-color: #f8f9fa;
-        }}
-        tr:hover {{
+        }
+        tr:hover {
             background-color: #ffe6e6;
-        }}
-        .error-count {{
+        }
+        .error-count {
             background: #dc3545;
             color: white;
             padding: 5px 10px;
             border-radius: 15px;
             font-weight: bold;
-        }}
-        .timestamp {{
+        }
+        .timestamp {
             text-align: right;
             color: #6c757d;
             font-style: italic;
             margin-top: 20px;
-        }}
-        .fixed-info {{
+        }
+        .fixed-info {
             background: #d1ecf1;
             color: #0c5460;
             padding: 15px;
             border-radius: 5px;
             border-left: 5px solid #17a2b8;
             margin-bottom: 15px;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -316,21 +560,18 @@ class GeneradorHTML:
         <div class="fixed-info">
     
         
-        </div>"""
-        
-        if not errores:
-            html += f"""
+        </div>""")
+SIN_ERRORES = plantilla("""
             <div class="no-errors">
                 <h2> ANALISIS EXITOSO!</h2>
-                <p>El archivo <strong>{nombre_archivo}</strong> fue analizado sin errores.</p>
+                <p>El archivo <strong>{{nombre_archivo}}</strong> fue analizado sin errores.</p>
                 <p><strong>Correccion aplicada:</strong>.</p>
-            </div>"""
-        else:
-            html += f"""
+            </div>""")
+TABLA_ERRORES_INICIO = plantilla("""
             <div class="info">
-                <strong> Archivo analizado:</strong> {nombre_archivo}<br>
-                <strong> Total de errores:</strong> <span class="error-count">{len(errores)}</span><br>
-                <strong> Estos son errores:</strong> Caracteres no validos en el lenguaje
+                <strong> Archivo analizado:</strong> {{nombre_archivo}}<br>
+                <strong> Total de errores:</strong> <span class="error-count">{{total}}</span><br>
+                <strong> Estos son errores:</strong> Caracteres no validos en el lenguaje y etiquetas u operandos mal estructurados
             </div>
             
             <table>
@@ -341,33 +582,120 @@ class GeneradorHTML:
                         <th>Columna</th>
                         <th>Lexema No Valido</th>
                         <th>Tipo de Error</th>
+                        <th>Descripcion</th>
                     </tr>
                 </thead>
-                <tbody>"""
+                <tbody>""")
+FILA_ERROR = plantilla("""
+                    <tr>
+                        <td>{{numero}}</td>
+                        <td>{{linea}}</td>
+                        <td>{{columna}}</td>
+                        <td><strong><code>"{{lexema}}"</code></strong></td>
+                        <td>{{tipo}}</td>
+                        <td>{{descripcion}}</td>
+                    </tr>""")
+TABLA_ERRORES_FIN = plantilla("""
+                </tbody>
+            </table>""")
+RESUMEN_ERRORES_INICIO = plantilla("""
+            <div class="info">
+                <strong> Se muestran los primeros {{mostrados}} de {{total}} errores.</strong> Cantidad por tipo de error:
+            </div>
             
-            for i, error in enumerate(errores, 1):
-                html += f"""
+            <table>
+                <thead>
+                    <tr>
+                        <th>Tipo de Error</th>
+                        <th>Cantidad</th>
+                    </tr>
+                </thead>
+                <tbody>""")
+FILA_RESUMEN_ERROR = plantilla("""
                     <tr>
-                        <td>{i}</td>
-                        <td>{error['linea']}</td>
-                        <td>{error['columna']}</td>
-                        <td><strong><code>"{error['lexema']}"</code></strong></td>
-                        <td>{error['tipo']}</td>
-                    </tr>"""
+                        <td>{{tipo}}</td>
+                        <td>{{cantidad}}</td>
+                    </tr>""")
+MUESTRA_ERRORES_INICIO = plantilla("""
+            <div class="info">
+                <strong> Muestra al azar de {{cantidad}} errores de todo el archivo</strong>
+            </div>
             
-            html += """
-                </tbody>
-            </table>"""
-        
-        html += f"""
+            <table>
+                <thead>
+                    <tr>
+                        <th>#</th>
+                        <th>Linea</th>
+                        <th>Columna</th>
+                        <th>Lexema No Valido</th>
+                        <th>Tipo de Error</th>
+                        <th>Descripcion</th>
+                    </tr>
+                </thead>
+                <tbody>""")
+REPORTE_ERRORES_FIN = plantilla("""
         <div class="timestamp">
-             Generado el: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+             Generado el: {{fecha}}
         </div>
     </div>
 </body>
-</html>"""
+</html>""")
+
+class GeneradorHTML:
+    @staticmethod
+    def escribir_reporte_tokens(archivo, tokens, nombre_archivo):
+        """Escribe el reporte HTML de tokens fila por fila en el archivo"""
+        REPORTE_TOKENS_INICIO.escribir(archivo, nombre_archivo=nombre_archivo, total=len(tokens))
+        FILA_TOKEN.escribir_filas(archivo, (
+            (i, token.tipo, token.lexema, token.linea, token.columna)
+            for i, token in enumerate(tokens, 1)
+        ))
+        REPORTE_TOKENS_FIN.escribir(archivo, fecha=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    @staticmethod
+    def generar_reporte_tokens(tokens, nombre_archivo):
+        """Genera reporte HTML de tokens encontrados"""
+        buffer = io.StringIO()
+        GeneradorHTML.escribir_reporte_tokens(buffer, tokens, nombre_archivo)
+        return buffer.getvalue()
+
+    @staticmethod
+    def escribir_reporte_errores(archivo, errores, nombre_archivo):
+        """Escribe el reporte HTML de errores fila por fila en el archivo"""
+        REPORTE_ERRORES_INICIO.escribir(archivo, nombre_archivo=nombre_archivo)
+        
+        if not errores:
+            SIN_ERRORES.escribir(archivo, nombre_archivo=nombre_archivo)
+        else:
+            TABLA_ERRORES_INICIO.escribir(archivo, nombre_archivo=nombre_archivo, total=len(errores))
+            FILA_ERROR.escribir_filas(archivo, (
+                (i, error['linea'], error['columna'], error['lexema'], error['tipo'], error['descripcion'])
+                for i, error in enumerate(errores, 1)
+            ))
+            TABLA_ERRORES_FIN.escribir(archivo)
+            
+            # Si no entraron todos, se resume el resto con el conteo por tipo y la muestra
+            if errores.omitidos():
+                RESUMEN_ERRORES_INICIO.escribir(archivo, mostrados=len(errores.primeros), total=len(errores))
+                FILA_RESUMEN_ERROR.escribir_filas(archivo, errores.resumen_clases())
+                TABLA_ERRORES_FIN.escribir(archivo)
+                
+                muestra = sorted(errores.muestra, key=lambda error: (error['linea'], error['columna']))
+                MUESTRA_ERRORES_INICIO.escribir(archivo, cantidad=len(muestra))
+                FILA_ERROR.escribir_filas(archivo, (
+                    (i, error['linea'], error['columna'], error['lexema'], error['tipo'], error['descripcion'])
+                    for i, error in enumerate(muestra, 1)
+                ))
+                TABLA_ERRORES_FIN.escribir(archivo)
         
-        return html
+        REPORTE_ERRORES_FIN.escribir(archivo, fecha=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    @staticmethod
+    def generar_reporte_errores(errores, nombre_archivo):
+        """Genera reporte HTML de errores encontrados"""
+        buffer = io.StringIO()
+        GeneradorHTML.escribir_reporte_errores(buffer, errores, nombre_archivo)
+        return buffer.getvalue()
 
 def main():
     """Funcion principal del analizador lexico """
@@ -378,6 +706,9 @@ def main():
     print(" ............")
     print("="*70)
     
+    # Un solo analizador para toda la sesion: sus metricas se acumulan entre archivos
+    analizador = AnalizadorLexico()
+    
     while True:
         print("\nOpciones:")
         print("1. Analizar archivo")
@@ -386,14 +717,14 @@ def main():
         opcion = input("\nSeleccione una opcion (1-2): ").strip()
         
         if opcion == "1":
-            analizar_archivo()
+            analizar_archivo(analizador)
         elif opcion == "2":
             print("todo bien")
             break
         else:
             print(" Opcion no valida. Intente nuevamente.")
 
-def analizar_archivo():
+def analizar_archivo(analizador=None):
     """Funcion para analizar un archivo especifico"""
     
     archivo_path = input("\n Ingrese la ruta del archivo .txt a analizar: ").strip()
@@ -413,7 +744,8 @@ def analizar_archivo():
         print(f"\n Leyendo archivo: {os.path.basename(archivo_path)}")
         print("    ORDEN : Palabras completas  Simbolos individuales")
         
-        analizador = AnalizadorLexico()
+        if analizador is None:
+            analizador = AnalizadorLexico()
         print(" Analizando codigo...")
         
         tokens, errores = analizador.analizar(codigo)
@@ -421,22 +753,26 @@ def analizar_archivo():
         print(f"\n  RESULTADOS:")
         print(f"    Tokens reconocidos: {len(tokens)}")
         print(f"    Errores reales: {len(errores)}")
+        for tipo, cantidad in errores.resumen_clases():
+            print(f"      {tipo}: {cantidad}")
         print(f"    Orden de patrones ")
         
         generador = GeneradorHTML()
         nombre_archivo = os.path.basename(archivo_path)
         
-        html_tokens = generador.generar_reporte_tokens(tokens, nombre_archivo)
-        with open('reporte_tokens.html', 'w', encoding='utf-8') as f:
-            f.write(html_tokens)
+        with open('reporte_tokens.html', 'w', encoding='utf-8', buffering=TAMANO_BUFFER_REPORTE) as f:
+            generador.escribir_reporte_tokens(f, tokens, nombre_archivo)
+        
+        with open('reporte_errores.html', 'w', encoding='utf-8', buffering=TAMANO_BUFFER_REPORTE) as f:
+            generador.escribir_reporte_errores(f, errores, nombre_archivo)
         
-        html_errores = generador.generar_reporte_errores(errores, nombre_archivo)
-        with open('reporte_errores.html', 'w', encoding='utf-8') as f:
-            f.write(html_errores)
+        analizador.metricas.guardar(ARCHIVO_METRICAS + '.prom')
+        analizador.metricas.guardar(ARCHIVO_METRICAS + '.json', 'json')
         
         print("\n REPORTES GENERADOS:")
         print(f"   reporte_tokens.html")
         print(f"    reporte_errores.html")
+        print(f"    {ARCHIVO_METRICAS}.prom y {ARCHIVO_METRICAS}.json")
         print(f"\n ----------------------->")
         
     except Exception as e:
@@ -0,0 +1,62 @@
+import importlib.util
+import os
+import unittest
+
+# El modulo tiene un espacio en el nombre, asi que se carga desde su ruta
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+especificacion = importlib.util.spec_from_file_location("analizador_lexico", os.path.join(CARPETA, "analizador lexico.py"))
+analizador_lexico = importlib.util.module_from_spec(especificacion)
+especificacion.loader.exec_module(analizador_lexico)
+
+ENTRADA_PRUEBA = os.path.join(os.path.dirname(CARPETA), "Archivos prueba", "Entrada1.txt")
+
+SUMA = "<Operacion= SUMA>\n  <Numero> 1 </Numero>\n  <Numero> 2 </Numero>\n"
+
+class PruebaValidadorEstructura(unittest.TestCase):
+    """Las etiquetas sin cerrar, los cierres sueltos y los operandos de mas o de menos se informan con su ubicacion"""
+    
+    def errores(self, codigo):
+        _, errores = analizador_lexico.AnalizadorLexico().analizar(codigo)
+        return [(error['tipo'], error['linea'], error['columna'], error['descripcion']) for error in errores]
+    
+    def test_entrada_de_prueba(self):
+        with open(ENTRADA_PRUEBA, encoding='utf-8') as archivo:
+            self.assertEqual(self.errores(archivo.read()), [])
+    
+    def test_sin_cerrar_al_final(self):
+        self.assertEqual(self.errores(SUMA), [
+            ('Error Estructural', 1, 1, "Falta </Operacion> al final del archivo"),
+        ])
+    
+    def test_sin_cerrar_antes_de_otro_cierre(self):
+        self.assertEqual(self.errores("<Operacion= SUMA>\n  <Numero> 1 </Numero>\n  <Numero> 2\n</Operacion>\n"), [
+            ('Error Estructural', 3, 3, "Falta </Numero> antes de </Operacion>"),
+        ])
+    
+    def test_cierre_sin_apertura(self):
+        self.assertEqual(self.errores(SUMA + "</Operacion>\n</Numero>\n"), [
+            ('Error Estructural', 5, 1, "Cierre </Numero> sin apertura"),
+        ])
+    
+    def test_etiqueta_sin_mayor(self):
+        self.assertEqual(self.errores(SUMA + "</Operacion"), [
+            ('Error Estructural', 4, 1, "Etiqueta sin '>'"),
+            ('Error Estructural', 1, 1, "Falta </Operacion> al final del archivo"),
+        ])
+    
+    def test_cantidad_de_operandos(self):
+        self.assertEqual(self.errores("<Operacion= SUMA>\n  <Numero> 1 </Numero>\n</Operacion>\n"), [
+            ('Error Estructural', 1, 1, "SUMA necesita al menos 2 operando(s) y tiene 1"),
+        ])
+        self.assertEqual(self.errores(SUMA.replace("SUMA", "POTENCIA") + "</Operacion>\n"), [
+            ('Error Estructural', 1, 1, "POTENCIA necesita 1 operando(s) y tiene 2"),
+            ('Error Estructural', 1, 1, "POTENCIA sin <P>"),
+        ])
+    
+    def test_error_lexico_no_rompe_la_estructura(self):
+        self.assertEqual(self.errores(SUMA.replace("1 ", "1 # ") + "</Operacion>\n"), [
+            ('Error Lexico', 2, 14, "Caracter no reconocido"),
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
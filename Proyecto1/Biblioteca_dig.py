@@ -1,727 +1,1749 @@
-﻿import os
-from datetime import datetime
-
-class Usuario:
-    def __init__(self, id_usuario, nombre):
-        self.id_usuario = id_usuario
-        self.nombre = nombre
-    
-    def __str__(self):
-        return f"ID: {self.id_usuario}, Nombre: {self.nombre}"
-
-class Libro:
-    def __init__(self, id_libro, titulo):
-        self.id_libro = id_libro
-        self.titulo = titulo
-    
-    def __str__(self):
-        return f"ID: {self.id_libro}, Título: {self.titulo}"
-
-class Prestamo:
-    def __init__(self, id_usuario, nombre_usuario, id_libro, titulo_libro, fecha_prestamo, fecha_devolucion=""):
-        self.id_usuario = id_usuario
-        self.nombre_usuario = nombre_usuario
-        self.id_libro = id_libro
-        self.titulo_libro = titulo_libro
-        self.fecha_prestamo = fecha_prestamo
-        self.fecha_devolucion = fecha_devolucion
-    
-    def __str__(self):
-        return f"Usuario: {self.nombre_usuario}, Libro: {self.titulo_libro}, Fecha: {self.fecha_prestamo}"
-
-class BibliotecaDigital:
-    def __init__(self):
-        self.usuarios = {}  # diccionario para almacenar usuarios por ID
-        self.libros = {}    # diccionario para almacenar libros por ID
-        self.prestamos = [] # lista para todos los préstamos
-        self.errores_lectura = [] # para almacenar errores de formato
-    
-    def es_fecha_valida(self, fecha):
-        """Valida que la fecha tenga formato YYYY-MM-DD"""
-        if len(fecha) != 10:
-            return False
-        if fecha[4] != '-' or fecha[7] != '-':
-            return False
-        
-        # Verificar que año, mes y día sean números
-        try:
-            año = int(fecha[:4])
-            mes = int(fecha[5:7])
-            dia = int(fecha[8:10])
-            
-            # Validaciones básicas
-            if mes < 1 or mes > 12:
-                return False
-            if dia < 1 or dia > 31:
-                return False
-            if año < 1900 or año > 2030:
-                return False
-            
-            return True
-        except ValueError:
-            return False
-    
-    def es_numero_valido(self, texto):
-        """Verifica si el texto es un número válido"""
-        if not texto:
-            return False
-        for char in texto:
-            if char < '0' or char > '9':
-                return False
-        return True
-    
-    def validar_caracteres_texto(self, texto):
-        """Valida caracteres permitidos en nombres y títulos"""
-        caracteres_permitidos = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 áéíóúÁÉÍÓÚñÑ.,;:-_()"
-        for i, char in enumerate(texto):
-            if char not in caracteres_permitidos:
-                return False, i, char
-        return True, -1, ""
-    
-    def cargar_usuarios(self):
-        """Carga usuarios desde archivo de texto"""
-        nombre_archivo = input("Ingrese el nombre del archivo de usuarios: ")
-        
-        if not os.path.exists(nombre_archivo):
-            print(f"Error: El archivo '{nombre_archivo}' no existe.")
-            return
-        
-        try:
-            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-                linea_num = 0
-                usuarios_cargados = 0
-                
-                for linea in archivo:
-                    linea_num += 1
-                    linea = linea.strip()
-                    
-                    if not linea:  # saltar líneas vacías
-                        continue
-                    
-                    # Buscar el separador (,)
-                    partes = []
-                    parte_actual = ""
-                    
-                    for char in linea:
-                        if char == ',':
-                            partes.append(parte_actual.strip())
-                            parte_actual = ""
-                        else:
-                            parte_actual += char
-                    partes.append(parte_actual.strip())
-                    
-                    if len(partes) != 2:
-                        print(f"Error línea {linea_num}: Formato incorrecto. Se esperaban 2 campos separados por coma.")
-                        continue
-                    
-                    id_usuario, nombre = partes[0], partes[1]
-                    
-                    # Validar ID de usuario
-                    if not self.es_numero_valido(id_usuario):
-                        print(f"Error línea {linea_num}: ID de usuario inválido '{id_usuario}'")
-                        continue
-                    
-                    # Validar nombre
-                    es_valido, pos, char = self.validar_caracteres_texto(nombre)
-                    if not es_valido:
-                        print(f"Error línea {linea_num}, posición {pos}: Carácter inválido '{char}' en nombre")
-                        continue
-                    
-                    # Agregar usuario
-                    self.usuarios[id_usuario] = Usuario(id_usuario, nombre)
-                    usuarios_cargados += 1
-                
-                print(f"Se cargaron {usuarios_cargados} usuarios correctamente.")
-        
-        except Exception as e:
-            print(f"Error al leer el archivo: {e}")
-    
-    def cargar_libros(self):
-        """Carga libros desde archivo de texto"""
-        nombre_archivo = input("Ingrese el nombre del archivo de libros: ")
-        
-        if not os.path.exists(nombre_archivo):
-            print(f"Error: El archivo '{nombre_archivo}' no existe.")
-            return
-        
-        try:
-            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-                linea_num = 0
-                libros_cargados = 0
-                
-                for linea in archivo:
-                    linea_num += 1
-                    linea = linea.strip()
-                    
-                    if not linea:
-                        continue
-                    
-                    # Separar por coma
-                    partes = []
-                    parte_actual = ""
-                    
-                    for char in linea:
-                        if char == ',':
-                            partes.append(parte_actual.strip())
-                            parte_actual = ""
-                        else:
-                            parte_actual += char
-                    partes.append(parte_actual.strip())
-                    
-                    if len(partes) != 2:
-                        print(f"Error línea {linea_num}: Formato incorrecto. Se esperaban 2 campos separados por coma.")
-                        continue
-                    
-                    id_libro, titulo = partes[0], partes[1]
-                    
-                    # Validar ID de libro
-                    if not self.es_numero_valido(id_libro):
-                        print(f"Error línea {linea_num}: ID de libro inválido '{id_libro}'")
-                        continue
-                    
-                    # Validar título
-                    es_valido, pos, char = self.validar_caracteres_texto(titulo)
-                    if not es_valido:
-                        print(f"Error línea {linea_num}, posición {pos}: Carácter inválido '{char}' en título")
-                        continue
-                    
-                    # Agregar libro
-                    self.libros[id_libro] = Libro(id_libro, titulo)
-                    libros_cargados += 1
-                
-                print(f"Se cargaron {libros_cargados} libros correctamente.")
-        
-        except Exception as e:
-            print(f"Error al leer el archivo: {e}")
-    
-    def cargar_prestamos(self):
-        """Carga préstamos desde archivo .lfa"""
-        nombre_archivo = input("Ingrese el nombre del archivo de préstamos (.lfa): ")
-        
-        if not os.path.exists(nombre_archivo):
-            print(f"Error: El archivo '{nombre_archivo}' no existe.")
-            return
-        
-        try:
-            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-                linea_num = 0
-                prestamos_cargados = 0
-                
-                for linea in archivo:
-                    linea_num += 1
-                    linea = linea.strip()
-                    
-                    if not linea:
-                        continue
-                    
-                    # Separar campos por coma
-                    campos = []
-                    campo_actual = ""
-                    
-                    for char in linea:
-                        if char == ',':
-                            campos.append(campo_actual.strip())
-                            campo_actual = ""
-                        else:
-                            campo_actual += char
-                    campos.append(campo_actual.strip())
-                    
-                    if len(campos) != 6:
-                        print(f"Error línea {linea_num}: Se esperaban 6 campos, se encontraron {len(campos)}")
-                        continue
-                    
-                    id_usuario, nombre_usuario, id_libro, titulo_libro, fecha_prestamo, fecha_devolucion = campos
-                    
-                    # Validar ID de usuario
-                    if not self.es_numero_valido(id_usuario):
-                        print(f"Error línea {linea_num}: ID de usuario inválido '{id_usuario}'")
-                        continue
-                    
-                    # Validar ID de libro
-                    if not self.es_numero_valido(id_libro):
-                        print(f"Error línea {linea_num}: ID de libro inválido '{id_libro}'")
-                        continue
-                    
-                    # Verificar que usuario existe en catálogo
-                    if id_usuario not in self.usuarios:
-                        print(f"Error línea {linea_num}: Usuario con ID '{id_usuario}' no existe en el catálogo")
-                        continue
-                    
-                    # Verificar que libro existe en catálogo
-                    if id_libro not in self.libros:
-                        print(f"Error línea {linea_num}: Libro con ID '{id_libro}' no existe en el catálogo")
-                        continue
-                    
-                    # Validar nombres/títulos
-                    es_valido, pos, char = self.validar_caracteres_texto(nombre_usuario)
-                    if not es_valido:
-                        print(f"Error línea {linea_num}, posición {pos}: Carácter inválido '{char}' en nombre de usuario")
-                        continue
-                    
-                    es_valido, pos, char = self.validar_caracteres_texto(titulo_libro)
-                    if not es_valido:
-                        print(f"Error línea {linea_num}, posición {pos}: Carácter inválido '{char}' en título de libro")
-                        continue
-                    
-                    # Validar fecha de préstamo
-                    if not self.es_fecha_valida(fecha_prestamo):
-                        print(f"Error línea {linea_num}: Fecha de préstamo inválida '{fecha_prestamo}'")
-                        continue
-                    
-                    # Validar fecha de devolución (si no está vacía)
-                    if fecha_devolucion and not self.es_fecha_valida(fecha_devolucion):
-                        print(f"Error línea {linea_num}: Fecha de devolución inválida '{fecha_devolucion}'")
-                        continue
-                    
-                    # Crear préstamo
-                    prestamo = Prestamo(id_usuario, nombre_usuario, id_libro, titulo_libro, fecha_prestamo, fecha_devolucion)
-                    self.prestamos.append(prestamo)
-                    prestamos_cargados += 1
-                
-                print(f"Se cargaron {prestamos_cargados} préstamos correctamente.")
-        
-        except Exception as e:
-            print(f"Error al leer el archivo: {e}")
-    
-    def mostrar_historial_prestamos(self):
-        """Muestra todos los préstamos registrados"""
-        if not self.prestamos:
-            print("No hay préstamos registrados.")
-            return
-        
-        print("\n=== HISTORIAL DE PRÉSTAMOS ===")
-        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
-        print("-" * 120)
-        
-        for prestamo in self.prestamos:
-            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No devuelto"
-            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {devolucion:<15}")
-    
-    def mostrar_usuarios_unicos(self):
-        """Muestra lista de usuarios únicos que han realizado préstamos"""
-        if not self.prestamos:
-            print("No hay préstamos registrados.")
-            return
-        
-        usuarios_unicos = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_usuario not in usuarios_unicos:
-                usuarios_unicos[prestamo.id_usuario] = prestamo.nombre_usuario
-        
-        print("\n=== LISTADO DE USUARIOS ÚNICOS ===")
-        print(f"{'ID Usuario':<12} {'Nombre Usuario':<30}")
-        print("-" * 45)
-        
-        for id_usuario, nombre in usuarios_unicos.items():
-            print(f"{id_usuario:<12} {nombre:<30}")
-    
-    def mostrar_libros_prestados(self):
-        """Muestra lista de libros que han sido prestados, sin duplicados"""
-        if not self.prestamos:
-            print("No hay préstamos registrados.")
-            return
-        
-        libros_prestados = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_libro not in libros_prestados:
-                libros_prestados[prestamo.id_libro] = prestamo.titulo_libro
-        
-        print("\n=== LISTADO DE LIBROS PRESTADOS ===")
-        print(f"{'ID Libro':<10} {'Título del Libro':<40}")
-        print("-" * 55)
-        
-        for id_libro, titulo in libros_prestados.items():
-            print(f"{id_libro:<10} {titulo:<40}")
-    
-    def mostrar_estadisticas(self):
-        """Muestra estadísticas generales de préstamos"""
-        if not self.prestamos:
-            print("No hay préstamos registrados.")
-            return
-        
-        # Total de préstamos
-        total_prestamos = len(self.prestamos)
-        
-        # Usuarios únicos
-        usuarios_unicos = set()
-        for prestamo in self.prestamos:
-            usuarios_unicos.add(prestamo.id_usuario)
-        total_usuarios = len(usuarios_unicos)
-        
-        # Libro más prestado
-        contador_libros = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_libro in contador_libros:
-                contador_libros[prestamo.id_libro] += 1
-            else:
-                contador_libros[prestamo.id_libro] = 1
-        
-        libro_mas_prestado = ""
-        max_prestamos = 0
-        for id_libro, cantidad in contador_libros.items():
-            if cantidad > max_prestamos:
-                max_prestamos = cantidad
-                # Buscar el título del libro
-                for prestamo in self.prestamos:
-                    if prestamo.id_libro == id_libro:
-                        libro_mas_prestado = prestamo.titulo_libro
-                        break
-        
-        # Usuario más activo
-        contador_usuarios = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_usuario in contador_usuarios:
-                contador_usuarios[prestamo.id_usuario] += 1
-            else:
-                contador_usuarios[prestamo.id_usuario] = 1
-        
-        usuario_mas_activo = ""
-        max_actividad = 0
-        for id_usuario, cantidad in contador_usuarios.items():
-            if cantidad > max_actividad:
-                max_actividad = cantidad
-                # Buscar el nombre del usuario
-                for prestamo in self.prestamos:
-                    if prestamo.id_usuario == id_usuario:
-                        usuario_mas_activo = prestamo.nombre_usuario
-                        break
-        
-        print("\n=== ESTADÍSTICAS DE PRÉSTAMOS ===")
-        print(f"Total de préstamos: {total_prestamos}")
-        print(f"Total de usuarios únicos: {total_usuarios}")
-        print(f"Libro más prestado: {libro_mas_prestado} ({max_prestamos} veces)")
-        print(f"Usuario más activo: {usuario_mas_activo} ({max_actividad} préstamos)")
-    
-    def mostrar_prestamos_vencidos(self):
-        """Muestra préstamos vencidos (fecha de devolución pasada y no devueltos)"""
-        if not self.prestamos:
-            print("No hay préstamos registrados.")
-            return
-        
-        # Obtener fecha actual
-        fecha_actual = datetime.now().strftime("%Y-%m-%d")
-        
-        prestamos_vencidos = []
-        for prestamo in self.prestamos:
-            # Si no tiene fecha de devolución, significa que no ha sido devuelto
-            # y si tiene fecha de devolución pero es anterior a hoy, está vencido
-            if not prestamo.fecha_devolucion:
-                prestamos_vencidos.append(prestamo)
-            elif prestamo.fecha_devolucion < fecha_actual:
-                prestamos_vencidos.append(prestamo)
-        
-        if not prestamos_vencidos:
-            print("No hay préstamos vencidos.")
-            return
-        
-        print("\n=== PRÉSTAMOS VENCIDOS ===")
-        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
-        print("-" * 120)
-        
-        for prestamo in prestamos_vencidos:
-            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No especificada"
-            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {devolucion:<15}")
-    
-    def generar_html_historial(self):
-        """Genera HTML para el historial de préstamos"""
-        html = """
-        <h2>Historial de Préstamos</h2>
-        <table border='1' style='border-collapse: collapse; width: 100%;'>
-        <tr>
-            <th>ID Usuario</th>
-            <th>Nombre Usuario</th>
-            <th>ID Libro</th>
-            <th>Título Libro</th>
-            <th>Fecha Préstamo</th>
-            <th>Fecha Devolución</th>
-        </tr>
-        """
-        
-        for prestamo in self.prestamos:
-            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No devuelto"
-            html += f"""
-        <tr>
-            <td>{prestamo.id_usuario}</td>
-            <td>{prestamo.nombre_usuario}</td>
-            <td>{prestamo.id_libro}</td>
-            <td>{prestamo.titulo_libro}</td>
-            <td>{prestamo.fecha_prestamo}</td>
-            <td>{devolucion}</td>
-        </tr>
-            """
-        
-        html += "</table>\n"
-        return html
-    
-    def generar_html_usuarios(self):
-        """Genera HTML para usuarios únicos"""
-        usuarios_unicos = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_usuario not in usuarios_unicos:
-                usuarios_unicos[prestamo.id_usuario] = prestamo.nombre_usuario
-        
-        html = """
-        <h2>Listado de Usuarios Únicos</h2>
-        <table border='1' style='border-collapse: collapse; width: 100%;'>
-        <tr>
-            <th>ID Usuario</th>
-            <th>Nombre Usuario</th>
-        </tr>
-        """
-        
-        for id_usuario, nombre in usuarios_unicos.items():
-            html += f"""
-        <tr>
-            <td>{id_usuario}</td>
-            <td>{nombre}</td>
-        </tr>
-            """
-        
-        html += "</table>\n"
-        return html
-    
-    def generar_html_libros(self):
-        """Genera HTML para libros prestados"""
-        libros_prestados = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_libro not in libros_prestados:
-                libros_prestados[prestamo.id_libro] = prestamo.titulo_libro
-        
-        html = """
-        <h2>Listado de Libros Prestados</h2>
-        <table border='1' style='border-collapse: collapse; width: 100%;'>
-        <tr>
-            <th>ID Libro</th>
-            <th>Título del Libro</th>
-        </tr>
-        """
-        
-        for id_libro, titulo in libros_prestados.items():
-            html += f"""
-        <tr>
-            <td>{id_libro}</td>
-            <td>{titulo}</td>
-        </tr>
-            """
-        
-        html += "</table>\n"
-        return html
-    
-    def generar_html_estadisticas(self):
-        """Genera HTML para estadísticas"""
-        if not self.prestamos:
-            return "<h2>Estadísticas de Préstamos</h2><p>No hay datos disponibles.</p>\n"
-        
-        # Calcular estadísticas (mismo código que mostrar_estadisticas)
-        total_prestamos = len(self.prestamos)
-        
-        usuarios_unicos = set()
-        for prestamo in self.prestamos:
-            usuarios_unicos.add(prestamo.id_usuario)
-        total_usuarios = len(usuarios_unicos)
-        
-        contador_libros = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_libro in contador_libros:
-                contador_libros[prestamo.id_libro] += 1
-            else:
-                contador_libros[prestamo.id_libro] = 1
-        
-        libro_mas_prestado = ""
-        max_prestamos = 0
-        for id_libro, cantidad in contador_libros.items():
-            if cantidad > max_prestamos:
-                max_prestamos = cantidad
-                for prestamo in self.prestamos:
-                    if prestamo.id_libro == id_libro:
-                        libro_mas_prestado = prestamo.titulo_libro
-                        break
-        
-        contador_usuarios = {}
-        for prestamo in self.prestamos:
-            if prestamo.id_usuario in contador_usuarios:
-                contador_usuarios[prestamo.id_usuario] += 1
-            else:
-                contador_usuarios[prestamo.id_usuario] = 1
-        
-        usuario_mas_activo = ""
-        max_actividad = 0
-        for id_usuario, cantidad in contador_usuarios.items():
-            if cantidad > max_actividad:
-                max_actividad = cantidad
-                for prestamo in self.prestamos:
-                    if prestamo.id_usuario == id_usuario:
-                        usuario_mas_activo = prestamo.nombre_usuario
-                        break
-        
-        html = f"""
-        <h2>Estadísticas de Préstamos</h2>
-        <table border='1' style='border-collapse: collapse; width: 100%;'>
-        <tr>
-            <th>Métrica</th>
-            <th>Valor</th>
-        </tr>
-        <tr>
-            <td>Total de préstamos</td>
-            <td>{total_prestamos}</td>
-        </tr>
-        <tr>
-            <td>Total de usuarios únicos</td>
-            <td>{total_usuarios}</td>
-        </tr>
-        <tr>
-            <td>Libro más prestado</td>
-            <td>{libro_mas_prestado} ({max_prestamos} veces)</td>
-        </tr>
-        <tr>
-            <td>Usuario más activo</td>
-            <td>{usuario_mas_activo} ({max_actividad} préstamos)</td>
-        </tr>
-        </table>
-        """
-        
-        return html
-    
-    def generar_html_vencidos(self):
-        """Genera HTML para préstamos vencidos"""
-        fecha_actual = datetime.now().strftime("%Y-%m-%d")
-        
-        prestamos_vencidos = []
-        for prestamo in self.prestamos:
-            if not prestamo.fecha_devolucion:
-                prestamos_vencidos.append(prestamo)
-            elif prestamo.fecha_devolucion < fecha_actual:
-                prestamos_vencidos.append(prestamo)
-        
-        html = """
-        <h2>Préstamos Vencidos</h2>
-        <table border='1' style='border-collapse: collapse; width: 100%;'>
-        <tr>
-            <th>ID Usuario</th>
-            <th>Nombre Usuario</th>
-            <th>ID Libro</th>
-            <th>Título Libro</th>
-            <th>Fecha Préstamo</th>
-            <th>Fecha Devolución</th>
-        </tr>
-        """
-        
-        for prestamo in prestamos_vencidos:
-            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No especificada"
-            html += f"""
-        <tr>
-            <td>{prestamo.id_usuario}</td>
-            <td>{prestamo.nombre_usuario}</td>
-            <td>{prestamo.id_libro}</td>
-            <td>{prestamo.titulo_libro}</td>
-            <td>{prestamo.fecha_prestamo}</td>
-            <td>{devolucion}</td>
-        </tr>
-            """
-        
-        html += "</table>\n"
-        return html
-    
-    def exportar_reportes_html(self):
-        """Exporta todos los reportes a un archivo HTML"""
-        if not self.prestamos:
-            print("No hay datos para exportar.")
-            return
-        
-        nombre_archivo = input("Ingrese el nombre del archivo HTML (ej: reportes.html): ")
-        
-        try:
-            with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
-                # Encabezado HTML
-                archivo.write("""<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Reportes - Biblioteca Digital</title>
-    <style>
-        body { font-family: Arial, sans-serif; margin: 20px; }
-        h1 { color: #2c3e50; text-align: center; }
-        h2 { color: #34495e; border-bottom: 2px solid #3498db; padding-bottom: 5px; }
-        table { margin-bottom: 30px; }
-        th { background-color: #3498db; color: white; padding: 10px; }
-        td { padding: 8px; }
-        tr:nth-child(even) { background-color: #f2f2f2; }
-    </style>
-</head>
-<body>
-    <h1>Reportes de Biblioteca Digital</h1>
-""")
-                
-                # Generar cada reporte
-                archivo.write(self.generar_html_historial())
-                archivo.write(self.generar_html_usuarios())
-                archivo.write(self.generar_html_libros())
-                archivo.write(self.generar_html_estadisticas())
-                archivo.write(self.generar_html_vencidos())
-                
-                # Cerrar HTML
-                archivo.write("""
-</body>
-</html>
-""")
-            
-            print(f"Reportes exportados exitosamente a '{nombre_archivo}'")
-        
-        except Exception as e:
-            print(f"Error al exportar reportes: {e}")
-
-def main():
-    biblioteca = BibliotecaDigital()
-    
-    while True:
-        print("\n" + "="*50)
-        print("    SISTEMA DE BIBLIOTECA DIGITAL")
-        print("="*50)
-        print("1. Cargar usuarios")
-        print("2. Cargar libros") 
-        print("3. Cargar registro de préstamos desde archivo")
-        print("4. Mostrar historial de préstamos")
-        print("5. Mostrar listado de usuarios únicos")
-        print("6. Mostrar listado de libros prestados")
-        print("7. Mostrar estadísticas de préstamos")
-        print("8. Mostrar préstamos vencidos")
-        print("9. Exportar todos los reportes a HTML")
-        print("10. Salir")
-        print("="*50)
-        
-        try:
-            opcion = input("Seleccione una opción (1-10): ").strip()
-            
-            if opcion == "1":
-                biblioteca.cargar_usuarios()
-            elif opcion == "2":
-                biblioteca.cargar_libros()
-            elif opcion == "3":
-                biblioteca.cargar_prestamos()
-            elif opcion == "4":
-                biblioteca.mostrar_historial_prestamos()
-            elif opcion == "5":
-                biblioteca.mostrar_usuarios_unicos()
-            elif opcion == "6":
-                biblioteca.mostrar_libros_prestados()
-            elif opcion == "7":
-                biblioteca.mostrar_estadisticas()
-            elif opcion == "8":
-                biblioteca.mostrar_prestamos_vencidos()
-            elif opcion == "9":
-                biblioteca.exportar_reportes_html()
-            elif opcion == "10":
-                print("¡Gracias por usar el Sistema de Biblioteca Digital!")
-                break
-            else:
-                print("Opción inválida. Por favor seleccione una opción del 1 al 10.")
-        
-        except KeyboardInterrupt:
-            print("\n\n¡Programa interrumpido por el usuario!")
-            break
-        except Exception as e:
-            print(f"Error inesperado: {e}")
-
-if __name__ == "__main__":
-    main()
+﻿import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+import zlib
+from contextlib import redirect_stdout
+from array import array
+from collections import Counter
+from datetime import date, datetime
+from functools import wraps
+from itertools import chain, zip_longest
+from operator import attrgetter
+
+# plantillas_html.py y colector_errores.py están en la raíz del repositorio porque los comparten los dos proyectos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitacora import BitacoraPrestamos
+from colector_errores import ColectorErrores
+from indices import FiltroDuplicados, IndiceIntervalos, IndiceTexto, IndiceTrigramas, IndiceVencimientos
+from lector_lfa import diagnosticar_prestamo, separar_prestamo
+from plantillas_html import plantilla
+from ranking import RankingPrestamos, mas_frecuentes
+
+TAMANO_BUFFER_EXPORTACION = 1024 * 1024  # bytes de buffer al escribir reportes
+REPORTES = ('historial', 'usuarios', 'libros', 'estadisticas', 'vencidos', 'ranking')
+REPORTES_RED = REPORTES[1:]  # con varias sucursales no hay historial completo
+FORMATOS = ('html', 'texto', 'csv', 'jsonl')
+NIVEL_GZIP = 6  # compresión de las exportaciones .gz: casi igual de chica que 9 y bastante más rápida
+
+# Filas de los reportes HTML; se analizan una vez al importar el módulo
+FILA_HTML_PRESTAMO = plantilla("""
+        <tr>
+            <td>{{id_usuario}}</td>
+            <td>{{nombre_usuario}}</td>
+            <td>{{id_libro}}</td>
+            <td>{{titulo_libro}}</td>
+            <td>{{fecha_prestamo}}</td>
+            <td>{{fecha_devolucion}}</td>
+        </tr>
+            """)
+FILA_HTML_PAR = plantilla("""
+        <tr>
+            <td>{{id}}</td>
+            <td>{{texto}}</td>
+        </tr>
+            """)
+FILA_HTML_RANKING = plantilla("""
+        <tr>
+            <td>{{mes}}</td>
+            <td>{{puesto}}</td>
+            <td>{{libro}}</td>
+            <td>{{prestamos_libro}}</td>
+            <td>{{usuario}}</td>
+            <td>{{prestamos_usuario}}</td>
+        </tr>
+            """)
+TABLA_HTML_ESTADISTICAS = plantilla("""
+        <h2>Estadísticas de Préstamos</h2>
+        <table border='1' style='border-collapse: collapse; width: 100%;'>
+        <tr>
+            <th>Métrica</th>
+            <th>Valor</th>
+        </tr>
+        <tr>
+            <td>Total de préstamos</td>
+            <td>{{total_prestamos}}</td>
+        </tr>
+        <tr>
+            <td>Total de usuarios únicos</td>
+            <td>{{total_usuarios}}</td>
+        </tr>
+        <tr>
+            <td>Libro más prestado</td>
+            <td>{{libro_mas_prestado}} ({{max_prestamos}} veces)</td>
+        </tr>
+        <tr>
+            <td>Usuario más activo</td>
+            <td>{{usuario_mas_activo}} ({{max_actividad}} préstamos)</td>
+        </tr>
+        </table>
+        """)
+POSICIONES_RANKING_MENSUAL = 5  # puestos por mes en el reporte de ranking
+VENTANA_VERIFICACION = 4096  # bytes finales ya leídos que se comparan en la carga incremental
+LIMITE_EJEMPLOS_DUPLICADOS = 100  # duplicados que se guardan para mostrar
+
+class Usuario:
+    def __init__(self, id_usuario, nombre):
+        self.id_usuario = id_usuario
+        self.nombre = nombre
+    
+    def __str__(self):
+        return f"ID: {self.id_usuario}, Nombre: {self.nombre}"
+
+class Libro:
+    def __init__(self, id_libro, titulo):
+        self.id_libro = id_libro
+        self.titulo = titulo
+    
+    def __str__(self):
+        return f"ID: {self.id_libro}, Título: {self.titulo}"
+
+class Prestamo:
+    __slots__ = ('id_usuario', 'nombre_usuario', 'id_libro', 'titulo_libro', 'fecha_prestamo',
+                 'fecha_devolucion', 'ordinal_prestamo', 'ordinal_devolucion')
+    
+    def __init__(self, id_usuario, nombre_usuario, id_libro, titulo_libro, fecha_prestamo, fecha_devolucion="",
+                 ordinal_prestamo=None, ordinal_devolucion=None):
+        self.id_usuario = id_usuario
+        self.nombre_usuario = nombre_usuario
+        self.id_libro = id_libro
+        self.titulo_libro = titulo_libro
+        self.fecha_prestamo = fecha_prestamo
+        self.fecha_devolucion = fecha_devolucion
+        # Fechas ya convertidas a ordinales (date.toordinal) al cargar
+        self.ordinal_prestamo = ordinal_prestamo
+        self.ordinal_devolucion = ordinal_devolucion
+    
+    def __str__(self):
+        return f"Usuario: {self.nombre_usuario}, Libro: {self.titulo_libro}, Fecha: {self.fecha_prestamo}"
+
+def en_cache(*colecciones):
+    """Guarda el resultado de un método de la biblioteca hasta que cambie alguna de las colecciones de las que depende"""
+    def decorar(metodo):
+        nombre = metodo.__name__
+        
+        @wraps(metodo)
+        def envoltura(self, *argumentos, **opciones):
+            versiones = tuple(self.versiones[coleccion] for coleccion in colecciones)
+            llamada = (argumentos, tuple(sorted(opciones.items())))
+            # Se guarda solo el último resultado de cada método: otra consulta lo reemplaza
+            guardado = self.cache_reportes.get(nombre)
+            if guardado is not None and guardado[0] == versiones and guardado[1] == llamada:
+                return guardado[2]
+            resultado = metodo(self, *argumentos, **opciones)
+            self.cache_reportes[nombre] = (versiones, llamada, resultado)
+            return resultado
+        return envoltura
+    return decorar
+
+class TablaPrestamos:
+    """Préstamos guardados por columnas: referencias al catálogo y fechas como ordinales enteros"""
+    
+    SIN_FECHA = 0  # ordinal que representa "sin fecha de devolución"
+    
+    def __init__(self):
+        self.usuarios = []  # referencia al Usuario del catálogo (no una copia del nombre)
+        self.libros = []    # referencia al Libro del catálogo
+        self.ordinales_prestamo = array('i')
+        self.ordinales_devolucion = array('i')
+        self.textos_fecha = {}  # ordinal -> 'YYYY-MM-DD', compartido entre filas
+    
+    def __len__(self):
+        return len(self.usuarios)
+    
+    def agregar(self, usuario, libro, ordinal_prestamo, ordinal_devolucion):
+        """Agrega una fila; ordinal_devolucion es None si no hay fecha de devolución"""
+        self.usuarios.append(usuario)
+        self.libros.append(libro)
+        self.ordinales_prestamo.append(ordinal_prestamo)
+        self.ordinales_devolucion.append(self.SIN_FECHA if ordinal_devolucion is None else ordinal_devolucion)
+    
+    def texto_fecha(self, ordinal):
+        """Devuelve la fecha en texto sin crear una cadena nueva por fila"""
+        if ordinal == self.SIN_FECHA:
+            return ""
+        texto = self.textos_fecha.get(ordinal)
+        if texto is None:
+            texto = date.fromordinal(ordinal).isoformat()
+            self.textos_fecha[ordinal] = texto
+        return texto
+    
+    def __getitem__(self, fila):
+        """Arma un Prestamo con los datos de la fila"""
+        usuario = self.usuarios[fila]
+        libro = self.libros[fila]
+        ordinal_prestamo = self.ordinales_prestamo[fila]
+        ordinal_devolucion = self.ordinales_devolucion[fila]
+        return Prestamo(
+            usuario.id_usuario, usuario.nombre, libro.id_libro, libro.titulo,
+            self.texto_fecha(ordinal_prestamo), self.texto_fecha(ordinal_devolucion),
+            ordinal_prestamo, None if ordinal_devolucion == self.SIN_FECHA else ordinal_devolucion
+        )
+    
+    def __iter__(self):
+        for fila in range(len(self.usuarios)):
+            yield self[fila]
+    
+    def filas(self):
+        """Recorre las filas como tuplas de texto, sin armar objetos Prestamo"""
+        texto_fecha = self.texto_fecha
+        for usuario, libro, ordinal_prestamo, ordinal_devolucion in zip(
+                self.usuarios, self.libros, self.ordinales_prestamo, self.ordinales_devolucion):
+            yield (usuario.id_usuario, usuario.nombre, libro.id_libro, libro.titulo,
+                   texto_fecha(ordinal_prestamo), texto_fecha(ordinal_devolucion))
+
+class BibliotecaDigital:
+    def __init__(self, capacidad_bloom=0):
+        self.usuarios = {}  # diccionario para almacenar usuarios por ID
+        self.libros = {}    # diccionario para almacenar libros por ID
+        self.prestamos = TablaPrestamos() # tabla columnar con todos los préstamos
+        self.errores_lectura = ColectorErrores() # errores de formato de la última carga (conteos y ejemplos)
+        self.indice_vencimientos = IndiceVencimientos() # préstamos ordenados por fecha de devolución
+        self.bitacora = BitacoraPrestamos() # préstamos y devoluciones por fecha, para consultas a una fecha pasada
+        self.intervalos = IndiceIntervalos() # períodos de préstamo de cada libro, para préstamos simultáneos
+        self.ranking = RankingPrestamos() # conteos por mes y semana para los rankings
+        self.indice_nombres = IndiceTexto() # búsqueda por palabras en nombres de usuario
+        self.indice_titulos = IndiceTexto() # búsqueda por palabras en títulos de libro
+        self.similares_nombres = IndiceTrigramas() # nombre de catálogo más parecido
+        self.similares_titulos = IndiceTrigramas() # título de catálogo más parecido
+        self.discrepancias = {} # (campo, ID, valor en el préstamo) -> diferencia con el catálogo
+        self.lecturas_incrementales = {} # ruta -> hasta dónde se leyó cada archivo de préstamos
+        self.ordinales_fecha = {} # 'YYYY-MM-DD' -> ordinal de las fechas ya validadas
+        # Con capacidad_bloom > 0 los duplicados se detectan con un filtro de Bloom de memoria fija
+        self.filtro_duplicados = FiltroDuplicados(capacidad_bloom)
+        self.total_duplicados = 0
+        self.duplicados = [] # primeros duplicados encontrados
+        # Cada agregado suma uno a la versión de su colección; los reportes guardados
+        # en cache_reportes valen mientras no cambien las versiones de las que dependen
+        self.versiones = {'usuarios': 0, 'libros': 0, 'prestamos': 0}
+        self.cache_reportes = {} # método -> (versiones, argumentos, resultado)
+    
+    def fecha_a_ordinal(self, fecha):
+        """Convierte una fecha YYYY-MM-DD a su ordinal; devuelve None si no es válida"""
+        if len(fecha) != 10:
+            return None
+        if fecha[4] != '-' or fecha[7] != '-':
+            return None
+        
+        # Verificar que año, mes y día sean números
+        try:
+            año = int(fecha[:4])
+            mes = int(fecha[5:7])
+            dia = int(fecha[8:10])
+            
+            # Validaciones básicas
+            if mes < 1 or mes > 12:
+                return None
+            if dia < 1 or dia > 31:
+                return None
+            if año < 1900 or año > 2030:
+                return None
+            
+            # date() además rechaza días que no existen en el mes (ej: 2024-02-30)
+            return date(año, mes, dia).toordinal()
+        except ValueError:
+            return None
+    
+    def es_fecha_valida(self, fecha):
+        """Valida que la fecha tenga formato YYYY-MM-DD"""
+        return self.fecha_a_ordinal(fecha) is not None
+    
+    def es_numero_valido(self, texto):
+        """Verifica si el texto es un número válido"""
+        if not texto:
+            return False
+        for char in texto:
+            if char < '0' or char > '9':
+                return False
+        return True
+    
+    def validar_caracteres_texto(self, texto):
+        """Valida caracteres permitidos en nombres y títulos"""
+        caracteres_permitidos = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 áéíóúÁÉÍÓÚñÑ.,;:-_()"
+        for i, char in enumerate(texto):
+            if char not in caracteres_permitidos:
+                return False, i, char
+        return True, -1, ""
+    
+    def separar_campos(self, linea):
+        """Separa una línea en campos usando la coma como separador"""
+        return [parte.strip() for parte in linea.split(',')]
+    
+    def leer_catalogo(self, archivo, entidad, campo_texto):
+        """Valida las líneas de un catálogo y produce los pares (ID, texto) correctos"""
+        linea_num = 0
+        
+        for linea in archivo:
+            linea_num += 1
+            linea = linea.strip()
+            
+            if not linea:  # saltar líneas vacías
+                continue
+            
+            partes = self.separar_campos(linea)
+            
+            if len(partes) != 2:
+                self.reportar_error("Formato incorrecto", linea_num, "Formato incorrecto. Se esperaban 2 campos separados por coma.")
+                continue
+            
+            id_registro, texto = partes[0], partes[1]
+            
+            # Validar ID
+            if not self.es_numero_valido(id_registro):
+                self.reportar_error("ID inválido", linea_num, f"ID de {entidad} inválido '{id_registro}'")
+                continue
+            
+            # Validar nombre o título
+            es_valido, pos, char = self.validar_caracteres_texto(texto)
+            if not es_valido:
+                self.reportar_error("Carácter inválido", linea_num, f"Carácter inválido '{char}' en {campo_texto}",
+                                    posicion=pos)
+                continue
+            
+            yield id_registro, texto
+    
+    def reportar_error(self, clase, linea_num, mensaje, columna=None, posicion=None):
+        """Registra un error de lectura; solo los primeros se muestran enseguida en consola"""
+        error = {'clase': clase, 'linea': linea_num, 'columna': columna, 'posicion': posicion, 'mensaje': mensaje}
+        if self.errores_lectura.registrar(clase, error):
+            print(self.texto_error(error))
+    
+    def texto_error(self, error):
+        """Mensaje de un error de lectura con su ubicación"""
+        if error['columna'] is not None:
+            return f"Error línea {error['linea']}, columna {error['columna']}: {error['mensaje']}"
+        if error['posicion'] is not None:
+            return f"Error línea {error['linea']}, posición {error['posicion']}: {error['mensaje']}"
+        return f"Error línea {error['linea']}: {error['mensaje']}"
+    
+    def ordinal_fecha(self, fecha):
+        """Ordinal de una fecha, validando cada texto distinto una sola vez"""
+        ordinal = self.ordinales_fecha.get(fecha)
+        if ordinal is None:
+            ordinal = self.fecha_a_ordinal(fecha)
+            if ordinal is not None:
+                self.ordinales_fecha[fecha] = ordinal
+        return ordinal
+    
+    def leer_prestamos(self, lineas, linea_num=0):
+        """Valida las líneas de un archivo .lfa y produce los préstamos correctos"""
+        for linea in lineas:
+            linea_num += 1
+            registro = linea.strip()
+            
+            if not registro:
+                continue
+            
+            # Camino rápido: el registro entero se valida con el patrón de lector_lfa
+            campos = separar_prestamo(registro)
+            if campos is None:
+                # Si no lo cumple se revisa campo por campo para dar línea y columna del error
+                campos, error = diagnosticar_prestamo(registro, len(linea) - len(linea.lstrip()) + 1)
+                if error is not None:
+                    columna, clase, mensaje = error
+                    self.reportar_error(clase, linea_num, mensaje, columna)
+                    continue
+            
+            id_usuario, nombre_usuario, id_libro, titulo_libro, fecha_prestamo, fecha_devolucion = campos
+            
+            # Verificar que usuario existe en catálogo
+            if not self.existe_usuario(id_usuario):
+                self.reportar_error("Usuario inexistente", linea_num, f"Usuario con ID '{id_usuario}' no existe en el catálogo")
+                continue
+            
+            # Verificar que libro existe en catálogo
+            if not self.existe_libro(id_libro):
+                self.reportar_error("Libro inexistente", linea_num, f"Libro con ID '{id_libro}' no existe en el catálogo")
+                continue
+            
+            # El formato de las fechas ya está validado; falta que existan en el calendario
+            ordinal_prestamo = self.ordinal_fecha(fecha_prestamo)
+            if ordinal_prestamo is None:
+                self.reportar_error("Fecha inválida", linea_num, f"Fecha de préstamo inválida '{fecha_prestamo}'")
+                continue
+            
+            ordinal_devolucion = None
+            if fecha_devolucion:
+                ordinal_devolucion = self.ordinal_fecha(fecha_devolucion)
+                if ordinal_devolucion is None:
+                    self.reportar_error("Fecha inválida", linea_num, f"Fecha de devolución inválida '{fecha_devolucion}'")
+                    continue
+            
+            # Descartar préstamos repetidos (mismo usuario, libro y fecha de préstamo)
+            if self.descartar_duplicado(linea_num, id_usuario, id_libro, fecha_prestamo):
+                continue
+            
+            # Comparar nombre y título con el catálogo (no rechaza el préstamo)
+            self.conciliar_prestamo(linea_num, id_usuario, nombre_usuario, id_libro, titulo_libro)
+            
+            yield Prestamo(id_usuario, nombre_usuario, id_libro, titulo_libro, fecha_prestamo, fecha_devolucion,
+                           ordinal_prestamo, ordinal_devolucion)
+    
+    def descartar_duplicado(self, linea_num, id_usuario, id_libro, fecha_prestamo):
+        """Indica si el préstamo ya se había cargado y en ese caso lo cuenta como duplicado"""
+        if not self.filtro_duplicados.repetido(id_usuario, id_libro, fecha_prestamo):
+            return False
+        self.total_duplicados += 1
+        self.guardar_ejemplo_duplicado(linea_num, id_usuario, id_libro, fecha_prestamo)
+        return True
+    
+    def guardar_ejemplo_duplicado(self, linea_num, id_usuario, id_libro, fecha_prestamo):
+        """Guarda el duplicado para mostrarlo si todavía no se llegó al límite de ejemplos"""
+        if len(self.duplicados) < LIMITE_EJEMPLOS_DUPLICADOS:
+            self.duplicados.append({
+                'linea': linea_num,
+                'id_usuario': id_usuario,
+                'id_libro': id_libro,
+                'fecha_prestamo': fecha_prestamo,
+            })
+    
+    def conciliar_prestamo(self, linea_num, id_usuario, nombre_usuario, id_libro, titulo_libro):
+        """Registra si el nombre o el título del préstamo no coinciden con los del catálogo"""
+        nombre_catalogo = self.indice_nombres.textos.get(id_usuario)
+        if nombre_catalogo is not None and nombre_usuario != nombre_catalogo:
+            self.registrar_discrepancia(linea_num, "nombre_usuario", id_usuario, nombre_usuario,
+                                        nombre_catalogo, self.similares_nombres)
+        
+        titulo_catalogo = self.indice_titulos.textos.get(id_libro)
+        if titulo_catalogo is not None and titulo_libro != titulo_catalogo:
+            self.registrar_discrepancia(linea_num, "titulo_libro", id_libro, titulo_libro,
+                                        titulo_catalogo, self.similares_titulos)
+    
+    def registrar_discrepancia(self, linea_num, campo, id_registro, valor, valor_catalogo, indice_similares):
+        """Agrupa las discrepancias repetidas; la sugerencia se calcula una sola vez por valor distinto"""
+        clave = (campo, id_registro, valor)
+        discrepancia = self.discrepancias.get(clave)
+        if discrepancia is not None:
+            discrepancia['veces'] += 1
+            return
+        
+        sugerencia = indice_similares.mas_parecido(valor)
+        self.discrepancias[clave] = {
+            'campo': campo,
+            'id': id_registro,
+            'valor': valor,
+            'catalogo': valor_catalogo,
+            'sugerencia_id': sugerencia[0] if sugerencia else "",
+            'sugerencia': sugerencia[1] if sugerencia else "",
+            'similitud': sugerencia[2] if sugerencia else 0.0,
+            'primera_linea': linea_num,
+            'veces': 1,
+        }
+    
+    # --- Almacenamiento: los backends alternativos redefinen estos métodos ---
+    
+    def indexar_usuario(self, usuario):
+        """Actualiza los índices de búsqueda con un usuario"""
+        self.indice_nombres.agregar(usuario.id_usuario, usuario.nombre)
+        self.similares_nombres.agregar(usuario.id_usuario, usuario.nombre)
+    
+    def indexar_libro(self, libro):
+        """Actualiza los índices de búsqueda con un libro"""
+        self.indice_titulos.agregar(libro.id_libro, libro.titulo)
+        self.similares_titulos.agregar(libro.id_libro, libro.titulo)
+    
+    def existe_usuario(self, id_usuario):
+        """Indica si el usuario está en el catálogo"""
+        return id_usuario in self.usuarios
+    
+    def existe_libro(self, id_libro):
+        """Indica si el libro está en el catálogo"""
+        return id_libro in self.libros
+    
+    def agregar_usuario(self, usuario):
+        """Guarda un usuario validado"""
+        self.versiones['usuarios'] += 1
+        self.indexar_usuario(usuario)
+        existente = self.usuarios.get(usuario.id_usuario)
+        if existente is not None:
+            # Se actualiza el mismo objeto para que los préstamos que lo referencian lo vean
+            existente.nombre = usuario.nombre
+        else:
+            self.usuarios[usuario.id_usuario] = usuario
+    
+    def agregar_libro(self, libro):
+        """Guarda un libro validado"""
+        self.versiones['libros'] += 1
+        self.indexar_libro(libro)
+        existente = self.libros.get(libro.id_libro)
+        if existente is not None:
+            existente.titulo = libro.titulo
+        else:
+            self.libros[libro.id_libro] = libro
+    
+    def agregar_prestamo(self, prestamo):
+        """Guarda un préstamo validado; nombre y título se toman del catálogo"""
+        self.versiones['prestamos'] += 1
+        fila = len(self.prestamos)
+        usuario = self.usuarios[prestamo.id_usuario]
+        libro = self.libros[prestamo.id_libro]
+        self.indice_vencimientos.agregar(fila, prestamo.ordinal_prestamo, prestamo.ordinal_devolucion)
+        self.bitacora.agregar(fila, prestamo.ordinal_prestamo, prestamo.ordinal_devolucion)
+        self.intervalos.agregar(fila, libro.id_libro, prestamo.ordinal_prestamo, prestamo.ordinal_devolucion)
+        self.ranking.agregar(fila, usuario, libro, prestamo.ordinal_prestamo)
+        self.prestamos.agregar(usuario, libro, prestamo.ordinal_prestamo, prestamo.ordinal_devolucion)
+    
+    def finalizar_carga(self):
+        """Se llama al terminar cada carga de archivo"""
+        pass
+    
+    def guardar_prestamos(self, prestamos):
+        """Agrega los préstamos leídos y termina la carga; devuelve cuántos se guardaron"""
+        prestamos_cargados = 0
+        for prestamo in prestamos:
+            self.agregar_prestamo(prestamo)
+            prestamos_cargados += 1
+        
+        self.finalizar_carga()
+        return prestamos_cargados
+    
+    def hay_prestamos(self):
+        """Indica si hay préstamos registrados"""
+        return bool(self.prestamos)
+    
+    def iterar_prestamos(self):
+        """Recorre todos los préstamos en el orden en que se cargaron"""
+        return iter(self.prestamos)
+    
+    def iterar_filas_prestamos(self):
+        """Recorre los préstamos como tuplas (id_usuario, nombre, id_libro, título, préstamo, devolución)"""
+        return self.prestamos.filas()
+    
+    @en_cache('usuarios', 'prestamos')
+    def obtener_usuarios_unicos(self):
+        """Pares (ID, nombre) de los usuarios con préstamos, en orden de aparición"""
+        # Los conteos del ranking tienen un Usuario por ID, en el orden en que aparecieron
+        return [(usuario.id_usuario, usuario.nombre) for usuario in self.ranking.usuarios_total]
+    
+    @en_cache('libros', 'prestamos')
+    def obtener_libros_prestados(self):
+        """Pares (ID, título) de los libros prestados, en orden de aparición"""
+        return [(libro.id_libro, libro.titulo) for libro in self.ranking.libros_total]
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def calcular_estadisticas(self):
+        """Calcula las estadísticas generales con los conteos totales que lleva el ranking"""
+        return self.armar_estadisticas(self.ranking.usuarios_total, self.ranking.libros_total)
+    
+    def armar_estadisticas(self, contador_usuarios, contador_libros):
+        """Arma el diccionario de estadísticas a partir de los conteos por Usuario y por Libro"""
+        # En caso de empate gana el que apareció primero
+        libro_mas_prestado = ""
+        max_prestamos = 0
+        for libro, cantidad in contador_libros.items():
+            if cantidad > max_prestamos:
+                max_prestamos = cantidad
+                libro_mas_prestado = libro.titulo
+        
+        usuario_mas_activo = ""
+        max_actividad = 0
+        for usuario, cantidad in contador_usuarios.items():
+            if cantidad > max_actividad:
+                max_actividad = cantidad
+                usuario_mas_activo = usuario.nombre
+        
+        return {
+            'total_prestamos': sum(contador_usuarios.values()),
+            'total_usuarios': len(contador_usuarios),
+            'libro_mas_prestado': libro_mas_prestado,
+            'max_prestamos': max_prestamos,
+            'usuario_mas_activo': usuario_mas_activo,
+            'max_actividad': max_actividad,
+        }
+    
+    def obtener_prestamos_vencidos(self, fecha_actual):
+        """Préstamos sin devolución o con fecha de devolución anterior a fecha_actual"""
+        # Si no tiene fecha de devolución, significa que no ha sido devuelto
+        # y si tiene fecha de devolución pero es anterior a la fecha, está vencido
+        return [self.prestamos[fila] for fila in self.filas_vencidas(fecha_actual)]
+    
+    @en_cache('prestamos')
+    def filas_vencidas(self, fecha_actual):
+        """Filas vencidas a la fecha; no dependen del catálogo, así que se guardan solo las filas"""
+        return self.indice_vencimientos.vencidos(date.fromisoformat(fecha_actual).toordinal())
+    
+    def obtener_prestamos_por_vencer(self, fecha_actual, dias):
+        """Préstamos cuya fecha de devolución cae entre fecha_actual y los siguientes `dias` días"""
+        filas = self.indice_vencimientos.por_vencer(date.fromisoformat(fecha_actual).toordinal(), dias)
+        return [self.prestamos[fila] for fila in filas]
+    
+    def obtener_prestamos_abiertos(self, fecha, id_usuario=None):
+        """Préstamos hechos hasta la fecha y sin devolver al final de ese día, de un usuario o de todos"""
+        filas = self.bitacora.abiertos(date.fromisoformat(fecha).toordinal())
+        if id_usuario is not None:
+            usuarios = self.prestamos.usuarios
+            filas = [fila for fila in filas if usuarios[fila].id_usuario == id_usuario]
+        return [self.prestamos[fila] for fila in filas]
+    
+    def obtener_prestamos_por_usuario(self, fecha):
+        """Tríos (ID, nombre, cantidad) de los usuarios con préstamos abiertos a la fecha, de más a menos"""
+        # En empate queda primero el usuario del préstamo más antiguo
+        usuarios = self.prestamos.usuarios
+        contador = Counter(usuarios[fila] for fila in self.bitacora.abiertos(date.fromisoformat(fecha).toordinal()))
+        return [(usuario.id_usuario, usuario.nombre, cantidad) for usuario, cantidad in contador.most_common()]
+    
+    def obtener_prestamos_simultaneos(self, id_libro, fecha):
+        """Cantidad de préstamos del libro sin devolver al final de la fecha"""
+        return self.intervalos.simultaneos(id_libro, date.fromisoformat(fecha).toordinal())
+    
+    def obtener_superpuestos_libro(self, id_libro):
+        """Tríos (préstamo, préstamo en curso, simultáneos) de cada préstamo del libro hecho antes de que volviera otro"""
+        _, _, superpuestos = self.intervalos.barrer(id_libro)
+        return [(self.prestamos[fila], self.prestamos[fila_en_curso], cantidad)
+                for fila, fila_en_curso, cantidad in superpuestos]
+    
+    @en_cache('libros', 'prestamos')
+    def obtener_uso_libros(self):
+        """Por libro prestado: (ID, título, préstamos, pico de simultáneos, fecha del pico, superpuestos), de mayor pico a menor"""
+        # Un barrido por libro sobre sus períodos ya ordenados: O(n log n) para todo el catálogo
+        uso = []
+        for libro, cantidad in self.ranking.libros_total.items():
+            pico, inicio_pico, superpuestos = self.intervalos.barrer(libro.id_libro)
+            fecha_pico = self.prestamos.texto_fecha(inicio_pico) if inicio_pico is not None else ""
+            uso.append((libro.id_libro, libro.titulo, cantidad, pico, fecha_pico, len(superpuestos)))
+        # En empate queda primero el libro que apareció antes
+        uso.sort(key=lambda fila: fila[3], reverse=True)
+        return uso
+    
+    def calcular_resumen(self, fecha_actual, reportes=REPORTES):
+        """Datos de los reportes pedidos; lo que ya se calculó para la consola sale del caché"""
+        # Solo se consulta lo que se va a escribir: vencidos y ranking recorren todos los préstamos
+        consultas = {
+            'usuarios': self.obtener_usuarios_unicos,
+            'libros': self.obtener_libros_prestados,
+            'estadisticas': self.calcular_estadisticas,
+            'vencidos': lambda: self.obtener_prestamos_vencidos(fecha_actual),
+            'ranking': self.obtener_ranking_mensual,
+        }
+        return {reporte: consultas[reporte]() for reporte in reportes if reporte in consultas}
+    
+    def top_contador(self, contador, tipo, k):
+        """Pasa los k primeros de un contador de Libro o Usuario a tuplas (ID, texto, cantidad)"""
+        if tipo == 'libros':
+            return [(libro.id_libro, libro.titulo, cantidad)
+                    for libro, cantidad in mas_frecuentes(contador, k, attrgetter('id_libro'))]
+        return [(usuario.id_usuario, usuario.nombre, cantidad)
+                for usuario, cantidad in mas_frecuentes(contador, k, attrgetter('id_usuario'))]
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def obtener_mas_prestados(self, tipo='libros', k=10, desde=None, hasta=None):
+        """Top-K de 'libros' o 'usuarios' con más préstamos entre dos fechas (inclusive); sin fechas, de todo el registro"""
+        ranking = self.ranking
+        if tipo == 'libros':
+            total, por_mes, por_semana, columna = ranking.libros_total, ranking.libros_por_mes, ranking.libros_por_semana, self.prestamos.libros
+        else:
+            total, por_mes, por_semana, columna = ranking.usuarios_total, ranking.usuarios_por_mes, ranking.usuarios_por_semana, self.prestamos.usuarios
+        
+        if desde is None and hasta is None:
+            return self.top_contador(total, tipo, k)
+        if not ranking.periodos_por_dia:
+            return []
+        
+        # El rango se recorta a los días con préstamos
+        inicio = max(date.fromisoformat(desde).toordinal(), min(ranking.periodos_por_dia)) if desde else min(ranking.periodos_por_dia)
+        fin = min(date.fromisoformat(hasta).toordinal(), max(ranking.periodos_por_dia)) if hasta else max(ranking.periodos_por_dia)
+        if inicio > fin:
+            return []
+        
+        # Una semana ISO completa (de lunes a domingo) ya tiene su conteo
+        if desde and hasta and date.fromisoformat(desde).isoweekday() == 1 and \
+                date.fromisoformat(hasta).toordinal() - date.fromisoformat(desde).toordinal() == 6:
+            semana = date.fromisoformat(desde).isocalendar()
+            return self.top_contador(por_semana.get((semana[0], semana[1]), Counter()), tipo, k)
+        
+        return self.top_contador(ranking.contar_rango(columna, por_mes, inicio, fin), tipo, k)
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def obtener_ranking_mensual(self, k=POSICIONES_RANKING_MENSUAL):
+        """Por cada mes con préstamos: ('YYYY-MM', top-K de libros, top-K de usuarios)"""
+        return [
+            (f"{año:04d}-{mes:02d}",
+             self.top_contador(self.ranking.libros_por_mes[(año, mes)], 'libros', k),
+             self.top_contador(self.ranking.usuarios_por_mes[(año, mes)], 'usuarios', k))
+            for año, mes in self.ranking.meses()
+        ]
+    
+    def interpretar_periodo(self, texto):
+        """Convierte 'YYYY-MM', 'YYYY-Wnn' o 'YYYY-MM-DD:YYYY-MM-DD' en (desde, hasta); vacío es todo; None si es inválido"""
+        texto = texto.strip()
+        if not texto:
+            return (None, None)
+        try:
+            if ":" in texto:
+                desde, hasta = (parte.strip() for parte in texto.split(":", 1))
+                if self.fecha_a_ordinal(desde) is None or self.fecha_a_ordinal(hasta) is None:
+                    return None
+                return (desde, hasta)
+            if "-W" in texto.upper():
+                año, semana = texto.upper().split("-W")
+                lunes = date.fromisocalendar(int(año), int(semana), 1)
+                return (lunes.isoformat(), date.fromordinal(lunes.toordinal() + 6).isoformat())
+            año, mes = (int(parte) for parte in texto.split("-"))
+            primero = date(año, mes, 1)
+            siguiente = date(año + 1, 1, 1) if mes == 12 else date(año, mes + 1, 1)
+            return (primero.isoformat(), date.fromordinal(siguiente.toordinal() - 1).isoformat())
+        except ValueError:
+            return None
+    
+    def buscar_libros(self, consulta):
+        """Pares (ID, título) de los libros cuyo título contiene todas las palabras (o prefijos) de la consulta"""
+        return self.indice_titulos.buscar(consulta)
+    
+    def buscar_usuarios(self, consulta):
+        """Pares (ID, nombre) de los usuarios cuyo nombre contiene todas las palabras (o prefijos) de la consulta"""
+        return self.indice_nombres.buscar(consulta)
+    
+    # --- Carga de archivos ---
+    
+    def cargar_usuarios(self, nombre_archivo=None):
+        """Carga usuarios desde archivo de texto"""
+        if nombre_archivo is None:
+            nombre_archivo = input("Ingrese el nombre del archivo de usuarios: ")
+        
+        if not os.path.exists(nombre_archivo):
+            print(f"Error: El archivo '{nombre_archivo}' no existe.")
+            return None
+        
+        try:
+            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
+                usuarios_cargados = 0
+                self.errores_lectura = ColectorErrores()
+                
+                for id_usuario, nombre in self.leer_catalogo(archivo, "usuario", "nombre"):
+                    self.agregar_usuario(Usuario(id_usuario, nombre))
+                    usuarios_cargados += 1
+                
+                self.finalizar_carga()
+                print(f"Se cargaron {usuarios_cargados} usuarios correctamente.")
+                self.mostrar_resumen_errores()
+                return usuarios_cargados
+        
+        except Exception as e:
+            print(f"Error al leer el archivo: {e}")
+            return None
+    
+    def cargar_libros(self, nombre_archivo=None):
+        """Carga libros desde archivo de texto"""
+        if nombre_archivo is None:
+            nombre_archivo = input("Ingrese el nombre del archivo de libros: ")
+        
+        if not os.path.exists(nombre_archivo):
+            print(f"Error: El archivo '{nombre_archivo}' no existe.")
+            return None
+        
+        try:
+            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
+                libros_cargados = 0
+                self.errores_lectura = ColectorErrores()
+                
+                for id_libro, titulo in self.leer_catalogo(archivo, "libro", "título"):
+                    self.agregar_libro(Libro(id_libro, titulo))
+                    libros_cargados += 1
+                
+                self.finalizar_carga()
+                print(f"Se cargaron {libros_cargados} libros correctamente.")
+                self.mostrar_resumen_errores()
+                return libros_cargados
+        
+        except Exception as e:
+            print(f"Error al leer el archivo: {e}")
+            return None
+    
+    def cargar_prestamos(self, nombre_archivo=None):
+        """Carga préstamos desde archivo .lfa"""
+        if nombre_archivo is None:
+            nombre_archivo = input("Ingrese el nombre del archivo de préstamos (.lfa): ")
+        
+        if not os.path.exists(nombre_archivo):
+            print(f"Error: El archivo '{nombre_archivo}' no existe.")
+            return None
+        
+        try:
+            with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
+                self.errores_lectura = ColectorErrores()
+                discrepancias_previas = len(self.discrepancias)
+                duplicados_previos = self.total_duplicados
+                
+                prestamos_cargados = self.guardar_prestamos(self.leer_prestamos(archivo))
+                print(f"Se cargaron {prestamos_cargados} préstamos correctamente.")
+                self.mostrar_resumen_errores()
+                self.mostrar_avisos_carga(discrepancias_previas, duplicados_previos)
+                return prestamos_cargados
+        
+        except Exception as e:
+            print(f"Error al leer el archivo: {e}")
+            return None
+    
+    def cargar_prestamos_incremental(self, nombre_archivo=None):
+        """Carga solo las líneas agregadas al archivo .lfa desde la última lectura"""
+        if nombre_archivo is None:
+            nombre_archivo = input("Ingrese el nombre del archivo de préstamos (.lfa): ")
+        
+        if not os.path.exists(nombre_archivo):
+            print(f"Error: El archivo '{nombre_archivo}' no existe.")
+            return None
+        
+        ruta = os.path.abspath(nombre_archivo)
+        estado = self.lecturas_incrementales.get(ruta, {'desplazamiento': 0, 'suma': 0, 'lineas': 0})
+        desplazamiento = estado['desplazamiento']
+        
+        try:
+            with open(nombre_archivo, 'rb') as archivo:
+                # Verificar que lo ya leído no cambió (solo se compara el final, no todo el archivo)
+                ventana = b''
+                if desplazamiento:
+                    inicio_ventana = max(0, desplazamiento - VENTANA_VERIFICACION)
+                    archivo.seek(inicio_ventana)
+                    ventana = archivo.read(desplazamiento - inicio_ventana)
+                    if len(ventana) != desplazamiento - inicio_ventana or zlib.crc32(ventana) != estado['suma']:
+                        print(f"Error: El archivo '{nombre_archivo}' fue modificado o truncado; no se puede continuar la lectura incremental.")
+                        return None
+                
+                datos = archivo.read()
+            
+            # Solo se procesan líneas completas; lo que quede después del último salto
+            # de línea se lee en la próxima actualización
+            fin = datos.rfind(b'\n') + 1
+            if fin == 0:
+                print("No hay préstamos nuevos.")
+                return 0
+            
+            lineas = datos[:fin].decode('utf-8').split('\n')[:-1]
+            self.errores_lectura = ColectorErrores()
+            discrepancias_previas = len(self.discrepancias)
+            duplicados_previos = self.total_duplicados
+            
+            prestamos_cargados = self.guardar_prestamos(self.leer_prestamos(lineas, estado['lineas']))
+            
+            # La nueva ventana sale de los bytes ya leídos, no de otra lectura del archivo:
+            # así la suma es la de lo que se procesó aunque el archivo cambie mientras tanto
+            desplazamiento += fin
+            if fin >= VENTANA_VERIFICACION:
+                suma = zlib.crc32(datos[fin - VENTANA_VERIFICACION:fin])
+            else:
+                # Pocos bytes nuevos: se completa con el final de la ventana anterior
+                suma = zlib.crc32(ventana[max(0, len(ventana) - (VENTANA_VERIFICACION - fin)):] + datos[:fin])
+            self.lecturas_incrementales[ruta] = {
+                'desplazamiento': desplazamiento,
+                'suma': suma,
+                'lineas': estado['lineas'] + len(lineas),
+            }
+            
+            print(f"Se cargaron {prestamos_cargados} préstamos nuevos correctamente.")
+            if fin < len(datos):
+                print("La última línea está incompleta; se leerá en la próxima actualización.")
+            self.mostrar_resumen_errores()
+            self.mostrar_avisos_carga(discrepancias_previas, duplicados_previos)
+            return prestamos_cargados
+        
+        except Exception as e:
+            print(f"Error al leer el archivo: {e}")
+            return None
+    
+    def mostrar_resumen_errores(self):
+        """Si hubo más errores de los que se mostraron, resume cuántos hubo de cada clase"""
+        errores = self.errores_lectura
+        if not errores.omitidos():
+            return
+        print(f"... y {errores.omitidos()} errores más ({errores.total} en total). Errores por clase:")
+        for clase, cantidad in errores.resumen_clases():
+            print(f"  {clase}: {cantidad}")
+        print("(ver errores de la última carga para una muestra)")
+    
+    def mostrar_avisos_carga(self, discrepancias_previas, duplicados_previos):
+        """Resume las discrepancias y duplicados encontrados en la última carga de préstamos"""
+        nuevas = len(self.discrepancias) - discrepancias_previas
+        if nuevas:
+            print(f"Advertencia: {nuevas} nombres o títulos distintos a los del catálogo (ver discrepancias).")
+        
+        duplicados = self.total_duplicados - duplicados_previos
+        if duplicados:
+            print(f"Advertencia: se omitieron {duplicados} préstamos duplicados (ver duplicados).")
+    
+    # --- Reportes en consola ---
+    
+    def mostrar_historial_prestamos(self):
+        """Muestra todos los préstamos registrados"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        print("\n=== HISTORIAL DE PRÉSTAMOS ===")
+        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
+        print("-" * 120)
+        
+        for prestamo in self.iterar_prestamos():
+            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No devuelto"
+            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {devolucion:<15}")
+    
+    def mostrar_usuarios_unicos(self):
+        """Muestra lista de usuarios únicos que han realizado préstamos"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        print("\n=== LISTADO DE USUARIOS ÚNICOS ===")
+        print(f"{'ID Usuario':<12} {'Nombre Usuario':<30}")
+        print("-" * 45)
+        
+        for id_usuario, nombre in self.obtener_usuarios_unicos():
+            print(f"{id_usuario:<12} {nombre:<30}")
+    
+    def mostrar_libros_prestados(self):
+        """Muestra lista de libros que han sido prestados, sin duplicados"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        print("\n=== LISTADO DE LIBROS PRESTADOS ===")
+        print(f"{'ID Libro':<10} {'Título del Libro':<40}")
+        print("-" * 55)
+        
+        for id_libro, titulo in self.obtener_libros_prestados():
+            print(f"{id_libro:<10} {titulo:<40}")
+    
+    def mostrar_estadisticas(self):
+        """Muestra estadísticas generales de préstamos"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        estadisticas = self.calcular_estadisticas()
+        
+        print("\n=== ESTADÍSTICAS DE PRÉSTAMOS ===")
+        print(f"Total de préstamos: {estadisticas['total_prestamos']}")
+        print(f"Total de usuarios únicos: {estadisticas['total_usuarios']}")
+        print(f"Libro más prestado: {estadisticas['libro_mas_prestado']} ({estadisticas['max_prestamos']} veces)")
+        print(f"Usuario más activo: {estadisticas['usuario_mas_activo']} ({estadisticas['max_actividad']} préstamos)")
+    
+    def mostrar_prestamos_vencidos(self, fecha_actual=None):
+        """Muestra préstamos vencidos (fecha de devolución pasada y no devueltos)"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        # Obtener fecha actual (o la fecha de consulta indicada)
+        if fecha_actual is None:
+            fecha_actual = datetime.now().strftime("%Y-%m-%d")
+        
+        prestamos_vencidos = iter(self.obtener_prestamos_vencidos(fecha_actual))
+        primero = next(prestamos_vencidos, None)
+        
+        if primero is None:
+            print("No hay préstamos vencidos.")
+            return
+        
+        print("\n=== PRÉSTAMOS VENCIDOS ===")
+        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
+        print("-" * 120)
+        
+        for prestamo in chain([primero], prestamos_vencidos):
+            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No especificada"
+            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {devolucion:<15}")
+    
+    def mostrar_prestamos_por_vencer(self, dias=None):
+        """Muestra préstamos cuya fecha de devolución cae en los próximos días"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        if dias is None:
+            texto = input("Ingrese la cantidad de días: ").strip()
+            if not self.es_numero_valido(texto):
+                print(f"Error: Cantidad de días inválida '{texto}'")
+                return
+            dias = int(texto)
+        
+        fecha_actual = datetime.now().strftime("%Y-%m-%d")
+        prestamos_por_vencer = self.obtener_prestamos_por_vencer(fecha_actual, dias)
+        
+        if not prestamos_por_vencer:
+            print(f"No hay préstamos que venzan en los próximos {dias} días.")
+            return
+        
+        print(f"\n=== PRÉSTAMOS POR VENCER (PRÓXIMOS {dias} DÍAS) ===")
+        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
+        print("-" * 120)
+        
+        for prestamo in prestamos_por_vencer:
+            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {prestamo.fecha_devolucion:<15}")
+    
+    def consultar_prestamos_a_fecha(self):
+        """Pide por consola la fecha y el usuario (Enter = todos) y muestra los préstamos a esa fecha"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        fecha = input("Ingrese la fecha de consulta (YYYY-MM-DD): ").strip()
+        id_usuario = input("ID de usuario (Enter = todos): ").strip() or None
+        self.mostrar_prestamos_a_fecha(fecha, id_usuario)
+    
+    def mostrar_prestamos_a_fecha(self, fecha, id_usuario=None):
+        """Muestra lo que estaba prestado y lo vencido en una fecha pasada; id_usuario None es todos los usuarios"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        if not self.es_fecha_valida(fecha):
+            print(f"Error: Fecha inválida '{fecha}'")
+            return
+        
+        if id_usuario is not None and not self.es_numero_valido(id_usuario):
+            print(f"Error: ID de usuario inválido '{id_usuario}'")
+            return
+        
+        prestamos_abiertos = self.obtener_prestamos_abiertos(fecha, id_usuario)
+        descripcion = f"AL {fecha}" if id_usuario is None else f"DEL USUARIO {id_usuario} AL {fecha}"
+        
+        if not prestamos_abiertos:
+            print(f"No había préstamos sin devolver {descripcion.lower()}.")
+        else:
+            print(f"\n=== PRÉSTAMOS SIN DEVOLVER {descripcion} ({len(prestamos_abiertos)}) ===")
+            print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
+            print("-" * 120)
+            
+            for prestamo in prestamos_abiertos:
+                devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No devuelto"
+                print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {devolucion:<15}")
+        
+        if id_usuario is None and prestamos_abiertos:
+            print(f"\n=== PRÉSTAMOS EN MANO POR USUARIO AL {fecha} ===")
+            print(f"{'ID Usuario':<12} {'Nombre Usuario':<30} {'Préstamos':<10}")
+            print("-" * 55)
+            
+            for id_registro, nombre, cantidad in self.obtener_prestamos_por_usuario(fecha):
+                print(f"{id_registro:<12} {nombre:<30} {cantidad:<10}")
+        
+        # Los vencidos a la fecha salen del mismo índice que el reporte de vencidos de hoy
+        prestamos_vencidos = [prestamo for prestamo in self.obtener_prestamos_vencidos(fecha)
+                              if id_usuario is None or prestamo.id_usuario == id_usuario]
+        if not prestamos_vencidos:
+            print(f"\nNo había préstamos vencidos {descripcion.lower()}.")
+            return
+        
+        print(f"\n=== PRÉSTAMOS VENCIDOS {descripcion} ({len(prestamos_vencidos)}) ===")
+        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'ID Libro':<10} {'Título Libro':<25} {'Fecha Préstamo':<15} {'Fecha Devolución':<15}")
+        print("-" * 120)
+        
+        for prestamo in prestamos_vencidos:
+            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No especificada"
+            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.id_libro:<10} {prestamo.titulo_libro:<25} {prestamo.fecha_prestamo:<15} {devolucion:<15}")
+    
+    def mostrar_prestamos_superpuestos(self, id_libro=None):
+        """Muestra los libros que estuvieron prestados más de una vez a la vez y el detalle de uno"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        uso = [fila for fila in self.obtener_uso_libros() if fila[3] > 1]
+        if not uso:
+            print("Ningún libro estuvo prestado más de una vez al mismo tiempo.")
+        else:
+            print(f"\n=== LIBROS CON PRÉSTAMOS SIMULTÁNEOS ({len(uso)}) ===")
+            print(f"{'ID Libro':<10} {'Título Libro':<30} {'Préstamos':<10} {'Pico':<6} {'Fecha Pico':<12} {'Superpuestos':<12}")
+            print("-" * 85)
+            
+            for id_registro, titulo, cantidad, pico, fecha_pico, superpuestos in uso:
+                print(f"{id_registro:<10} {titulo:<30} {cantidad:<10} {pico:<6} {fecha_pico:<12} {superpuestos:<12}")
+        
+        if id_libro is None:
+            id_libro = input("ID de libro para ver el detalle (Enter = ninguno): ").strip() or None
+        if id_libro is None:
+            return
+        if not self.es_numero_valido(id_libro):
+            print(f"Error: ID de libro inválido '{id_libro}'")
+            return
+        
+        fecha_actual = datetime.now().strftime("%Y-%m-%d")
+        print(f"\nPréstamos del libro {id_libro} sin devolver hoy ({fecha_actual}): "
+              f"{self.obtener_prestamos_simultaneos(id_libro, fecha_actual)}")
+        
+        superpuestos = self.obtener_superpuestos_libro(id_libro)
+        if not superpuestos:
+            print(f"El libro {id_libro} no tuvo préstamos superpuestos.")
+            return
+        
+        print(f"\n=== PRÉSTAMOS SUPERPUESTOS DEL LIBRO {id_libro} ({len(superpuestos)}) ===")
+        print(f"{'ID Usuario':<10} {'Nombre Usuario':<20} {'Fecha Préstamo':<15} {'Fecha Devolución':<17} {'En curso (usuario)':<20} {'Desde':<12} {'Simultáneos':<11}")
+        print("-" * 110)
+        
+        for prestamo, en_curso, cantidad in superpuestos:
+            devolucion = prestamo.fecha_devolucion if prestamo.fecha_devolucion else "No devuelto"
+            print(f"{prestamo.id_usuario:<10} {prestamo.nombre_usuario:<20} {prestamo.fecha_prestamo:<15} {devolucion:<17} {en_curso.id_usuario:<20} {en_curso.fecha_prestamo:<12} {cantidad:<11}")
+    
+    def mostrar_busqueda(self):
+        """Busca libros o usuarios por palabras (sin importar acentos ni mayúsculas)"""
+        tipo = input("Buscar en (1) libros o (2) usuarios: ").strip()
+        if tipo not in ("1", "2"):
+            print("Opción inválida.")
+            return
+        
+        consulta = input("Ingrese las palabras a buscar: ")
+        
+        if tipo == "1":
+            resultados = self.buscar_libros(consulta)
+            encabezado = f"{'ID Libro':<10} {'Título del Libro':<40}"
+        else:
+            resultados = self.buscar_usuarios(consulta)
+            encabezado = f"{'ID Usuario':<10} {'Nombre Usuario':<40}"
+        
+        if not resultados:
+            print("No se encontraron coincidencias.")
+            return
+        
+        print(f"\n=== RESULTADOS DE BÚSQUEDA ({len(resultados)}) ===")
+        print(encabezado)
+        print("-" * 55)
+        
+        for id_registro, texto in resultados:
+            print(f"{id_registro:<10} {texto:<40}")
+    
+    def mostrar_discrepancias(self):
+        """Muestra los nombres y títulos de préstamos que no coinciden con el catálogo"""
+        if not self.discrepancias:
+            print("No hay discrepancias con el catálogo.")
+            return
+        
+        print("\n=== DISCREPANCIAS CON EL CATÁLOGO ===")
+        print(f"{'Línea':<7} {'Campo':<15} {'ID':<8} {'En el préstamo':<30} {'En el catálogo':<30} {'Sugerencia':<40} {'Veces':<6}")
+        print("-" * 140)
+        
+        for d in self.discrepancias.values():
+            if d['sugerencia']:
+                sugerencia = f"{d['sugerencia_id']} {d['sugerencia']} ({d['similitud']:.0%})"
+            else:
+                sugerencia = "Sin sugerencia"
+            print(f"{d['primera_linea']:<7} {d['campo']:<15} {d['id']:<8} {d['valor']:<30} {d['catalogo']:<30} {sugerencia:<40} {d['veces']:<6}")
+    
+    def mostrar_errores_lectura(self):
+        """Muestra los errores de la última carga: conteo por clase, los primeros y una muestra al azar"""
+        errores = self.errores_lectura
+        if not errores:
+            print("La última carga no tuvo errores.")
+            return
+        
+        print(f"\n=== ERRORES DE LA ÚLTIMA CARGA ({errores.total}) ===")
+        print(f"{'Clase de error':<25} {'Cantidad':<10}")
+        print("-" * 40)
+        for clase, cantidad in errores.resumen_clases():
+            print(f"{clase:<25} {cantidad:<10}")
+        
+        print(f"\nPrimeros {len(errores.primeros)} errores:")
+        for error in errores:
+            print(self.texto_error(error))
+        
+        # La muestra solo agrega información si hubo errores que no están entre los primeros
+        if errores.omitidos():
+            print(f"\nMuestra al azar de {len(errores.muestra)} errores:")
+            for error in sorted(errores.muestra, key=lambda e: e['linea']):
+                print(self.texto_error(error))
+    
+    def mostrar_duplicados(self):
+        """Muestra los préstamos descartados por estar repetidos"""
+        if not self.total_duplicados:
+            print("No se encontraron préstamos duplicados.")
+            return
+        
+        print(f"\n=== PRÉSTAMOS DUPLICADOS ({self.total_duplicados}) ===")
+        print(f"{'Línea':<8} {'ID Usuario':<12} {'ID Libro':<10} {'Fecha Préstamo':<15}")
+        print("-" * 50)
+        
+        for duplicado in self.duplicados:
+            print(f"{duplicado['linea']:<8} {duplicado['id_usuario']:<12} {duplicado['id_libro']:<10} {duplicado['fecha_prestamo']:<15}")
+        
+        if self.total_duplicados > len(self.duplicados):
+            print(f"... y {self.total_duplicados - len(self.duplicados)} más.")
+    
+    def mostrar_rankings(self, tipo=None, k=None, periodo=None):
+        """Muestra los libros o usuarios con más préstamos en un período"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        if tipo is None:
+            opcion = input("Ranking de (1) libros o (2) usuarios: ").strip()
+            if opcion not in ("1", "2"):
+                print("Opción inválida.")
+                return
+            tipo = 'libros' if opcion == "1" else 'usuarios'
+        
+        if k is None:
+            texto = input("Cantidad de puestos (Enter = 10): ").strip() or "10"
+            if not self.es_numero_valido(texto) or int(texto) == 0:
+                print(f"Error: Cantidad de puestos inválida '{texto}'")
+                return
+            k = int(texto)
+        
+        if periodo is None:
+            periodo = input("Período (Enter = todo, YYYY-MM, YYYY-Wnn o YYYY-MM-DD:YYYY-MM-DD): ")
+        rango = self.interpretar_periodo(periodo)
+        if rango is None:
+            print(f"Error: Período inválido '{periodo}'")
+            return
+        
+        resultados = self.obtener_mas_prestados(tipo, k, *rango)
+        if not resultados:
+            print("No hay préstamos en ese período.")
+            return
+        
+        titulo = "LIBROS MÁS PRESTADOS" if tipo == 'libros' else "USUARIOS MÁS ACTIVOS"
+        descripcion = "todo el registro" if rango == (None, None) else f"{rango[0]} a {rango[1]}"
+        print(f"\n=== {titulo} ({descripcion}) ===")
+        print(f"{'Puesto':<8} {'ID':<10} {'Nombre / Título':<40} {'Préstamos':<10}")
+        print("-" * 70)
+        
+        for puesto, (id_registro, texto, cantidad) in enumerate(resultados, 1):
+            print(f"{puesto:<8} {id_registro:<10} {texto:<40} {cantidad:<10}")
+    
+    def mostrar_ranking_mensual(self):
+        """Muestra por cada mes los libros más prestados y los usuarios más activos"""
+        if not self.hay_prestamos():
+            print("No hay préstamos registrados.")
+            return
+        
+        print("\n=== RANKING MENSUAL ===")
+        print(f"{'Mes':<8} {'Puesto':<7} {'Libro':<30} {'Préstamos':<10} {'Usuario':<20} {'Préstamos':<10}")
+        print("-" * 90)
+        
+        for mes, libros, usuarios in self.obtener_ranking_mensual():
+            for puesto, (libro, usuario) in enumerate(zip_longest(libros, usuarios, fillvalue=("", "", "")), 1):
+                print(f"{mes:<8} {puesto:<7} {libro[1]:<30} {libro[2]:<10} {usuario[1]:<20} {usuario[2]:<10}")
+    
+    # --- Reportes HTML ---
+    # Los escribir_html_* van escribiendo fila por fila en el archivo; los
+    # generar_html_* devuelven lo mismo como texto
+    
+    def escribir_html_historial(self, archivo):
+        """Escribe el HTML del historial de préstamos"""
+        archivo.write("""
+        <h2>Historial de Préstamos</h2>
+        <table border='1' style='border-collapse: collapse; width: 100%;'>
+        <tr>
+            <th>ID Usuario</th>
+            <th>Nombre Usuario</th>
+            <th>ID Libro</th>
+            <th>Título Libro</th>
+            <th>Fecha Préstamo</th>
+            <th>Fecha Devolución</th>
+        </tr>
+        """)
+        
+        FILA_HTML_PRESTAMO.escribir_filas(archivo, (
+            (id_usuario, nombre, id_libro, titulo, prestamo, devolucion or "No devuelto")
+            for id_usuario, nombre, id_libro, titulo, prestamo, devolucion in self.iterar_filas_prestamos()
+        ))
+        
+        archivo.write("</table>\n")
+    
+    def escribir_html_usuarios(self, archivo, usuarios_unicos=None):
+        """Escribe el HTML de usuarios únicos"""
+        if usuarios_unicos is None:
+            usuarios_unicos = self.obtener_usuarios_unicos()
+        
+        archivo.write("""
+        <h2>Listado de Usuarios Únicos</h2>
+        <table border='1' style='border-collapse: collapse; width: 100%;'>
+        <tr>
+            <th>ID Usuario</th>
+            <th>Nombre Usuario</th>
+        </tr>
+        """)
+        
+        FILA_HTML_PAR.escribir_filas(archivo, usuarios_unicos)
+        
+        archivo.write("</table>\n")
+    
+    def escribir_html_libros(self, archivo, libros_prestados=None):
+        """Escribe el HTML de libros prestados"""
+        if libros_prestados is None:
+            libros_prestados = self.obtener_libros_prestados()
+        
+        archivo.write("""
+        <h2>Listado de Libros Prestados</h2>
+        <table border='1' style='border-collapse: collapse; width: 100%;'>
+        <tr>
+            <th>ID Libro</th>
+            <th>Título del Libro</th>
+        </tr>
+        """)
+        
+        FILA_HTML_PAR.escribir_filas(archivo, libros_prestados)
+        
+        archivo.write("</table>\n")
+    
+    def escribir_html_estadisticas(self, archivo, estadisticas=None):
+        """Escribe el HTML de estadísticas"""
+        if not self.hay_prestamos():
+            archivo.write("<h2>Estadísticas de Préstamos</h2><p>No hay datos disponibles.</p>\n")
+            return
+        
+        if estadisticas is None:
+            estadisticas = self.calcular_estadisticas()
+        
+        TABLA_HTML_ESTADISTICAS.escribir(archivo, estadisticas)
+    
+    def escribir_html_vencidos(self, archivo, prestamos_vencidos=None):
+        """Escribe el HTML de préstamos vencidos"""
+        if prestamos_vencidos is None:
+            fecha_actual = datetime.now().strftime("%Y-%m-%d")
+            prestamos_vencidos = self.obtener_prestamos_vencidos(fecha_actual)
+        
+        archivo.write("""
+        <h2>Préstamos Vencidos</h2>
+        <table border='1' style='border-collapse: collapse; width: 100%;'>
+        <tr>
+            <th>ID Usuario</th>
+            <th>Nombre Usuario</th>
+            <th>ID Libro</th>
+            <th>Título Libro</th>
+            <th>Fecha Préstamo</th>
+            <th>Fecha Devolución</th>
+        </tr>
+        """)
+        
+        FILA_HTML_PRESTAMO.escribir_filas(archivo, (
+            (p.id_usuario, p.nombre_usuario, p.id_libro, p.titulo_libro, p.fecha_prestamo,
+             p.fecha_devolucion or "No especificada")
+            for p in prestamos_vencidos
+        ))
+        
+        archivo.write("</table>\n")
+    
+    def escribir_html_ranking(self, archivo, ranking_mensual=None):
+        """Escribe el HTML del ranking mensual de libros y usuarios"""
+        if ranking_mensual is None:
+            ranking_mensual = self.obtener_ranking_mensual()
+        
+        archivo.write("""
+        <h2>Ranking Mensual</h2>
+        <table border='1' style='border-collapse: collapse; width: 100%;'>
+        <tr>
+            <th>Mes</th>
+            <th>Puesto</th>
+            <th>Libro</th>
+            <th>Préstamos</th>
+            <th>Usuario</th>
+            <th>Préstamos</th>
+        </tr>
+        """)
+        
+        FILA_HTML_RANKING.escribir_filas(archivo, (
+            (mes, puesto, libro[1], libro[2], usuario[1], usuario[2])
+            for mes, libros, usuarios in ranking_mensual
+            for puesto, (libro, usuario) in enumerate(zip_longest(libros, usuarios, fillvalue=("", "", "")), 1)
+        ))
+        
+        archivo.write("</table>\n")
+    
+    # El historial y los vencidos (que dependen de la fecha de hoy) se generan siempre;
+    # el resto de las secciones se guarda mientras no cambien los datos
+    
+    def generar_html_historial(self):
+        """Genera HTML para el historial de préstamos"""
+        buffer = io.StringIO()
+        self.escribir_html_historial(buffer)
+        return buffer.getvalue()
+    
+    @en_cache('usuarios', 'prestamos')
+    def generar_html_usuarios(self):
+        """Genera HTML para usuarios únicos"""
+        buffer = io.StringIO()
+        self.escribir_html_usuarios(buffer)
+        return buffer.getvalue()
+    
+    @en_cache('libros', 'prestamos')
+    def generar_html_libros(self):
+        """Genera HTML para libros prestados"""
+        buffer = io.StringIO()
+        self.escribir_html_libros(buffer)
+        return buffer.getvalue()
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def generar_html_estadisticas(self):
+        """Genera HTML para estadísticas"""
+        buffer = io.StringIO()
+        self.escribir_html_estadisticas(buffer)
+        return buffer.getvalue()
+    
+    def generar_html_vencidos(self):
+        """Genera HTML para préstamos vencidos"""
+        buffer = io.StringIO()
+        self.escribir_html_vencidos(buffer)
+        return buffer.getvalue()
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def generar_html_ranking(self):
+        """Genera HTML para el ranking mensual"""
+        buffer = io.StringIO()
+        self.escribir_html_ranking(buffer)
+        return buffer.getvalue()
+    
+    def exportar_reportes_html(self, nombre_archivo=None, reportes=REPORTES):
+        """Exporta los reportes indicados (todos por defecto) a un archivo HTML"""
+        if not self.hay_prestamos():
+            print("No hay datos para exportar.")
+            return False
+        
+        if nombre_archivo is None:
+            nombre_archivo = input("Ingrese el nombre del archivo HTML (ej: reportes.html): ")
+        
+        try:
+            # Buffer grande: las filas se escriben directo al archivo sin armar el reporte en memoria
+            with open(nombre_archivo, 'w', encoding='utf-8', buffering=TAMANO_BUFFER_EXPORTACION) as archivo:
+                # Encabezado HTML
+                archivo.write("""<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Reportes - Biblioteca Digital</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        h1 { color: #2c3e50; text-align: center; }
+        h2 { color: #34495e; border-bottom: 2px solid #3498db; padding-bottom: 5px; }
+        table { margin-bottom: 30px; }
+        th { background-color: #3498db; color: white; padding: 10px; }
+        td { padding: 8px; }
+        tr:nth-child(even) { background-color: #f2f2f2; }
+    </style>
+</head>
+<body>
+    <h1>Reportes de Biblioteca Digital</h1>
+""")
+                
+                # Usuarios, libros, estadísticas y vencidos salen del mismo resumen
+                resumen = self.calcular_resumen(datetime.now().strftime("%Y-%m-%d"), reportes)
+                
+                # Escribir cada reporte
+                if 'historial' in reportes:
+                    self.escribir_html_historial(archivo)
+                if 'usuarios' in reportes:
+                    self.escribir_html_usuarios(archivo, resumen['usuarios'])
+                if 'libros' in reportes:
+                    self.escribir_html_libros(archivo, resumen['libros'])
+                if 'estadisticas' in reportes:
+                    self.escribir_html_estadisticas(archivo, resumen['estadisticas'])
+                if 'vencidos' in reportes:
+                    self.escribir_html_vencidos(archivo, resumen['vencidos'])
+                if 'ranking' in reportes:
+                    self.escribir_html_ranking(archivo, resumen['ranking'])
+                
+                # Cerrar HTML
+                archivo.write("""
+</body>
+</html>
+""")
+            
+            print(f"Reportes exportados exitosamente a '{nombre_archivo}'")
+            return True
+        
+        except Exception as e:
+            print(f"Error al exportar reportes: {e}")
+            return False
+    
+    def exportar_reportes_texto(self, nombre_archivo, reportes=REPORTES):
+        """Guarda en un archivo de texto los mismos reportes que se muestran en consola"""
+        try:
+            with open(nombre_archivo, 'w', encoding='utf-8', buffering=TAMANO_BUFFER_EXPORTACION) as archivo:
+                with redirect_stdout(archivo):
+                    if 'historial' in reportes:
+                        self.mostrar_historial_prestamos()
+                    if 'usuarios' in reportes:
+                        self.mostrar_usuarios_unicos()
+                    if 'libros' in reportes:
+                        self.mostrar_libros_prestados()
+                    if 'estadisticas' in reportes:
+                        self.mostrar_estadisticas()
+                    if 'vencidos' in reportes:
+                        self.mostrar_prestamos_vencidos()
+                    if 'ranking' in reportes:
+                        self.mostrar_ranking_mensual()
+            
+            print(f"Reportes exportados exitosamente a '{nombre_archivo}'")
+            return True
+        
+        except Exception as e:
+            print(f"Error al exportar reportes: {e}")
+            return False
+
+    # --- Exportación para análisis (CSV / JSON Lines) ---
+    
+    def filas_reporte(self, reporte, resumen):
+        """Encabezados y filas (como tuplas) de un reporte, para escribirlos sin formato de tabla"""
+        if reporte == 'historial':
+            return (('id_usuario', 'nombre_usuario', 'id_libro', 'titulo_libro', 'fecha_prestamo', 'fecha_devolucion'),
+                    self.iterar_filas_prestamos())
+        if reporte == 'usuarios':
+            return ('id_usuario', 'nombre_usuario'), resumen['usuarios']
+        if reporte == 'libros':
+            return ('id_libro', 'titulo_libro'), resumen['libros']
+        if reporte == 'estadisticas':
+            estadisticas = resumen['estadisticas']
+            return tuple(estadisticas), [tuple(estadisticas.values())]
+        if reporte == 'vencidos':
+            return (('id_usuario', 'nombre_usuario', 'id_libro', 'titulo_libro', 'fecha_prestamo', 'fecha_devolucion'),
+                    ((p.id_usuario, p.nombre_usuario, p.id_libro, p.titulo_libro, p.fecha_prestamo, p.fecha_devolucion)
+                     for p in resumen['vencidos']))
+        # ranking: una fila por mes, tipo y puesto
+        return (('mes', 'tipo', 'puesto', 'id', 'nombre', 'prestamos'),
+                ((mes, tipo, puesto, id_registro, texto, cantidad)
+                 for mes, libros, usuarios in resumen['ranking']
+                 for tipo, lista in (('libros', libros), ('usuarios', usuarios))
+                 for puesto, (id_registro, texto, cantidad) in enumerate(lista, 1)))
+    
+    def abrir_exportacion(self, nombre_archivo, comprimir):
+        """Abre un archivo de texto con buffer grande, comprimido con gzip si se pide"""
+        if not comprimir:
+            return open(nombre_archivo, 'w', encoding='utf-8', newline='', buffering=TAMANO_BUFFER_EXPORTACION)
+        comprimido = gzip.GzipFile(nombre_archivo, 'wb', compresslevel=NIVEL_GZIP)
+        return io.TextIOWrapper(io.BufferedWriter(comprimido, TAMANO_BUFFER_EXPORTACION), encoding='utf-8', newline='')
+    
+    def exportar_reportes_datos(self, nombre_base=None, formato=None, reportes=REPORTES, comprimir=None):
+        """Exporta cada reporte a su propio archivo CSV o JSON Lines (opcionalmente .gz), fila por fila"""
+        if not self.hay_prestamos():
+            print("No hay datos para exportar.")
+            return False
+        
+        if formato is None:
+            opcion = input("Formato: (1) CSV o (2) JSON Lines: ").strip()
+            if opcion not in ("1", "2"):
+                print("Opción inválida.")
+                return False
+            formato = 'csv' if opcion == "1" else 'jsonl'
+        if nombre_base is None:
+            nombre_base = input("Ingrese el nombre base de los archivos (ej: reportes): ").strip()
+        if comprimir is None:
+            comprimir = input("¿Comprimir con gzip? (s/n): ").strip().lower() == "s"
+        
+        try:
+            resumen = self.calcular_resumen(datetime.now().strftime("%Y-%m-%d"), reportes)
+            
+            for reporte in reportes:
+                nombre_archivo = f"{nombre_base}_{reporte}.{formato}" + (".gz" if comprimir else "")
+                encabezados, filas = self.filas_reporte(reporte, resumen)
+                
+                with self.abrir_exportacion(nombre_archivo, comprimir) as archivo:
+                    if formato == 'csv':
+                        escritor = csv.writer(archivo)
+                        escritor.writerow(encabezados)
+                        escritor.writerows(filas)
+                    else:
+                        codificar = json.JSONEncoder(ensure_ascii=False).encode
+                        archivo.writelines(codificar(dict(zip(encabezados, fila))) + "\n" for fila in filas)
+                
+                print(f"Reporte '{reporte}' exportado a '{nombre_archivo}'")
+            return True
+        
+        except Exception as e:
+            print(f"Error al exportar reportes: {e}")
+            return False
+
+def main(biblioteca=None):
+    if biblioteca is None:
+        biblioteca = BibliotecaDigital()
+    
+    while True:
+        print("\n" + "="*50)
+        print("    SISTEMA DE BIBLIOTECA DIGITAL")
+        print("="*50)
+        print("1. Cargar usuarios")
+        print("2. Cargar libros") 
+        print("3. Cargar registro de préstamos desde archivo")
+        print("4. Mostrar historial de préstamos")
+        print("5. Mostrar listado de usuarios únicos")
+        print("6. Mostrar listado de libros prestados")
+        print("7. Mostrar estadísticas de préstamos")
+        print("8. Mostrar préstamos vencidos")
+        print("9. Exportar todos los reportes a HTML")
+        print("10. Mostrar préstamos por vencer")
+        print("11. Buscar libros o usuarios")
+        print("12. Mostrar discrepancias con el catálogo")
+        print("13. Actualizar préstamos (solo líneas nuevas del archivo)")
+        print("14. Mostrar préstamos duplicados")
+        print("15. Mostrar rankings (más prestados por período)")
+        print("16. Exportar reportes a CSV o JSON Lines")
+        print("17. Mostrar errores de la última carga")
+        print("18. Consultar préstamos a una fecha pasada")
+        print("19. Mostrar libros con préstamos simultáneos")
+        print("20. Salir")
+        print("="*50)
+        
+        try:
+            opcion = input("Seleccione una opción (1-20): ").strip()
+            
+            if opcion == "1":
+                biblioteca.cargar_usuarios()
+            elif opcion == "2":
+                biblioteca.cargar_libros()
+            elif opcion == "3":
+                biblioteca.cargar_prestamos()
+            elif opcion == "4":
+                biblioteca.mostrar_historial_prestamos()
+            elif opcion == "5":
+                biblioteca.mostrar_usuarios_unicos()
+            elif opcion == "6":
+                biblioteca.mostrar_libros_prestados()
+            elif opcion == "7":
+                biblioteca.mostrar_estadisticas()
+            elif opcion == "8":
+                biblioteca.mostrar_prestamos_vencidos()
+            elif opcion == "9":
+                biblioteca.exportar_reportes_html()
+            elif opcion == "10":
+                biblioteca.mostrar_prestamos_por_vencer()
+            elif opcion == "11":
+                biblioteca.mostrar_busqueda()
+            elif opcion == "12":
+                biblioteca.mostrar_discrepancias()
+            elif opcion == "13":
+                biblioteca.cargar_prestamos_incremental()
+            elif opcion == "14":
+                biblioteca.mostrar_duplicados()
+            elif opcion == "15":
+                biblioteca.mostrar_rankings()
+            elif opcion == "16":
+                biblioteca.exportar_reportes_datos()
+            elif opcion == "17":
+                biblioteca.mostrar_errores_lectura()
+            elif opcion == "18":
+                biblioteca.consultar_prestamos_a_fecha()
+            elif opcion == "19":
+                biblioteca.mostrar_prestamos_superpuestos()
+            elif opcion == "20":
+                print("¡Gracias por usar el Sistema de Biblioteca Digital!")
+                break
+            else:
+                print("Opción inválida. Por favor seleccione una opción del 1 al 20.")
+        
+        except KeyboardInterrupt:
+            print("\n\n¡Programa interrumpido por el usuario!")
+            break
+        except Exception as e:
+            print(f"Error inesperado: {e}")
+
+def crear_parser():
+    """Argumentos del modo por lotes (sin menú)"""
+    parser = argparse.ArgumentParser(
+        description="Sistema de Biblioteca Digital. Sin argumentos abre el menú interactivo."
+    )
+    parser.add_argument("--usuarios", help="archivo de usuarios")
+    parser.add_argument("--libros", help="archivo de libros")
+    parser.add_argument("--prestamos", help="archivo de préstamos (.lfa)")
+    parser.add_argument("--reportes",
+                        help="reportes separados por coma: " + ",".join(REPORTES) + " (por defecto todos)")
+    parser.add_argument("--formatos", default="html",
+                        help="formatos separados por coma: " + ",".join(FORMATOS) + " (por defecto html)")
+    parser.add_argument("--gzip", action="store_true", help="comprimir con gzip las salidas csv y jsonl")
+    parser.add_argument("--salida", default=".", help="carpeta donde se escriben los reportes")
+    parser.add_argument("--prefijo", default="reportes", help="nombre base de los archivos generados")
+    parser.add_argument("--sqlite", metavar="ARCHIVO_DB", help="usar almacenamiento SQLite en lugar de memoria")
+    parser.add_argument("--bloom", type=int, default=0, metavar="CANTIDAD",
+                        help="detectar duplicados con un filtro de Bloom dimensionado para tantos préstamos; "
+                             "con --sqlite los descarta el índice único de la base")
+    parser.add_argument("--intervalo", type=int, metavar="SEGUNDOS",
+                        help="seguir el archivo de préstamos y regenerar los reportes cada tantos segundos")
+    parser.add_argument("--sucursal", action="append", metavar="CARPETA",
+                        help="carpeta de una sucursal con Usuarios.txt, Libros.txt y Préstamos.txt; "
+                             "se repite para cargar varias en paralelo y reportar la red completa")
+    return parser
+
+def leer_reportes_y_formatos(args, reportes_validos=REPORTES):
+    """Separa y valida --reportes y --formatos; devuelve None si hay alguno desconocido"""
+    reportes = [r.strip() for r in (args.reportes or ",".join(reportes_validos)).split(",") if r.strip()]
+    formatos = [f.strip() for f in args.formatos.split(",") if f.strip()]
+    
+    for reporte in reportes:
+        if reporte not in reportes_validos:
+            print(f"Error: Reporte desconocido '{reporte}'")
+            return None
+    for formato in formatos:
+        if formato not in FORMATOS:
+            print(f"Error: Formato desconocido '{formato}'")
+            return None
+    
+    return reportes, formatos
+
+def ejecutar_lote(biblioteca, args):
+    """Carga los archivos una vez y genera todos los reportes pedidos; devuelve el código de salida"""
+    listas = leer_reportes_y_formatos(args)
+    if listas is None:
+        return 2
+    reportes, formatos = listas
+    
+    # En modo seguimiento los préstamos se leen siempre de forma incremental
+    cargar_prestamos = biblioteca.cargar_prestamos_incremental if args.intervalo else biblioteca.cargar_prestamos
+    
+    # El orden importa: los préstamos se validan contra el catálogo
+    if args.usuarios and biblioteca.cargar_usuarios(args.usuarios) is None:
+        return 1
+    if args.libros and biblioteca.cargar_libros(args.libros) is None:
+        return 1
+    if args.prestamos and cargar_prestamos(args.prestamos) is None:
+        return 1
+    
+    os.makedirs(args.salida, exist_ok=True)
+    base = os.path.join(args.salida, args.prefijo)
+    
+    if not generar_salidas(biblioteca, base, reportes, formatos, args.gzip):
+        return 1
+    
+    if not args.intervalo:
+        return 0
+    
+    try:
+        while True:
+            time.sleep(args.intervalo)
+            if args.prestamos and cargar_prestamos(args.prestamos) is None:
+                return 1
+            if not generar_salidas(biblioteca, base, reportes, formatos, args.gzip):
+                return 1
+    except KeyboardInterrupt:
+        return 0
+
+def generar_salidas(biblioteca, base, reportes, formatos, comprimir=False):
+    """Escribe los reportes en cada formato pedido; indica si todo salió bien"""
+    correcto = True
+    if 'html' in formatos:
+        correcto = biblioteca.exportar_reportes_html(base + ".html", reportes) and correcto
+    if 'texto' in formatos:
+        correcto = biblioteca.exportar_reportes_texto(base + ".txt", reportes) and correcto
+    for formato in ('csv', 'jsonl'):
+        if formato in formatos:
+            correcto = biblioteca.exportar_reportes_datos(base, formato, reportes, comprimir) and correcto
+    return correcto
+
+def main_cli(argv=None):
+    """Punto de entrada: menú interactivo o modo por lotes según los argumentos"""
+    args = crear_parser().parse_args(argv)
+    
+    if args.sucursal:
+        # Cada sucursal se carga desde su carpeta en un proceso aparte
+        if args.usuarios or args.libros or args.prestamos or args.sqlite or args.intervalo:
+            print("Error: --sucursal no se combina con --usuarios, --libros, --prestamos, --sqlite ni --intervalo")
+            return 2
+        listas = leer_reportes_y_formatos(args, REPORTES_RED)
+        if listas is None:
+            return 2
+        from sucursales import ejecutar_red
+        return ejecutar_red(args, *listas)
+    
+    if args.sqlite:
+        from biblioteca_sqlite import BibliotecaSQLite
+        biblioteca = BibliotecaSQLite(args.sqlite)
+    else:
+        biblioteca = BibliotecaDigital(args.bloom)
+    
+    # Sin archivos de entrada se abre el menú de siempre
+    if not (args.usuarios or args.libros or args.prestamos):
+        main(biblioteca)
+        return 0
+    
+    return ejecutar_lote(biblioteca, args)
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
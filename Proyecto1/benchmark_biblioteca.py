@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from contextlib import redirect_stdout
+from datetime import date
+
+from Biblioteca_dig import BibliotecaDigital
+
+# Partes con las que se arman nombres y títulos realistas (solo caracteres que acepta el lector)
+NOMBRES = ("María", "José", "Ana", "Luis", "Sofía", "Andrés", "Lucía", "Martín", "Valentina", "Ramón",
+           "Inés", "Jesús", "Mónica", "Raúl", "Verónica", "Héctor", "Begoña", "Iñaki", "Ángela", "Óscar",
+           "Carlos", "Patricia", "Fernando", "Gabriela", "Diego", "Isabel", "Tomás", "Elena", "Julián", "Rocío")
+APELLIDOS = ("González", "Pérez", "Martínez", "Hernández", "Rodríguez", "López", "Sánchez", "Ramírez",
+             "Gómez", "Díaz", "Muñoz", "Álvarez", "Jiménez", "Ruiz", "Castañeda", "Ordóñez", "Peña",
+             "Vega", "Morales", "Cruz", "Núñez", "Domínguez", "Vásquez", "Ibáñez", "Méndez")
+SUSTANTIVOS = ("Años", "Camino", "Canción", "Corazón", "Jardín", "Laberinto", "Océano", "Invierno",
+               "Túnel", "Sueño", "Árbol", "Ciudad", "Memoria", "Isla", "Noche", "Río", "Lección", "Estación")
+COMPLEMENTOS = ("de Soledad", "del Norte", "de la Montaña", "sin Nombre", "de los Pájaros", "en Otoño",
+                "del Cólera", "de Papel", "de Cristal", "bajo la Lluvia", "del Último Verano", "de Medianoche")
+
+# Líneas inválidas que se mezclan en los préstamos, una por cada clase de error del lector
+DEFECTOS = ("caracter", "id", "fecha", "campos")
+
+# Operaciones medidas después de cargar, con los argumentos que evitan preguntar por consola
+REPORTES = (
+    ('mostrar_historial_prestamos', ()),
+    ('mostrar_usuarios_unicos', ()),
+    ('mostrar_libros_prestados', ()),
+    ('mostrar_estadisticas', ()),
+    ('mostrar_prestamos_vencidos', ()),
+    ('mostrar_prestamos_por_vencer', (7,)),
+    ('mostrar_rankings', ('libros', 10, '')),
+    ('mostrar_ranking_mensual', ()),
+    ('mostrar_discrepancias', ()),
+    ('mostrar_duplicados', ()),
+    ('mostrar_errores_lectura', ()),
+)
+
+def sin_acentos(texto):
+    """Quita tildes y eñes: así se escriben muchos registros reales"""
+    return "".join(c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn")
+
+def generar_datos(carpeta, prestamos, proporcion_acentos=0.7, proporcion_vencidos=0.2,
+                  proporcion_invalidas=0.01, semilla=2025):
+    """Escribe Usuarios.txt, Libros.txt y Préstamos.lfa sintéticos; devuelve sus rutas"""
+    aleatorio = random.Random(semilla)
+    cantidad_usuarios = max(prestamos // 20, 50)
+    cantidad_libros = max(prestamos // 10, 50)
+    
+    def con_acentos(texto):
+        return texto if aleatorio.random() < proporcion_acentos else sin_acentos(texto)
+    
+    usuarios = [(str(100000 + i), con_acentos(f"{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} "
+                                             f"{aleatorio.choice(APELLIDOS)}"))
+                for i in range(cantidad_usuarios)]
+    libros = [(str(500000 + i), con_acentos(f"El {aleatorio.choice(SUSTANTIVOS)} {aleatorio.choice(COMPLEMENTOS)}"))
+              for i in range(cantidad_libros)]
+    
+    ruta_usuarios = os.path.join(carpeta, "Usuarios.txt")
+    ruta_libros = os.path.join(carpeta, "Libros.txt")
+    ruta_prestamos = os.path.join(carpeta, "Préstamos.lfa")
+    
+    with open(ruta_usuarios, 'w', encoding='utf-8') as archivo:
+        archivo.writelines(f"{id_usuario},{nombre}\n" for id_usuario, nombre in usuarios)
+    with open(ruta_libros, 'w', encoding='utf-8') as archivo:
+        archivo.writelines(f"{id_libro},{titulo}\n" for id_libro, titulo in libros)
+    
+    # Las fechas son relativas a hoy para que la proporción de vencidos se cumpla al consultar
+    hoy = date.today().toordinal()
+    with open(ruta_prestamos, 'w', encoding='utf-8', buffering=1 << 20) as archivo:
+        for _ in range(prestamos):
+            id_usuario, nombre = aleatorio.choice(usuarios)
+            id_libro, titulo = aleatorio.choice(libros)
+            inicio = hoy - aleatorio.randint(1, 730)
+            
+            if aleatorio.random() < proporcion_vencidos:
+                # Vencido: sin devolver o con la devolución ya pasada
+                devolucion = "" if aleatorio.random() < 0.5 else \
+                    date.fromordinal(aleatorio.randint(inicio, hoy - 1)).isoformat()
+            else:
+                devolucion = date.fromordinal(hoy + aleatorio.randint(0, 60)).isoformat()
+            linea = f"{id_usuario},{nombre},{id_libro},{titulo},{date.fromordinal(inicio).isoformat()},{devolucion}"
+            
+            if aleatorio.random() < proporcion_invalidas:
+                linea = danar_linea(linea, aleatorio)
+            archivo.write(linea + "\n")
+    
+    return ruta_usuarios, ruta_libros, ruta_prestamos
+
+def danar_linea(linea, aleatorio):
+    """Introduce un error de una clase elegida al azar en una línea de préstamo"""
+    campos = linea.split(",")
+    defecto = aleatorio.choice(DEFECTOS)
+    if defecto == "caracter":
+        campos[1] += aleatorio.choice("#@$%&*")
+    elif defecto == "id":
+        campos[2] = "L" + campos[2]
+    elif defecto == "fecha":
+        campos[4] = campos[4].replace("-", "/")
+    else:
+        campos.pop()
+    return ",".join(campos)
+
+def medir(resultados, base, operacion, funcion, *argumentos, memoria=True):
+    """Ejecuta una operación con la salida descartada y agrega su tiempo y memoria a los resultados"""
+    if memoria:
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+    
+    with open(os.devnull, 'w', encoding='utf-8') as descarte, redirect_stdout(descarte):
+        inicio = time.perf_counter()
+        funcion(*argumentos)
+        segundos = time.perf_counter() - inicio
+    
+    resultado = dict(base, operacion=operacion, segundos=round(segundos, 6))
+    if memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        resultado['memoria_pico'] = pico - antes   # bytes usados de más durante la operación
+        resultado['memoria_retenida'] = actual     # bytes en uso al terminar
+    resultados.append(resultado)
+    return resultado
+
+def ejecutar_escala(prestamos, args, carpeta):
+    """Genera los datos de un tamaño y mide la carga, cada reporte y la exportación HTML"""
+    print(f"Generando {prestamos} préstamos...", file=sys.stderr)
+    rutas = generar_datos(carpeta, prestamos, args.acentos, args.vencidos, args.invalidas, args.semilla)
+    
+    base = {'version': args.version, 'almacenamiento': 'sqlite' if args.sqlite else 'memoria',
+            'prestamos': prestamos, 'memoria_medida': not args.sin_memoria}
+    memoria = not args.sin_memoria
+    resultados = []
+    
+    if memoria:
+        tracemalloc.start()
+    try:
+        if args.sqlite:
+            from biblioteca_sqlite import BibliotecaSQLite
+            # Base nueva en cada medición: con --datos la carpeta puede tener la de una corrida anterior
+            ruta_db = os.path.join(carpeta, "biblioteca.db")
+            if os.path.exists(ruta_db):
+                os.remove(ruta_db)
+            biblioteca = BibliotecaSQLite(ruta_db)
+        else:
+            biblioteca = BibliotecaDigital()
+        
+        # El orden importa: los préstamos se validan contra el catálogo
+        for operacion, ruta in zip(('cargar_usuarios', 'cargar_libros', 'cargar_prestamos'), rutas):
+            medir(resultados, base, operacion, getattr(biblioteca, operacion), ruta, memoria=memoria)
+        
+        for operacion, argumentos in REPORTES:
+            if args.operaciones and operacion not in args.operaciones:
+                continue
+            medir(resultados, base, operacion, getattr(biblioteca, operacion), *argumentos, memoria=memoria)
+        
+        ruta_html = os.path.join(carpeta, "reportes.html")
+        resultado = medir(resultados, base, 'exportar_reportes_html', biblioteca.exportar_reportes_html,
+                          ruta_html, memoria=memoria)
+        resultado['bytes_salida'] = os.path.getsize(ruta_html)
+        
+        if args.sqlite:
+            # La base tiene que quedar cerrada antes de borrar la carpeta temporal
+            biblioteca.cerrar()
+    finally:
+        if memoria:
+            tracemalloc.stop()
+    
+    return resultados
+
+def version_actual():
+    """Commit actual del repositorio, para comparar resultados entre versiones"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+def crear_parser():
+    """Argumentos del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Mide la carga y los reportes de la Biblioteca Digital con datos sintéticos de varios tamaños."
+    )
+    parser.add_argument("--tamanos", default="10000,100000",
+                        help="cantidades de préstamos separadas por coma (por defecto 10000,100000)")
+    parser.add_argument("--acentos", type=float, default=0.7, help="proporción de nombres con tildes y eñes")
+    parser.add_argument("--vencidos", type=float, default=0.2, help="proporción de préstamos vencidos")
+    parser.add_argument("--invalidas", type=float, default=0.01, help="proporción de líneas con errores")
+    parser.add_argument("--semilla", type=int, default=2025, help="semilla de los datos generados")
+    parser.add_argument("--operaciones", help="reportes a medir separados por coma (por defecto todos)")
+    parser.add_argument("--sqlite", action="store_true", help="medir el almacenamiento SQLite en lugar de memoria")
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="no seguir la memoria con tracemalloc (tiempos sin su sobrecosto)")
+    parser.add_argument("--version", default=None, help="etiqueta de la versión medida (por defecto el commit)")
+    parser.add_argument("--datos", metavar="CARPETA",
+                        help="carpeta donde dejar los datos generados (por defecto una temporal)")
+    parser.add_argument("--resultados", metavar="ARCHIVO",
+                        help="agregar los resultados a este archivo JSON Lines (por defecto a la salida estándar)")
+    return parser
+
+def main(argv=None):
+    """Corre el benchmark para cada tamaño y escribe una línea JSON por operación medida"""
+    args = crear_parser().parse_args(argv)
+    args.version = args.version or version_actual()
+    args.operaciones = [o.strip() for o in args.operaciones.split(",")] if args.operaciones else []
+    
+    validas = [operacion for operacion, _ in REPORTES]
+    for operacion in args.operaciones:
+        if operacion not in validas:
+            print(f"Error: Operación desconocida '{operacion}'", file=sys.stderr)
+            return 2
+    
+    try:
+        tamanos = [int(t) for t in args.tamanos.split(",") if t.strip()]
+    except ValueError:
+        print(f"Error: Tamaños inválidos '{args.tamanos}'", file=sys.stderr)
+        return 2
+    
+    # Se agrega al archivo para ir juntando las curvas de varias versiones
+    salida = open(args.resultados, 'a', encoding='utf-8') if args.resultados else sys.stdout
+    try:
+        for prestamos in tamanos:
+            if args.datos:
+                carpeta = os.path.join(args.datos, str(prestamos))
+                os.makedirs(carpeta, exist_ok=True)
+                resultados = ejecutar_escala(prestamos, args, carpeta)
+            else:
+                with tempfile.TemporaryDirectory() as carpeta:
+                    resultados = ejecutar_escala(prestamos, args, carpeta)
+            
+            for resultado in resultados:
+                salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            salida.flush()
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
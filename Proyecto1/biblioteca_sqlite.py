@@ -0,0 +1,364 @@
+import sqlite3
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+
+from Biblioteca_dig import (LIMITE_EJEMPLOS_DUPLICADOS, POSICIONES_RANKING_MENSUAL, BibliotecaDigital, Libro,
+                           Prestamo, Usuario, en_cache)
+from indices import barrer_periodos
+
+TAMANO_LOTE = 10000  # registros por cada executemany
+
+# Los préstamos guardan solo los IDs: nombre y título se toman del catálogo al consultar,
+# igual que TablaPrestamos en memoria guarda referencias al Usuario y al Libro
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id_usuario TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS libros (
+    id_libro TEXT PRIMARY KEY,
+    titulo TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prestamos (
+    id INTEGER PRIMARY KEY,
+    id_usuario TEXT NOT NULL,
+    id_libro TEXT NOT NULL,
+    fecha_prestamo TEXT NOT NULL,
+    fecha_devolucion TEXT NOT NULL DEFAULT ''
+);
+-- Un préstamo se repite si coinciden usuario, libro y fecha: la base descarta la copia al insertar.
+-- El índice también sirve para buscar por usuario
+CREATE UNIQUE INDEX IF NOT EXISTS idx_prestamos_clave ON prestamos (id_usuario, id_libro, fecha_prestamo);
+CREATE INDEX IF NOT EXISTS idx_prestamos_libro ON prestamos (id_libro);
+CREATE INDEX IF NOT EXISTS idx_prestamos_devolucion ON prestamos (fecha_devolucion);
+CREATE INDEX IF NOT EXISTS idx_prestamos_fecha ON prestamos (fecha_prestamo);
+"""
+
+COLUMNAS_PRESTAMO = "id_usuario, id_libro, fecha_prestamo, fecha_devolucion"
+# Préstamos con el nombre y el título del catálogo, en el orden de los campos de Prestamo
+CONSULTA_PRESTAMOS = """
+    SELECT p.id_usuario, u.nombre, p.id_libro, l.titulo, p.fecha_prestamo, p.fecha_devolucion
+    FROM prestamos p JOIN usuarios u ON u.id_usuario = p.id_usuario JOIN libros l ON l.id_libro = p.id_libro
+"""
+# Fin del período de un préstamo: sin devolución sigue abierto y una devolución
+# anterior al préstamo se toma como del mismo día, igual que en memoria
+FIN_PERIODO = ("CASE WHEN fecha_devolucion = '' THEN '9999-12-31' "
+               "WHEN fecha_devolucion < fecha_prestamo THEN fecha_prestamo ELSE fecha_devolucion END")
+# Desempate de los rankings: los IDs son dígitos y se comparan como números, igual que en mas_frecuentes
+DESEMPATE_ID = "CAST({columna} AS INTEGER), {columna}"
+# Columna de ID en prestamos, tabla del catálogo y columna con el texto que se muestra
+COLUMNAS_RANKING = {'libros': ("id_libro", "libros", "titulo"), 'usuarios': ("id_usuario", "usuarios", "nombre")}
+
+class BibliotecaSQLite(BibliotecaDigital):
+    """Biblioteca que guarda catálogo y préstamos en una base SQLite local en lugar de memoria"""
+    
+    def __init__(self, ruta_db="biblioteca.db"):
+        super().__init__()
+        self.ruta_db = ruta_db
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(ESQUEMA)
+        self.usuarios_pendientes = []
+        self.libros_pendientes = []
+        self.prestamos_pendientes = []
+        self.lineas_pendientes = [] # línea del archivo de cada préstamo pendiente
+        
+        # El catálogo que ya estaba en la base también se puede buscar
+        for id_usuario, nombre in self.conexion.execute("SELECT id_usuario, nombre FROM usuarios"):
+            self.indexar_usuario(Usuario(id_usuario, nombre))
+        for id_libro, titulo in self.conexion.execute("SELECT id_libro, titulo FROM libros"):
+            self.indexar_libro(Libro(id_libro, titulo))
+    
+    def cerrar(self):
+        """Guarda lo pendiente y cierra la base de datos"""
+        self.finalizar_carga()
+        self.conexion.close()
+    
+    # --- Almacenamiento ---
+    
+    def existe_usuario(self, id_usuario):
+        """Indica si el usuario está en el catálogo"""
+        cursor = self.conexion.execute("SELECT 1 FROM usuarios WHERE id_usuario = ?", (id_usuario,))
+        return cursor.fetchone() is not None
+    
+    def existe_libro(self, id_libro):
+        """Indica si el libro está en el catálogo"""
+        cursor = self.conexion.execute("SELECT 1 FROM libros WHERE id_libro = ?", (id_libro,))
+        return cursor.fetchone() is not None
+    
+    def agregar_usuario(self, usuario):
+        """Acumula el usuario para insertarlo en lote"""
+        self.versiones['usuarios'] += 1
+        self.indexar_usuario(usuario)
+        self.usuarios_pendientes.append((usuario.id_usuario, usuario.nombre))
+        if len(self.usuarios_pendientes) >= TAMANO_LOTE:
+            self.vaciar_pendientes()
+    
+    def agregar_libro(self, libro):
+        """Acumula el libro para insertarlo en lote"""
+        self.versiones['libros'] += 1
+        self.indexar_libro(libro)
+        self.libros_pendientes.append((libro.id_libro, libro.titulo))
+        if len(self.libros_pendientes) >= TAMANO_LOTE:
+            self.vaciar_pendientes()
+    
+    def descartar_duplicado(self, linea_num, id_usuario, id_libro, fecha_prestamo):
+        """Los repetidos los descarta el índice único al insertar; aquí solo se anota la línea"""
+        self.lineas_pendientes.append(linea_num)
+        return False
+    
+    def agregar_prestamo(self, prestamo):
+        """Acumula el préstamo para insertarlo en lote"""
+        self.versiones['prestamos'] += 1
+        self.prestamos_pendientes.append((
+            prestamo.id_usuario, prestamo.id_libro, prestamo.fecha_prestamo, prestamo.fecha_devolucion
+        ))
+        if len(self.prestamos_pendientes) >= TAMANO_LOTE:
+            self.vaciar_pendientes()
+    
+    def vaciar_pendientes(self):
+        """Inserta los lotes acumulados con executemany"""
+        if self.usuarios_pendientes:
+            self.conexion.executemany("INSERT OR REPLACE INTO usuarios VALUES (?, ?)", self.usuarios_pendientes)
+            self.usuarios_pendientes = []
+        if self.libros_pendientes:
+            self.conexion.executemany("INSERT OR REPLACE INTO libros VALUES (?, ?)", self.libros_pendientes)
+            self.libros_pendientes = []
+        if self.prestamos_pendientes:
+            ultimo_id = self.conexion.execute("SELECT IFNULL(MAX(id), 0) FROM prestamos").fetchone()[0]
+            cursor = self.conexion.executemany(
+                f"INSERT OR IGNORE INTO prestamos ({COLUMNAS_PRESTAMO}) VALUES (?, ?, ?, ?)",
+                self.prestamos_pendientes
+            )
+            # rowcount suma las filas insertadas: el resto eran duplicados
+            repetidos = len(self.prestamos_pendientes) - cursor.rowcount
+            self.total_duplicados += repetidos
+            if repetidos and len(self.duplicados) < LIMITE_EJEMPLOS_DUPLICADOS:
+                self.buscar_ejemplos_duplicados(ultimo_id)
+            self.prestamos_pendientes = []
+            self.lineas_pendientes = []
+    
+    def buscar_ejemplos_duplicados(self, ultimo_id):
+        """Encuentra qué préstamos del lote se descartaron comparándolos con los insertados después de ultimo_id"""
+        # Las filas insertadas reciben IDs crecientes en el orden del lote, así que un
+        # préstamo pendiente que no coincide con la siguiente fila insertada fue descartado
+        insertados = self.conexion.execute(
+            "SELECT id_usuario, id_libro, fecha_prestamo FROM prestamos WHERE id > ? ORDER BY id", (ultimo_id,)
+        )
+        siguiente = next(insertados, None)
+        for linea_num, fila in zip(self.lineas_pendientes, self.prestamos_pendientes):
+            if fila[:3] == siguiente:
+                siguiente = next(insertados, None)
+            else:
+                self.guardar_ejemplo_duplicado(linea_num, *fila[:3])
+    
+    def finalizar_carga(self):
+        """Inserta lo pendiente y confirma la transacción de la carga"""
+        self.vaciar_pendientes()
+        self.conexion.commit()
+    
+    def guardar_prestamos(self, prestamos):
+        """Como en memoria, sin contar los repetidos que el índice único descartó al insertar"""
+        duplicados_previos = self.total_duplicados
+        prestamos_cargados = super().guardar_prestamos(prestamos)
+        return prestamos_cargados - (self.total_duplicados - duplicados_previos)
+    
+    # --- Consultas para los reportes ---
+    
+    def hay_prestamos(self):
+        """Indica si hay préstamos registrados"""
+        return self.conexion.execute("SELECT 1 FROM prestamos LIMIT 1").fetchone() is not None
+    
+    def iterar_prestamos(self):
+        """Recorre los préstamos en orden de carga sin traerlos todos a memoria"""
+        cursor = self.conexion.execute(f"{CONSULTA_PRESTAMOS} ORDER BY p.id")
+        for fila in cursor:
+            yield Prestamo(*fila)
+    
+    def iterar_filas_prestamos(self):
+        """Las filas del cursor ya son las tuplas que piden las exportaciones"""
+        return self.conexion.execute(f"{CONSULTA_PRESTAMOS} ORDER BY p.id")
+    
+    def obtener_usuarios_unicos(self):
+        """Pares (ID, nombre) de los usuarios con préstamos, en orden de aparición"""
+        return self.conexion.execute("""
+            SELECT p.id_usuario, u.nombre FROM prestamos p JOIN usuarios u ON u.id_usuario = p.id_usuario
+            WHERE p.id IN (SELECT MIN(id) FROM prestamos GROUP BY id_usuario)
+            ORDER BY p.id
+        """)
+    
+    def obtener_libros_prestados(self):
+        """Pares (ID, título) de los libros prestados, en orden de aparición"""
+        return self.conexion.execute("""
+            SELECT p.id_libro, l.titulo FROM prestamos p JOIN libros l ON l.id_libro = p.id_libro
+            WHERE p.id IN (SELECT MIN(id) FROM prestamos GROUP BY id_libro)
+            ORDER BY p.id
+        """)
+    
+    # Las agregaciones recorren toda la tabla y su resultado es chico: se guardan en el caché.
+    # Los listados y los vencidos se siguen leyendo del cursor para no cargarlos en memoria
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def calcular_estadisticas(self):
+        """Calcula las estadísticas con consultas de agregación sobre los índices"""
+        total_prestamos, total_usuarios = self.conexion.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT id_usuario) FROM prestamos"
+        ).fetchone()
+        
+        # En caso de empate gana el que apareció primero (menor id)
+        fila_libro = self.conexion.execute("""
+            SELECT l.titulo, t.cantidad FROM (
+                SELECT id_libro, COUNT(*) AS cantidad, MIN(id) AS primero FROM prestamos
+                GROUP BY id_libro ORDER BY cantidad DESC, primero LIMIT 1
+            ) t JOIN libros l ON l.id_libro = t.id_libro
+        """).fetchone()
+        fila_usuario = self.conexion.execute("""
+            SELECT u.nombre, t.cantidad FROM (
+                SELECT id_usuario, COUNT(*) AS cantidad, MIN(id) AS primero FROM prestamos
+                GROUP BY id_usuario ORDER BY cantidad DESC, primero LIMIT 1
+            ) t JOIN usuarios u ON u.id_usuario = t.id_usuario
+        """).fetchone()
+        
+        libro_mas_prestado, max_prestamos = fila_libro if fila_libro else ("", 0)
+        usuario_mas_activo, max_actividad = fila_usuario if fila_usuario else ("", 0)
+        
+        return {
+            'total_prestamos': total_prestamos,
+            'total_usuarios': total_usuarios,
+            'libro_mas_prestado': libro_mas_prestado,
+            'max_prestamos': max_prestamos,
+            'usuario_mas_activo': usuario_mas_activo,
+            'max_actividad': max_actividad,
+        }
+    
+    def obtener_prestamos_vencidos(self, fecha_actual):
+        """Préstamos vencidos usando el índice sobre fecha_devolucion"""
+        # La cadena vacía (no devuelto) es menor que cualquier fecha, así que
+        # un solo rango del índice cubre los dos casos
+        cursor = self.conexion.execute(
+            f"{CONSULTA_PRESTAMOS} WHERE p.fecha_devolucion < ? AND p.fecha_prestamo <= ? ORDER BY p.id",
+            (fecha_actual, fecha_actual)
+        )
+        for fila in cursor:
+            yield Prestamo(*fila)
+    
+    def obtener_prestamos_por_vencer(self, fecha_actual, dias):
+        """Préstamos que vencen en los próximos días, por rango sobre el índice de devolución"""
+        fecha_limite = date.fromordinal(date.fromisoformat(fecha_actual).toordinal() + dias).isoformat()
+        cursor = self.conexion.execute(
+            f"{CONSULTA_PRESTAMOS} WHERE p.fecha_devolucion BETWEEN ? AND ? ORDER BY p.id",
+            (fecha_actual, fecha_limite)
+        )
+        return [Prestamo(*fila) for fila in cursor]
+    
+    def obtener_prestamos_abiertos(self, fecha, id_usuario=None):
+        """Préstamos sin devolver al final del día, por rango sobre el índice de fecha de préstamo"""
+        # La devolución '' (no devuelto) y las posteriores a la fecha cuentan como abiertas
+        condicion = "p.fecha_prestamo <= ? AND (p.fecha_devolucion = '' OR p.fecha_devolucion > ?)"
+        parametros = (fecha, fecha)
+        if id_usuario is not None:
+            condicion += " AND p.id_usuario = ?"
+            parametros += (id_usuario,)
+        cursor = self.conexion.execute(
+            f"{CONSULTA_PRESTAMOS} WHERE {condicion} ORDER BY p.id", parametros
+        )
+        return [Prestamo(*fila) for fila in cursor]
+    
+    def obtener_prestamos_por_usuario(self, fecha):
+        """Préstamos abiertos a la fecha agrupados por usuario, de más a menos"""
+        # En empate queda primero el usuario del préstamo abierto más antiguo (menor id)
+        return self.conexion.execute("""
+            SELECT t.id_usuario, u.nombre, t.cantidad FROM (
+                SELECT id_usuario, COUNT(*) AS cantidad, MIN(id) AS primero FROM prestamos
+                WHERE fecha_prestamo <= ? AND (fecha_devolucion = '' OR fecha_devolucion > ?)
+                GROUP BY id_usuario
+            ) t JOIN usuarios u ON u.id_usuario = t.id_usuario
+            ORDER BY t.cantidad DESC, t.primero
+        """, (fecha, fecha)).fetchall()
+    
+    def obtener_prestamos_simultaneos(self, id_libro, fecha):
+        """Préstamos del libro sin devolver al final de la fecha, contados sobre el índice de libro"""
+        return self.conexion.execute(
+            "SELECT COUNT(*) FROM prestamos WHERE id_libro = ? AND fecha_prestamo <= ? "
+            "AND (fecha_devolucion = '' OR fecha_devolucion > ?)", (id_libro, fecha, fecha)
+        ).fetchone()[0]
+    
+    def obtener_superpuestos_libro(self, id_libro):
+        """Barrido sobre los préstamos del libro ordenados por fecha; las fechas ISO se comparan como texto"""
+        cursor = self.conexion.execute(
+            f"SELECT fecha_prestamo, {FIN_PERIODO}, id FROM prestamos WHERE id_libro = ? ORDER BY fecha_prestamo, id",
+            (id_libro,)
+        )
+        _, _, superpuestos = barrer_periodos(cursor)
+        if not superpuestos:
+            return []
+        
+        ids = {id_prestamo for fila in superpuestos for id_prestamo in fila[:2]}
+        marcadores = ", ".join("?" * len(ids))
+        consulta = CONSULTA_PRESTAMOS.replace("SELECT", "SELECT p.id,", 1)
+        prestamos = {fila[0]: Prestamo(*fila[1:]) for fila in self.conexion.execute(
+            f"{consulta} WHERE p.id IN ({marcadores})", tuple(ids)
+        )}
+        return [(prestamos[id_prestamo], prestamos[id_en_curso], cantidad)
+                for id_prestamo, id_en_curso, cantidad in superpuestos]
+    
+    @en_cache('libros', 'prestamos')
+    def obtener_uso_libros(self):
+        """Un solo recorrido ordenado por libro y fecha, con un barrido por libro"""
+        cursor = self.conexion.execute(f"""
+            SELECT p.id_libro, p.fecha_prestamo, {FIN_PERIODO}, p.id, l.titulo
+            FROM prestamos p JOIN libros l ON l.id_libro = p.id_libro
+            ORDER BY p.id_libro, p.fecha_prestamo, p.id
+        """)
+        uso = []
+        for id_libro, filas in groupby(cursor, key=itemgetter(0)):
+            filas = list(filas)
+            primero = min(filas, key=itemgetter(3))
+            pico, fecha_pico, superpuestos = barrer_periodos(fila[1:4] for fila in filas)
+            uso.append((primero[3], (id_libro, primero[4], len(filas), pico, fecha_pico or "", len(superpuestos))))
+        
+        # De mayor pico a menor; en empate queda primero el libro que apareció antes
+        uso.sort(key=lambda par: (-par[1][3], par[0]))
+        return [fila for _, fila in uso]
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def obtener_mas_prestados(self, tipo='libros', k=10, desde=None, hasta=None):
+        """Top-K con GROUP BY sobre el rango del índice de fecha de préstamo"""
+        columna_id, tabla, columna_texto = COLUMNAS_RANKING[tipo]
+        condicion, parametros = "", ()
+        if desde is not None or hasta is not None:
+            condicion = "WHERE fecha_prestamo BETWEEN ? AND ?"
+            parametros = (desde or "", hasta or "9999-12-31")
+        
+        # En caso de empate va primero el ID menor, como en mas_frecuentes
+        return self.conexion.execute(f"""
+            SELECT t.clave, c.{columna_texto}, t.cantidad FROM (
+                SELECT {columna_id} AS clave, COUNT(*) AS cantidad FROM prestamos {condicion}
+                GROUP BY {columna_id} ORDER BY cantidad DESC, {DESEMPATE_ID.format(columna='clave')} LIMIT ?
+            ) t JOIN {tabla} c ON c.{columna_id} = t.clave
+            ORDER BY t.cantidad DESC, {DESEMPATE_ID.format(columna='t.clave')}
+        """, parametros + (k,)).fetchall()
+    
+    def top_mensual(self, tipo, k):
+        """Diccionario 'YYYY-MM' -> top-K del mes, numerando los puestos con una función de ventana"""
+        columna_id, tabla, columna_texto = COLUMNAS_RANKING[tipo]
+        cursor = self.conexion.execute(f"""
+            SELECT t.mes, t.clave, c.{columna_texto}, t.cantidad FROM (
+                SELECT substr(fecha_prestamo, 1, 7) AS mes, {columna_id} AS clave, COUNT(*) AS cantidad,
+                       ROW_NUMBER() OVER (PARTITION BY substr(fecha_prestamo, 1, 7)
+                                          ORDER BY COUNT(*) DESC, {DESEMPATE_ID.format(columna=columna_id)}) AS puesto
+                FROM prestamos GROUP BY mes, {columna_id}
+            ) t JOIN {tabla} c ON c.{columna_id} = t.clave
+            WHERE t.puesto <= ?
+            ORDER BY t.mes, t.puesto
+        """, (k,))
+        return {mes: [fila[1:] for fila in filas] for mes, filas in groupby(cursor, key=itemgetter(0))}
+    
+    @en_cache('usuarios', 'libros', 'prestamos')
+    def obtener_ranking_mensual(self, k=POSICIONES_RANKING_MENSUAL):
+        """Por cada mes con préstamos: ('YYYY-MM', top-K de libros, top-K de usuarios)"""
+        libros = self.top_mensual('libros', k)
+        usuarios = self.top_mensual('usuarios', k)
+        return [(mes, libros[mes], usuarios.get(mes, [])) for mes in libros]
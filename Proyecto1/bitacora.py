@@ -0,0 +1,92 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+MASCARA_FILA = 0xFFFFFFFF
+DEVOLUCION = 1 << 32            # bit de tipo: en un mismo día las devoluciones van después de los préstamos
+INTERVALO_INSTANTANEAS = 4096   # eventos mínimos entre dos instantáneas
+
+class BitacoraPrestamos:
+    """Préstamos y devoluciones como eventos ordenados por fecha, con instantáneas de los préstamos abiertos"""
+    
+    def __init__(self, intervalo=INTERVALO_INSTANTANEAS):
+        self.intervalo = intervalo
+        # Cada evento empaqueta (ordinal << 33) | tipo | fila: el orden de las claves es el de los eventos
+        self.eventos = array('q')
+        self.pendientes = array('q')
+        self.posiciones = []    # cantidad de eventos ya aplicados en cada instantánea
+        self.instantaneas = []  # filas abiertas (ordenadas) después de aplicar esos eventos
+    
+    def __len__(self):
+        return len(self.eventos) + len(self.pendientes)
+    
+    def agregar(self, fila, ordinal_prestamo, ordinal_devolucion):
+        """Registra el préstamo y, si tiene fecha, su devolución; ordinal_devolucion es None si no la tiene"""
+        self.pendientes.append((ordinal_prestamo << 33) | fila)
+        if ordinal_devolucion is not None:
+            # Una devolución anterior al préstamo se toma como del mismo día
+            self.pendientes.append((max(ordinal_devolucion, ordinal_prestamo) << 33) | DEVOLUCION | fila)
+    
+    def ordenar(self):
+        """Incorpora los pendientes y rehace solo las instantáneas posteriores al primer evento nuevo"""
+        if not self.pendientes:
+            return
+        
+        nuevos = sorted(self.pendientes)
+        self.pendientes = array('q')
+        
+        # Las instantáneas que no incluyen eventos posteriores al primero nuevo siguen valiendo
+        corte = bisect_left(self.eventos, nuevos[0])
+        validas = bisect_right(self.posiciones, corte)
+        del self.posiciones[validas:]
+        del self.instantaneas[validas:]
+        
+        if corte == len(self.eventos):
+            # Lo habitual: los préstamos nuevos son posteriores a todo lo cargado
+            self.eventos.extend(nuevos)
+        else:
+            self.eventos = array('q', sorted(chain(self.eventos, nuevos)))
+        self.tomar_instantaneas()
+    
+    def tomar_instantaneas(self):
+        """Recorre los eventos desde la última instantánea y guarda nuevas a medida que avanza"""
+        if self.posiciones:
+            inicio = self.posiciones[-1]
+            abiertas = set(self.instantaneas[-1])
+        else:
+            inicio = 0
+            abiertas = set()
+        
+        # Entre dos instantáneas hay al menos tantos eventos como filas guarda la nueva,
+        # así todas juntas nunca ocupan más que la bitácora y repetir desde una es barato
+        siguiente = inicio + max(self.intervalo, len(abiertas))
+        for posicion, clave in enumerate(self.eventos[inicio:], inicio + 1):
+            if clave & DEVOLUCION:
+                abiertas.discard(clave & MASCARA_FILA)
+            else:
+                abiertas.add(clave & MASCARA_FILA)
+            if posicion >= siguiente:
+                self.posiciones.append(posicion)
+                self.instantaneas.append(array('i', sorted(abiertas)))
+                siguiente = posicion + max(self.intervalo, len(abiertas))
+    
+    def abiertos(self, ordinal_fecha):
+        """Filas prestadas hasta la fecha y sin devolver al final de ese día, en orden"""
+        self.ordenar()
+        limite = bisect_left(self.eventos, (ordinal_fecha + 1) << 33)
+        
+        # Se repite solo desde la instantánea más cercana anterior a la fecha
+        i = bisect_right(self.posiciones, limite) - 1
+        if i >= 0:
+            inicio = self.posiciones[i]
+            abiertas = set(self.instantaneas[i])
+        else:
+            inicio = 0
+            abiertas = set()
+        
+        for clave in self.eventos[inicio:limite]:
+            if clave & DEVOLUCION:
+                abiertas.discard(clave & MASCARA_FILA)
+            else:
+                abiertas.add(clave & MASCARA_FILA)
+        return sorted(abiertas)
@@ -0,0 +1,331 @@
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from hashlib import blake2b
+from itertools import chain
+
+MASCARA_FILA = 0xFFFFFFFF  # 32 bits bajos de cada clave: número de fila
+
+class IndiceVencimientos:
+    """Índice de préstamos ordenado por fecha de devolución (en ordinales) para consultas con bisect"""
+    
+    def __init__(self):
+        # Cada clave empaqueta (ordinal << 32) | fila en un entero de 64 bits,
+        # así el orden de las claves es el orden por fecha y luego por fila
+        self.claves = array('q')            # préstamos con devolución, por fecha de devolución
+        self.claves_sin_fecha = array('q')  # préstamos sin devolución, por fecha de préstamo
+        self.inicios = array('i')           # ordinal de la fecha de préstamo de cada fila
+        # Lo agregado desde la última consulta se ordena una sola vez
+        self.pendientes = array('q')
+        self.pendientes_sin_fecha = array('q')
+    
+    def __len__(self):
+        return len(self.inicios)
+    
+    def agregar(self, fila, ordinal_prestamo, ordinal_devolucion):
+        """Registra un préstamo (las filas llegan en orden); ordinal_devolucion es None si no tiene fecha"""
+        self.inicios.append(ordinal_prestamo)
+        if ordinal_devolucion is None:
+            self.pendientes_sin_fecha.append((ordinal_prestamo << 32) | fila)
+        else:
+            self.pendientes.append((ordinal_devolucion << 32) | fila)
+    
+    def ordenar(self):
+        """Incorpora los pendientes a las claves ordenadas"""
+        if self.pendientes:
+            self.claves = array('q', sorted(chain(self.claves, self.pendientes)))
+            self.pendientes = array('q')
+        if self.pendientes_sin_fecha:
+            self.claves_sin_fecha = array('q', sorted(chain(self.claves_sin_fecha, self.pendientes_sin_fecha)))
+            self.pendientes_sin_fecha = array('q')
+    
+    def vencidos(self, ordinal_fecha):
+        """Filas vencidas a la fecha: prestadas hasta ese día y sin devolución o con devolución anterior"""
+        self.ordenar()
+        fin = bisect_right(self.claves_sin_fecha, (ordinal_fecha << 32) | MASCARA_FILA)
+        resultado = [clave & MASCARA_FILA for clave in self.claves_sin_fecha[:fin]]
+        
+        fin = bisect_left(self.claves, ordinal_fecha << 32)
+        inicios = self.inicios
+        for clave in self.claves[:fin]:
+            fila = clave & MASCARA_FILA
+            if inicios[fila] <= ordinal_fecha:
+                resultado.append(fila)
+        
+        resultado.sort()
+        return resultado
+    
+    def por_vencer(self, ordinal_fecha, dias):
+        """Filas cuya devolución cae entre la fecha y los siguientes `dias` días"""
+        self.ordenar()
+        inicio = bisect_left(self.claves, ordinal_fecha << 32)
+        fin = bisect_left(self.claves, (ordinal_fecha + dias + 1) << 32)
+        resultado = [clave & MASCARA_FILA for clave in self.claves[inicio:fin]]
+        resultado.sort()
+        return resultado
+
+SIN_FIN = 2**31 - 1  # fin del período de un préstamo sin devolución: sigue abierto
+
+def barrer_periodos(periodos):
+    """Barrido sobre (inicio, fin, fila) ordenados por inicio: (pico de simultáneos, inicio del pico, superpuestos)"""
+    # Cada período es [inicio, fin): el día de la devolución el libro ya está libre.
+    # Cada superpuesto es (fila, fila en curso que termina primero, simultáneos contando la nueva)
+    en_curso = []  # montículo de (fin, fila) de los préstamos abiertos
+    pico, inicio_pico, superpuestos = 0, None, []
+    for inicio, fin, fila in periodos:
+        if fin <= inicio:
+            continue  # prestado y devuelto el mismo día
+        while en_curso and en_curso[0][0] <= inicio:
+            heapq.heappop(en_curso)
+        if en_curso:
+            superpuestos.append((fila, en_curso[0][1], len(en_curso) + 1))
+        heapq.heappush(en_curso, (fin, fila))
+        if len(en_curso) > pico:
+            pico, inicio_pico = len(en_curso), inicio
+    return pico, inicio_pico, superpuestos
+
+class IndiceIntervalos:
+    """Períodos de préstamo de cada libro ordenados por inicio, para contar préstamos simultáneos sin comparar pares"""
+    
+    def __init__(self):
+        self.fines = array('i')    # fin del período de cada fila (ordinal de devolución o SIN_FIN)
+        self.inicios = {}          # ID de libro -> claves (inicio << 32) | fila
+        self.fines_por_libro = {}  # ID de libro -> fines de sus períodos
+        self.pendientes = set()    # libros con filas agregadas desde la última consulta
+    
+    def agregar(self, fila, id_libro, ordinal_prestamo, ordinal_devolucion):
+        """Registra el período de un préstamo (las filas llegan en orden); ordinal_devolucion es None si no tiene"""
+        # Una devolución anterior al préstamo se toma como del mismo día, igual que en la bitácora
+        fin = SIN_FIN if ordinal_devolucion is None else max(ordinal_devolucion, ordinal_prestamo)
+        self.fines.append(fin)
+        claves = self.inicios.get(id_libro)
+        if claves is None:
+            claves = self.inicios[id_libro] = array('q')
+            self.fines_por_libro[id_libro] = array('i')
+        claves.append((ordinal_prestamo << 32) | fila)
+        self.fines_por_libro[id_libro].append(fin)
+        self.pendientes.add(id_libro)
+    
+    def ordenar(self):
+        """Ordena solo los libros que recibieron préstamos nuevos"""
+        for id_libro in self.pendientes:
+            self.inicios[id_libro] = array('q', sorted(self.inicios[id_libro]))
+            self.fines_por_libro[id_libro] = array('i', sorted(self.fines_por_libro[id_libro]))
+        self.pendientes.clear()
+    
+    def simultaneos(self, id_libro, ordinal_fecha):
+        """Préstamos del libro abiertos al final del día: iniciados hasta la fecha menos terminados hasta la fecha"""
+        self.ordenar()
+        if id_libro not in self.inicios:
+            return 0
+        iniciados = bisect_right(self.inicios[id_libro], (ordinal_fecha << 32) | MASCARA_FILA)
+        return iniciados - bisect_right(self.fines_por_libro[id_libro], ordinal_fecha)
+    
+    def barrer(self, id_libro):
+        """Pico de préstamos simultáneos del libro, día en que empezó y préstamos superpuestos"""
+        self.ordenar()
+        fines = self.fines
+        return barrer_periodos(
+            (clave >> 32, fines[clave & MASCARA_FILA], clave & MASCARA_FILA) for clave in self.inicios.get(id_libro, ())
+        )
+
+# Pliegue de acentos para los caracteres que acepta validar_caracteres_texto
+TABLA_ACENTOS = str.maketrans("áéíóúÁÉÍÓÚñÑüÜ", "aeiouAEIOUnNuU")
+PATRON_TERMINO = re.compile(r"[a-z0-9]+")
+
+def normalizar(texto):
+    """Pasa el texto a minúsculas sin acentos (ñ -> n) para comparar"""
+    return texto.translate(TABLA_ACENTOS).lower()
+
+def separar_terminos(texto):
+    """Términos normalizados de un texto"""
+    return PATRON_TERMINO.findall(normalizar(texto))
+
+class IndiceTexto:
+    """Índice invertido de términos a IDs con búsqueda por prefijo y varios términos"""
+    
+    def __init__(self):
+        self.ocurrencias = {}        # término -> conjunto de IDs
+        self.textos = {}             # ID -> texto original
+        self.vocabulario = []        # términos ordenados para buscar por prefijo
+        self.vocabulario_al_dia = True
+    
+    def __len__(self):
+        return len(self.textos)
+    
+    def agregar(self, id_registro, texto):
+        """Indexa (o reindexa) el texto de un ID"""
+        anterior = self.textos.get(id_registro)
+        if anterior is not None:
+            for termino in set(separar_terminos(anterior)):
+                ids = self.ocurrencias[termino]
+                ids.discard(id_registro)
+                if not ids:
+                    del self.ocurrencias[termino]
+                    self.vocabulario_al_dia = False
+        
+        self.textos[id_registro] = texto
+        for termino in separar_terminos(texto):
+            ids = self.ocurrencias.get(termino)
+            if ids is None:
+                self.ocurrencias[termino] = {id_registro}
+                self.vocabulario_al_dia = False
+            else:
+                ids.add(id_registro)
+    
+    def ids_con_prefijo(self, prefijo):
+        """IDs que tienen algún término que empieza con el prefijo"""
+        if not self.vocabulario_al_dia:
+            self.vocabulario = sorted(self.ocurrencias)
+            self.vocabulario_al_dia = True
+        
+        inicio = bisect_left(self.vocabulario, prefijo)
+        fin = bisect_left(self.vocabulario, prefijo + "\uffff")
+        if fin - inicio == 1:
+            return self.ocurrencias[self.vocabulario[inicio]]
+        ids = set()
+        for termino in self.vocabulario[inicio:fin]:
+            ids |= self.ocurrencias[termino]
+        return ids
+    
+    def buscar(self, consulta):
+        """Pares (ID, texto) que contienen todos los términos de la consulta (como prefijos)"""
+        terminos = separar_terminos(consulta)
+        if not terminos:
+            return []
+        
+        # Se intersecta empezando por el conjunto más chico
+        conjuntos = sorted((self.ids_con_prefijo(termino) for termino in set(terminos)), key=len)
+        resultado = conjuntos[0].intersection(*conjuntos[1:])
+        
+        # Los IDs son numéricos: se ordenan por largo y luego por texto
+        return [(id_registro, self.textos[id_registro]) for id_registro in sorted(resultado, key=lambda i: (len(i), i))]
+
+LIMITE_FRECUENTES = 10000  # trigramas en más IDs que esto casi no distinguen candidatos
+CANDIDATOS = 50            # candidatos que se comparan de forma exacta
+
+def trigramas(texto):
+    """Conjunto de trigramas del texto normalizado, con relleno en los bordes"""
+    texto = "  " + normalizar(texto) + " "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class IndiceTrigramas:
+    """Índice de trigramas para encontrar el texto más parecido sin comparar contra todo el catálogo"""
+    
+    def __init__(self):
+        self.ocurrencias = {}  # trigrama -> conjunto de IDs
+        self.textos = {}       # ID -> texto original
+    
+    def __len__(self):
+        return len(self.textos)
+    
+    def agregar(self, id_registro, texto):
+        """Indexa (o reindexa) el texto de un ID"""
+        anterior = self.textos.get(id_registro)
+        if anterior is not None:
+            for trigrama in trigramas(anterior):
+                ids = self.ocurrencias[trigrama]
+                ids.discard(id_registro)
+                if not ids:
+                    del self.ocurrencias[trigrama]
+        
+        self.textos[id_registro] = texto
+        for trigrama in trigramas(texto):
+            ids = self.ocurrencias.get(trigrama)
+            if ids is None:
+                self.ocurrencias[trigrama] = {id_registro}
+            else:
+                ids.add(id_registro)
+    
+    def mas_parecido(self, texto, similitud_minima=0.3):
+        """Devuelve (ID, texto, similitud) del texto indexado más parecido, o None"""
+        buscados = trigramas(texto)
+        listas = sorted((self.ocurrencias[t] for t in buscados if t in self.ocurrencias), key=len)
+        if not listas:
+            return None
+        
+        # Se cuentan trigramas compartidos empezando por los más raros
+        compartidos = Counter()
+        for i, ids in enumerate(listas):
+            if i > 0 and len(ids) > LIMITE_FRECUENTES:
+                break
+            compartidos.update(ids)
+        
+        # Coeficiente de Dice exacto solo para los mejores candidatos
+        mejor = None
+        for id_registro, _ in compartidos.most_common(CANDIDATOS):
+            candidato = self.textos[id_registro]
+            propios = trigramas(candidato)
+            similitud = 2 * len(buscados & propios) / (len(buscados) + len(propios))
+            if similitud >= similitud_minima and (mejor is None or similitud > mejor[2]):
+                mejor = (id_registro, candidato, similitud)
+        return mejor
+
+MINIMO_PENDIENTES = 4096  # huellas que se juntan antes de pasarlas al arreglo ordenado
+FRACCION_PENDIENTES = 16  # los pendientes se pasan al llegar a 1/16 de las huellas ordenadas
+
+class FiltroDuplicados:
+    """Detecta préstamos repetidos por una huella de (id_usuario, id_libro, fecha_prestamo)"""
+    
+    def __init__(self, capacidad_bloom=0, tasa_falsos=0.001):
+        # Sin capacidad las huellas de 64 bits (exactas salvo colisiones) van en un array('Q')
+        # ordenado, 8 bytes por préstamo, más un conjunto de pendientes de hasta 1/16 de ellas
+        # a unos 60 bytes cada una: en total unos 12 bytes por préstamo. Con capacidad se usa
+        # un filtro de Bloom de tamaño fijo, unos 1,8 bytes por préstamo previsto con la tasa
+        # por defecto, que puede marcar como repetido un préstamo nuevo con probabilidad
+        # cercana a tasa_falsos
+        self.capacidad_bloom = capacidad_bloom
+        if capacidad_bloom:
+            self.bits = max(8, int(-capacidad_bloom * math.log(tasa_falsos) / math.log(2) ** 2))
+            self.funciones = max(1, round(self.bits / capacidad_bloom * math.log(2)))
+            self.arreglo = bytearray((self.bits + 7) // 8)
+            self.huellas = None
+        else:
+            self.huellas = array('Q')
+            self.pendientes = set()
+    
+    def repetido(self, id_usuario, id_libro, fecha_prestamo):
+        """Indica si la clave ya se había visto y la registra si es nueva"""
+        resumen = blake2b(f"{id_usuario},{id_libro},{fecha_prestamo}".encode('utf-8'), digest_size=16).digest()
+        
+        if self.huellas is not None:
+            huella = int.from_bytes(resumen[:8], 'little')
+            if huella in self.pendientes:
+                return True
+            posicion = bisect_left(self.huellas, huella)
+            if posicion < len(self.huellas) and self.huellas[posicion] == huella:
+                return True
+            self.pendientes.add(huella)
+            if len(self.pendientes) >= max(MINIMO_PENDIENTES, len(self.huellas) // FRACCION_PENDIENTES):
+                self.ordenar()
+            return False
+        
+        # Doble hash: las k posiciones salen de dos mitades del mismo resumen
+        h1 = int.from_bytes(resumen[:8], 'little')
+        h2 = int.from_bytes(resumen[8:], 'little') | 1
+        nuevo = False
+        for i in range(self.funciones):
+            bit = (h1 + i * h2) % self.bits
+            mascara = 1 << (bit & 7)
+            if not self.arreglo[bit >> 3] & mascara:
+                self.arreglo[bit >> 3] |= mascara
+                nuevo = True
+        return not nuevo
+    
+    def ordenar(self):
+        """Intercala los pendientes en las huellas ordenadas copiando tramos del arreglo"""
+        # Se copian tramos en lugar de ordenar todo con sorted(), que armaría una lista
+        # de enteros del tamaño del arreglo y gastaría más memoria de la que se ahorra
+        huellas = array('Q')
+        anterior = 0
+        for huella in sorted(self.pendientes):
+            posicion = bisect_left(self.huellas, huella, anterior)
+            huellas += self.huellas[anterior:posicion]
+            huellas.append(huella)
+            anterior = posicion
+        huellas += self.huellas[anterior:]
+        self.huellas = huellas
+        self.pendientes = set()
@@ -0,0 +1,57 @@
+import re
+
+# Tabla de la gramática de un registro .lfa (en el estilo de tokens_def del analizador
+# léxico de Proyecto 2): cada campo con su expresión, la clase de error y el mensaje si no la cumple
+ID = r"[0-9]+"
+TEXTO = r"[A-Za-z0-9 áéíóúÁÉÍÓÚñÑ.;:\-_()]*"
+TEXTO_SIN_BORDES = r"(?:[A-Za-z0-9 áéíóúÁÉÍÓÚñÑ.;:\-_()]*[A-Za-z0-9áéíóúÁÉÍÓÚñÑ.;:\-_()])?"
+FECHA = r"[0-9]{4}-[0-9]{2}-[0-9]{2}"
+FECHA_OPCIONAL = r"(?:" + FECHA + r")?"
+SEPARADOR = r"[ \t]*,[ \t]*"
+
+CAMPOS_PRESTAMO = (
+    ('id_usuario', ID, "ID inválido", "ID de usuario inválido '{valor}'"),
+    ('nombre_usuario', TEXTO, "Carácter inválido", "Carácter inválido '{caracter}' en nombre de usuario"),
+    ('id_libro', ID, "ID inválido", "ID de libro inválido '{valor}'"),
+    ('titulo_libro', TEXTO, "Carácter inválido", "Carácter inválido '{caracter}' en título de libro"),
+    ('fecha_prestamo', FECHA, "Fecha inválida", "Fecha de préstamo inválida '{valor}'"),
+    ('fecha_devolucion', FECHA_OPCIONAL, "Fecha inválida", "Fecha de devolución inválida '{valor}'"),
+)
+
+# Todo el registro en una sola expresión: si la línea (sin espacios en los bordes) la cumple,
+# los grupos ya son los campos sin espacios alrededor. Los textos no pueden terminar en
+# espacio, así los espacios antes de la coma quedan en el separador.
+PATRON_PRESTAMO = re.compile(SEPARADOR.join(
+    f"(?P<{nombre}>{TEXTO_SIN_BORDES if patron == TEXTO else patron})"
+    for nombre, patron, _, _ in CAMPOS_PRESTAMO
+))
+
+# Cada campo por separado, para ubicar el error cuando el registro no cumple el patrón
+PATRONES_CAMPO = tuple((re.compile(patron), clase, mensaje) for _, patron, clase, mensaje in CAMPOS_PRESTAMO)
+
+def separar_prestamo(linea):
+    """Campos de un registro válido en una sola pasada del autómata, o None si no cumple la gramática"""
+    registro = PATRON_PRESTAMO.fullmatch(linea)
+    return registro.groups() if registro else None
+
+def diagnosticar_prestamo(linea, columna_inicial=1):
+    """Revisa campo por campo un registro que no cumplió el patrón: (campos, None) o (None, (columna, clase, mensaje))"""
+    # Puede resultar válido, por ejemplo con espacios poco comunes alrededor de las comas
+    partes = linea.split(',')
+    if len(partes) != len(CAMPOS_PRESTAMO):
+        return None, (None, "Formato incorrecto", f"Se esperaban {len(CAMPOS_PRESTAMO)} campos, se encontraron {len(partes)}")
+    
+    campos = []
+    columna = columna_inicial
+    for parte, (patron, clase, mensaje) in zip(partes, PATRONES_CAMPO):
+        valor = parte.strip()
+        inicio = columna + len(parte) - len(parte.lstrip())
+        if patron.fullmatch(valor) is None:
+            # El error está donde termina el prefijo más largo que cumple la expresión del campo
+            valido = patron.match(valor)
+            fin = valido.end() if valido else 0
+            return None, (inicio + fin, clase, mensaje.format(valor=valor, caracter=valor[fin:fin + 1]))
+        campos.append(valor)
+        columna += len(parte) + 1
+    
+    return tuple(campos), None
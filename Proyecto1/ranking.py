@@ -0,0 +1,100 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date
+from itertools import chain
+
+MASCARA_FILA = 0xFFFFFFFF
+
+def mas_frecuentes(contador, k, id_de):
+    """Los k elementos con más cuenta; en empate va primero el de ID menor (id_de da el ID de cada elemento)"""
+    # El desempate no depende del orden en que se contó: un mes completo, una semana
+    # o un rango armado por filas dan el mismo orden. Los IDs son dígitos, se comparan como números
+    return heapq.nsmallest(k, contador.items(), key=lambda par: (-par[1], int(id_de(par[0])), id_de(par[0])))
+
+class RankingPrestamos:
+    """Conteos de préstamos precalculados por mes y por semana para rankings rápidos"""
+    
+    def __init__(self):
+        # Las claves de los contadores son los objetos Usuario/Libro del catálogo
+        self.libros_total = Counter()
+        self.usuarios_total = Counter()
+        self.libros_por_mes = {}        # (año, mes) -> Counter
+        self.usuarios_por_mes = {}
+        self.libros_por_semana = {}     # (año ISO, semana ISO) -> Counter
+        self.usuarios_por_semana = {}
+        self.periodos_por_dia = {}      # ordinal -> ((año, mes), (año ISO, semana ISO))
+        # (ordinal de préstamo << 32) | fila, para recortar rangos que no cubren meses completos
+        self.claves = array('q')
+        self.pendientes = array('q')
+    
+    def periodos(self, ordinal):
+        """Mes y semana ISO de un día, calculados una sola vez por día"""
+        periodo = self.periodos_por_dia.get(ordinal)
+        if periodo is None:
+            fecha = date.fromordinal(ordinal)
+            iso = fecha.isocalendar()
+            periodo = ((fecha.year, fecha.month), (iso[0], iso[1]))
+            self.periodos_por_dia[ordinal] = periodo
+        return periodo
+    
+    def agregar(self, fila, usuario, libro, ordinal_prestamo):
+        """Suma un préstamo a todos los contadores"""
+        mes, semana = self.periodos(ordinal_prestamo)
+        
+        self.libros_total[libro] += 1
+        self.usuarios_total[usuario] += 1
+        
+        contador = self.libros_por_mes.get(mes)
+        if contador is None:
+            contador = self.libros_por_mes[mes] = Counter()
+            self.usuarios_por_mes[mes] = Counter()
+        contador[libro] += 1
+        self.usuarios_por_mes[mes][usuario] += 1
+        
+        contador = self.libros_por_semana.get(semana)
+        if contador is None:
+            contador = self.libros_por_semana[semana] = Counter()
+            self.usuarios_por_semana[semana] = Counter()
+        contador[libro] += 1
+        self.usuarios_por_semana[semana][usuario] += 1
+        
+        self.pendientes.append((ordinal_prestamo << 32) | fila)
+    
+    def ordenar(self):
+        """Incorpora los préstamos pendientes al orden por fecha"""
+        if self.pendientes:
+            self.claves = array('q', sorted(chain(self.claves, self.pendientes)))
+            self.pendientes = array('q')
+    
+    def meses(self):
+        """Meses con préstamos, en orden"""
+        return sorted(self.libros_por_mes)
+    
+    def contar_rango(self, columna, contadores_por_mes, desde, hasta):
+        """Contador del rango [desde, hasta] (ordinales): meses completos precalculados y bordes por filas"""
+        resultado = Counter()
+        dia = desde
+        while dia <= hasta:
+            fecha = date.fromordinal(dia)
+            inicio_mes = date(fecha.year, fecha.month, 1).toordinal()
+            if fecha.month == 12:
+                fin_mes = date(fecha.year + 1, 1, 1).toordinal() - 1
+            else:
+                fin_mes = date(fecha.year, fecha.month + 1, 1).toordinal() - 1
+            
+            if dia == inicio_mes and fin_mes <= hasta:
+                # Mes completo: se usa el conteo ya hecho
+                contador = contadores_por_mes.get((fecha.year, fecha.month))
+                if contador:
+                    resultado.update(contador)
+            else:
+                # Parte de un mes: se cuentan solo las filas de esos días
+                self.ordenar()
+                inicio = bisect_left(self.claves, dia << 32)
+                fin = bisect_right(self.claves, (min(fin_mes, hasta) << 32) | MASCARA_FILA)
+                for clave in self.claves[inicio:fin]:
+                    resultado[columna[clave & MASCARA_FILA]] += 1
+            dia = fin_mes + 1
+        return resultado
@@ -0,0 +1,219 @@
+import io
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date, datetime
+
+from Biblioteca_dig import BibliotecaDigital, Libro, TablaPrestamos, Usuario, generar_salidas
+
+# Nombres de los archivos dentro de la carpeta de cada sucursal
+ARCHIVO_USUARIOS = "Usuarios.txt"
+ARCHIVO_LIBROS = "Libros.txt"
+ARCHIVO_PRESTAMOS = "Préstamos.txt"
+
+def cargar_sucursal(carpeta, fecha_actual, capacidad_bloom=0):
+    """Carga una sucursal en su propio proceso y devuelve solo sus agregados parciales"""
+    biblioteca = BibliotecaDigital(capacidad_bloom)
+    mensajes = io.StringIO()
+    
+    with redirect_stdout(mensajes):
+        correcto = (
+            biblioteca.cargar_usuarios(os.path.join(carpeta, ARCHIVO_USUARIOS)) is not None and
+            biblioteca.cargar_libros(os.path.join(carpeta, ARCHIVO_LIBROS)) is not None and
+            biblioteca.cargar_prestamos(os.path.join(carpeta, ARCHIVO_PRESTAMOS)) is not None
+        )
+    
+    # Se devuelven IDs y no objetos del catálogo: los conteos conservan el orden de aparición
+    ranking = biblioteca.ranking
+    prestamos = biblioteca.prestamos
+    return {
+        'sucursal': os.path.basename(os.path.normpath(carpeta)),
+        'correcto': correcto,
+        'mensajes': mensajes.getvalue(),
+        'usuarios': {usuario.id_usuario: usuario.nombre for usuario in ranking.usuarios_total},
+        'libros': {libro.id_libro: libro.titulo for libro in ranking.libros_total},
+        'usuarios_total': {usuario.id_usuario: cantidad for usuario, cantidad in ranking.usuarios_total.items()},
+        'libros_total': {libro.id_libro: cantidad for libro, cantidad in ranking.libros_total.items()},
+        'usuarios_por_mes': {mes: {usuario.id_usuario: cantidad for usuario, cantidad in contador.items()}
+                             for mes, contador in ranking.usuarios_por_mes.items()},
+        'libros_por_mes': {mes: {libro.id_libro: cantidad for libro, cantidad in contador.items()}
+                           for mes, contador in ranking.libros_por_mes.items()},
+        # Los vencidos viajan como IDs y ordinales (0 es sin devolución); los nombres los pone la red
+        'vencidos': [(prestamos.usuarios[fila].id_usuario, prestamos.libros[fila].id_libro,
+                      prestamos.ordinales_prestamo[fila], prestamos.ordinales_devolucion[fila])
+                     for fila in biblioteca.filas_vencidas(fecha_actual)],
+    }
+
+class RedSucursales(BibliotecaDigital):
+    """Reportes de toda la red armados al combinar los agregados parciales de cada sucursal"""
+    
+    def __init__(self, capacidad_bloom=0):
+        super().__init__(capacidad_bloom)
+        self.sucursales = []       # nombre de cada sucursal cargada, en orden
+        self.vencidos = TablaPrestamos() # préstamos vencidos de todas las sucursales, por columnas
+        self.fecha_vencidos = None # fecha con la que se calcularon los vencidos
+    
+    def cargar_sucursales(self, carpetas, procesos=None):
+        """Carga cada carpeta en un proceso aparte y combina los resultados; indica si todas cargaron bien"""
+        self.fecha_vencidos = datetime.now().strftime("%Y-%m-%d")
+        procesos = procesos or min(len(carpetas), os.cpu_count() or 1)
+        
+        correcto = True
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            parciales = ejecutor.map(cargar_sucursal, carpetas, [self.fecha_vencidos] * len(carpetas),
+                                     [self.filtro_duplicados.capacidad_bloom] * len(carpetas))
+            # map devuelve en el orden de las carpetas, así el resultado no depende de cuál termina antes
+            for parcial in parciales:
+                print(f"\n=== SUCURSAL {parcial['sucursal']} ===")
+                print(parcial['mensajes'], end="")
+                if not parcial['correcto']:
+                    print(f"Error: No se pudo cargar la sucursal '{parcial['sucursal']}'")
+                    correcto = False
+                    continue
+                self.combinar(parcial)
+        return correcto
+    
+    def combinar(self, parcial):
+        """Suma los agregados de una sucursal a los de la red"""
+        # Los IDs son de toda la red: un mismo usuario puede pedir libros en varias sucursales
+        for id_usuario, nombre in parcial['usuarios'].items():
+            if id_usuario not in self.usuarios:
+                self.usuarios[id_usuario] = Usuario(id_usuario, nombre)
+        for id_libro, titulo in parcial['libros'].items():
+            if id_libro not in self.libros:
+                self.libros[id_libro] = Libro(id_libro, titulo)
+        
+        ranking = self.ranking
+        ranking.usuarios_total.update({self.usuarios[i]: c for i, c in parcial['usuarios_total'].items()})
+        ranking.libros_total.update({self.libros[i]: c for i, c in parcial['libros_total'].items()})
+        for mes, conteos in parcial['usuarios_por_mes'].items():
+            ranking.usuarios_por_mes.setdefault(mes, Counter()).update({self.usuarios[i]: c for i, c in conteos.items()})
+        for mes, conteos in parcial['libros_por_mes'].items():
+            ranking.libros_por_mes.setdefault(mes, Counter()).update({self.libros[i]: c for i, c in conteos.items()})
+        
+        for id_usuario, id_libro, ordinal_prestamo, ordinal_devolucion in parcial['vencidos']:
+            self.vencidos.agregar(self.usuarios[id_usuario], self.libros[id_libro], ordinal_prestamo,
+                                  None if ordinal_devolucion == TablaPrestamos.SIN_FECHA else ordinal_devolucion)
+        self.sucursales.append(parcial['sucursal'])
+        for coleccion in self.versiones:
+            self.versiones[coleccion] += 1
+    
+    # --- Consultas para los reportes ---
+    # Lo que no viaja entre procesos se devuelve vacío sin avisar, para que los reportes
+    # por lotes y las exportaciones no se llenen de mensajes; los avisos quedan en mostrar_*
+    
+    def hay_prestamos(self):
+        """Indica si alguna sucursal tiene préstamos"""
+        return bool(self.ranking.usuarios_total)
+    
+    def iterar_prestamos(self):
+        """El historial completo no viaja entre procesos: se consulta en cada sucursal"""
+        return iter(())
+    
+    def iterar_filas_prestamos(self):
+        """Igual que iterar_prestamos: no hay filas de préstamos en la red"""
+        return self.iterar_prestamos()
+    
+    def obtener_usuarios_unicos(self):
+        """Pares (ID, nombre) de los usuarios con préstamos en alguna sucursal"""
+        return [(usuario.id_usuario, usuario.nombre) for usuario in self.ranking.usuarios_total]
+    
+    def obtener_libros_prestados(self):
+        """Pares (ID, título) de los libros prestados en alguna sucursal"""
+        return [(libro.id_libro, libro.titulo) for libro in self.ranking.libros_total]
+    
+    def obtener_prestamos_vencidos(self, fecha_actual):
+        """Vencidos de cada sucursal, calculados al cargar con la fecha de ese momento"""
+        return list(self.vencidos)
+    
+    def obtener_prestamos_por_vencer(self, fecha_actual, dias):
+        """No se guardan fechas por préstamo, así que no hay consulta por vencer en la red"""
+        return []
+    
+    def obtener_prestamos_abiertos(self, fecha, id_usuario=None):
+        """Sin fechas por préstamo tampoco se puede reconstruir lo prestado a una fecha"""
+        return []
+    
+    def obtener_prestamos_por_usuario(self, fecha):
+        """Igual que obtener_prestamos_abiertos: se consulta por sucursal"""
+        return []
+    
+    def obtener_prestamos_simultaneos(self, id_libro, fecha):
+        """Los períodos de préstamo quedan en cada sucursal"""
+        return 0
+    
+    def obtener_superpuestos_libro(self, id_libro):
+        """Igual que obtener_prestamos_simultaneos: se consulta por sucursal"""
+        return []
+    
+    def obtener_uso_libros(self):
+        """Sin períodos por préstamo no hay picos de uso en la red"""
+        return []
+    
+    def interpretar_periodo(self, texto):
+        """Como en una biblioteca, pero un rango que no es de meses completos es inválido: la red solo cuenta por mes"""
+        rango = super().interpretar_periodo(texto)
+        if rango is None or rango == (None, None):
+            return rango
+        return rango if self.meses_completos(*rango) else None
+    
+    def meses_completos(self, desde, hasta):
+        """Indica si el rango empieza el primer día de un mes y termina el último día de otro"""
+        inicio = date.fromisoformat(desde) if desde else None
+        fin = date.fromisoformat(hasta) if hasta else None
+        return not ((inicio and inicio.day != 1) or (fin and date.fromordinal(fin.toordinal() + 1).day != 1))
+    
+    def obtener_mas_prestados(self, tipo='libros', k=10, desde=None, hasta=None):
+        """Top-K de la red; solo hay conteos de todo el registro y de meses completos (si no, queda vacío)"""
+        if desde is None and hasta is None:
+            return super().obtener_mas_prestados(tipo, k)
+        if not self.meses_completos(desde, hasta):
+            return []
+        
+        inicio = date.fromisoformat(desde) if desde else None
+        fin = date.fromisoformat(hasta) if hasta else None
+        por_mes = self.ranking.libros_por_mes if tipo == 'libros' else self.ranking.usuarios_por_mes
+        contador = Counter()
+        for año, mes in self.ranking.meses():
+            if (inicio is None or (año, mes) >= (inicio.year, inicio.month)) and \
+                    (fin is None or (año, mes) <= (fin.year, fin.month)):
+                contador.update(por_mes[(año, mes)])
+        return self.top_contador(contador, tipo, k)
+    
+    # --- Reportes en consola ---
+    
+    def mostrar_historial_prestamos(self):
+        """El historial no está en la red: se indica dónde consultarlo"""
+        print("El historial de préstamos se consulta por sucursal.")
+    
+    def mostrar_prestamos_vencidos(self, fecha_actual=None):
+        """Muestra los vencidos de la red, avisando si la fecha no es la de la carga"""
+        if (fecha_actual or datetime.now().strftime("%Y-%m-%d")) != self.fecha_vencidos:
+            print(f"Aviso: Los vencidos son al {self.fecha_vencidos}, fecha en que se cargaron las sucursales.")
+        super().mostrar_prestamos_vencidos(fecha_actual)
+    
+    def mostrar_prestamos_por_vencer(self, dias=None):
+        """Los préstamos por vencer no están en la red: se indica dónde consultarlos"""
+        print("Los préstamos por vencer se consultan por sucursal.")
+    
+    def mostrar_prestamos_a_fecha(self, fecha, id_usuario=None):
+        """Lo prestado a una fecha no está en la red: se indica dónde consultarlo"""
+        print("Los préstamos a una fecha se consultan por sucursal.")
+    
+    def consultar_prestamos_a_fecha(self):
+        """Sin préstamos a una fecha en la red no se piden fecha ni usuario"""
+        self.mostrar_prestamos_a_fecha(None)
+    
+    def mostrar_prestamos_superpuestos(self, id_libro=None):
+        """Los préstamos simultáneos no están en la red: se indica dónde consultarlos"""
+        print("Los préstamos simultáneos se consultan por sucursal.")
+
+def ejecutar_red(args, reportes, formatos):
+    """Modo por lotes con varias sucursales: carga en paralelo y genera los reportes de la red"""
+    red = RedSucursales(args.bloom)
+    if not red.cargar_sucursales(args.sucursal):
+        return 1
+    
+    os.makedirs(args.salida, exist_ok=True)
+    return 0 if generar_salidas(red, os.path.join(args.salida, args.prefijo), reportes, formatos, args.gzip) else 1
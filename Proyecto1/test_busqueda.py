@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from Biblioteca_dig import BibliotecaDigital
+from biblioteca_sqlite import BibliotecaSQLite
+from indices import IndiceTexto
+
+USUARIOS = "1,José Núñez\n2,Ana Pérez\n10,Joaquín Ibáñez\n"
+LIBROS = "100,Cien Años de Soledad\n30,El Árbol de la Ciencia\n9,Canción de Hielo\n"
+
+class PruebaIndiceTexto(unittest.TestCase):
+    """Búsqueda por prefijo sin importar acentos ni mayúsculas, con varios términos"""
+    
+    def setUp(self):
+        self.indice = IndiceTexto()
+        for id_libro, titulo in (("100", "Cien Años de Soledad"), ("30", "El Árbol de la Ciencia"),
+                                 ("9", "Canción de Hielo")):
+            self.indice.agregar(id_libro, titulo)
+    
+    def ids(self, consulta):
+        return [id_registro for id_registro, _ in self.indice.buscar(consulta)]
+    
+    def test_prefijo_con_acento(self):
+        # La consulta y el texto se pliegan igual: "árb", "ARB" y "arb" encuentran "Árbol"
+        for consulta in ("árb", "ARB", "arb"):
+            with self.subTest(consulta=consulta):
+                self.assertEqual(self.ids(consulta), ["30"])
+        self.assertEqual(self.ids("cancion"), ["9"])
+        self.assertEqual(self.ids("AÑO"), ["100"])
+    
+    def test_varios_terminos(self):
+        # Cada término es un prefijo y deben estar todos; los IDs salen en orden numérico
+        self.assertEqual(self.ids("c"), ["9", "30", "100"])
+        self.assertEqual(self.ids("c de"), ["9", "30", "100"])
+        self.assertEqual(self.ids("cie sol"), ["100"])
+        self.assertEqual(self.ids("cie hielo"), [])
+        self.assertEqual(self.ids("  ,; "), [])
+    
+    def test_reindexar(self):
+        # Al cambiar el título los términos anteriores dejan de encontrarlo
+        self.indice.agregar("9", "Canto General")
+        self.assertEqual(self.ids("hielo"), [])
+        self.assertEqual(self.indice.buscar("cant"), [("9", "Canto General")])
+
+class PruebaBusquedaBiblioteca(unittest.TestCase):
+    """El catálogo cargado se puede buscar en memoria y, con SQLite, también al volver a abrir la base"""
+    
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.rutas = []
+        for nombre, contenido in (("Usuarios.txt", USUARIOS), ("Libros.txt", LIBROS)):
+            ruta = os.path.join(self.carpeta.name, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.rutas.append(ruta)
+    
+    def tearDown(self):
+        self.carpeta.cleanup()
+    
+    def cargar(self, biblioteca):
+        ruta_usuarios, ruta_libros = self.rutas
+        with redirect_stdout(io.StringIO()):
+            biblioteca.cargar_usuarios(ruta_usuarios)
+            biblioteca.cargar_libros(ruta_libros)
+        return biblioteca
+    
+    def revisar_busquedas(self, biblioteca):
+        self.assertEqual(biblioteca.buscar_usuarios("jo"), [("1", "José Núñez"), ("10", "Joaquín Ibáñez")])
+        self.assertEqual(biblioteca.buscar_usuarios("ibañ"), [("10", "Joaquín Ibáñez")])
+        self.assertEqual(biblioteca.buscar_libros("arbol cien"), [("30", "El Árbol de la Ciencia")])
+    
+    def test_memoria(self):
+        self.revisar_busquedas(self.cargar(BibliotecaDigital()))
+    
+    def test_sqlite(self):
+        ruta_db = os.path.join(self.carpeta.name, "biblioteca.db")
+        biblioteca = self.cargar(BibliotecaSQLite(ruta_db))
+        try:
+            self.revisar_busquedas(biblioteca)
+        finally:
+            biblioteca.cerrar()
+        
+        biblioteca = BibliotecaSQLite(ruta_db)
+        try:
+            self.revisar_busquedas(biblioteca)
+        finally:
+            biblioteca.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from Biblioteca_dig import VENTANA_VERIFICACION, BibliotecaDigital
+from biblioteca_sqlite import BibliotecaSQLite
+
+USUARIOS = "1,Ana Pérez\n2,Luis Gómez\n"
+LIBROS = "100,Cien Años\n30,Treinta\n"
+
+def linea_prestamo(dia, id_usuario="1"):
+    """Un préstamo válido del usuario con el día como parte de la fecha"""
+    nombre = "Ana Pérez" if id_usuario == "1" else "Luis Gómez"
+    return f"{id_usuario},{nombre},100,Cien Años,2024-{1 + dia // 28:02d}-{1 + dia % 28:02d},\n"
+
+class PruebaCargaIncremental(unittest.TestCase):
+    """La carga incremental lee solo líneas completas nuevas y detecta si lo ya leído cambió"""
+    
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.rutas = []
+        for nombre, contenido in (("Usuarios.txt", USUARIOS), ("Libros.txt", LIBROS)):
+            ruta = os.path.join(self.carpeta.name, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.rutas.append(ruta)
+        self.ruta_prestamos = os.path.join(self.carpeta.name, "Préstamos.lfa")
+        self.escribir("")
+    
+    def tearDown(self):
+        self.carpeta.cleanup()
+    
+    def escribir(self, texto, modo='w'):
+        with open(self.ruta_prestamos, modo, encoding='utf-8', newline='') as archivo:
+            archivo.write(texto)
+    
+    def cargar(self, biblioteca):
+        """Carga las líneas nuevas; devuelve (cantidad cargada o None, mensajes)"""
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            cantidad = biblioteca.cargar_prestamos_incremental(self.ruta_prestamos)
+        return cantidad, salida.getvalue()
+    
+    def nueva_biblioteca(self):
+        biblioteca = BibliotecaDigital()
+        with redirect_stdout(io.StringIO()):
+            biblioteca.cargar_usuarios(self.rutas[0])
+            biblioteca.cargar_libros(self.rutas[1])
+        return biblioteca
+    
+    def test_ultima_linea_incompleta(self):
+        biblioteca = self.nueva_biblioteca()
+        incompleta = linea_prestamo(2)
+        self.escribir(linea_prestamo(0) + linea_prestamo(1) + incompleta[:10])
+        cantidad, mensajes = self.cargar(biblioteca)
+        self.assertEqual(cantidad, 2)
+        self.assertIn("incompleta", mensajes)
+        
+        # Al completarse la línea se lee entera, no desde donde se cortó
+        self.escribir(incompleta[10:], 'a')
+        self.assertEqual(self.cargar(biblioteca)[0], 1)
+        self.assertEqual([prestamo.fecha_prestamo for prestamo in biblioteca.iterar_prestamos()],
+                         ["2024-01-01", "2024-01-02", "2024-01-03"])
+        
+        # Sin nada nuevo no se carga nada
+        self.assertEqual(self.cargar(biblioteca)[0], 0)
+    
+    def test_numeros_de_linea_siguen(self):
+        biblioteca = self.nueva_biblioteca()
+        self.escribir(linea_prestamo(0) + linea_prestamo(1))
+        self.cargar(biblioteca)
+        self.escribir(linea_prestamo(2) + "9,Nadie,100,Cien Años,2024-02-01,\n", 'a')
+        self.assertEqual(self.cargar(biblioteca)[0], 1)
+        self.assertEqual([error['linea'] for error in biblioteca.errores_lectura], [4])
+    
+    def test_archivo_truncado(self):
+        biblioteca = self.nueva_biblioteca()
+        self.escribir(linea_prestamo(0) + linea_prestamo(1) + linea_prestamo(2))
+        self.cargar(biblioteca)
+        
+        self.escribir(linea_prestamo(0))
+        cantidad, mensajes = self.cargar(biblioteca)
+        self.assertIsNone(cantidad)
+        self.assertIn("truncado", mensajes)
+        self.assertEqual(len(list(biblioteca.iterar_prestamos())), 3)
+    
+    def test_contenido_modificado(self):
+        biblioteca = self.nueva_biblioteca()
+        self.escribir(linea_prestamo(0) + linea_prestamo(1))
+        self.cargar(biblioteca)
+        
+        # Mismo largo, otro contenido: solo lo detecta la suma de verificación
+        self.escribir(linea_prestamo(0) + linea_prestamo(3) + linea_prestamo(2))
+        self.assertIsNone(self.cargar(biblioteca)[0])
+    
+    def test_suma_con_agregados_cortos(self):
+        # Muchos agregados más cortos que la ventana: la suma guardada tiene que ser
+        # la del final del archivo después de cada uno, también al pasar el tamaño de la ventana
+        biblioteca = self.nueva_biblioteca()
+        total = 0
+        dia = 0
+        while os.path.getsize(self.ruta_prestamos) < 2 * VENTANA_VERIFICACION:
+            self.escribir(linea_prestamo(dia) + linea_prestamo(dia + 1, "2"), 'a')
+            dia += 2
+            cantidad, mensajes = self.cargar(biblioteca)
+            self.assertEqual(cantidad, 2, mensajes)
+            total += cantidad
+        self.assertEqual(len(list(biblioteca.iterar_prestamos())), total)
+        
+        # Un cambio dentro de la ventana se sigue detectando
+        with open(self.ruta_prestamos, 'r+b') as archivo:
+            archivo.seek(-2, os.SEEK_END)
+            archivo.write(b"X")
+        self.assertIsNone(self.cargar(biblioteca)[0])
+    
+    def test_sqlite(self):
+        biblioteca = BibliotecaSQLite(os.path.join(self.carpeta.name, "biblioteca.db"))
+        try:
+            with redirect_stdout(io.StringIO()):
+                biblioteca.cargar_usuarios(self.rutas[0])
+                biblioteca.cargar_libros(self.rutas[1])
+            self.escribir(linea_prestamo(0) + linea_prestamo(1)[:5])
+            self.assertEqual(self.cargar(biblioteca)[0], 1)
+            self.escribir(linea_prestamo(1)[5:], 'a')
+            self.assertEqual(self.cargar(biblioteca)[0], 1)
+            self.assertEqual(len(list(biblioteca.iterar_prestamos())), 2)
+        finally:
+            biblioteca.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
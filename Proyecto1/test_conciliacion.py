@@ -0,0 +1,91 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from Biblioteca_dig import BibliotecaDigital
+from indices import IndiceTrigramas
+
+USUARIOS = "1,Ana Pérez\n2,Luis Gómez\n3,María Fernández\n"
+LIBROS = "100,Cien Años de Soledad\n30,El Árbol de la Ciencia\n"
+# La línea 2 tiene un error de tipeo y la 3 el nombre de otro usuario; la 4 repite la 3
+PRESTAMOS = (
+    "1,Ana Pérez,100,Cien Años de Soledad,2024-09-05,\n"
+    "2,Luis Gomes,100,Cien Años de Soledad,2024-09-06,\n"
+    "1,María Fernández,30,El Arbol de la Ciencia,2024-09-07,\n"
+    "1,María Fernández,30,El Arbol de la Ciencia,2024-09-08,\n"
+)
+
+class PruebaIndiceTrigramas(unittest.TestCase):
+    """El texto más parecido se encuentra con errores de tipeo, sin importar acentos"""
+    
+    def setUp(self):
+        self.indice = IndiceTrigramas()
+        for id_usuario, nombre in (("1", "Ana Pérez"), ("2", "Luis Gómez"), ("3", "María Fernández")):
+            self.indice.agregar(id_usuario, nombre)
+    
+    def test_error_de_tipeo(self):
+        id_registro, texto, similitud = self.indice.mas_parecido("Luis Gomes")
+        self.assertEqual((id_registro, texto), ("2", "Luis Gómez"))
+        self.assertGreater(similitud, 0.5)
+        self.assertLess(similitud, 1.0)
+    
+    def test_sin_acentos_es_igual(self):
+        self.assertEqual(self.indice.mas_parecido("maria fernandez"), ("3", "María Fernández", 1.0))
+    
+    def test_sin_parecido(self):
+        self.assertIsNone(self.indice.mas_parecido("Zzyzx Qwv"))
+        self.assertIsNone(self.indice.mas_parecido("Ana Pérez", similitud_minima=1.1))
+    
+    def test_reindexar(self):
+        self.indice.agregar("2", "Pedro Soto")
+        self.assertEqual(self.indice.mas_parecido("Luis Gomes"), None)
+        self.assertEqual(self.indice.mas_parecido("Pedro Sotto")[0], "2")
+        self.assertEqual(len(self.indice), 3)
+
+class PruebaConciliacion(unittest.TestCase):
+    """Los nombres y títulos distintos al catálogo se agrupan con una sugerencia, sin rechazar el préstamo"""
+    
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        rutas = []
+        for nombre, contenido in (("Usuarios.txt", USUARIOS), ("Libros.txt", LIBROS), ("Préstamos.lfa", PRESTAMOS)):
+            ruta = os.path.join(self.carpeta.name, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            rutas.append(ruta)
+        
+        self.biblioteca = BibliotecaDigital()
+        with redirect_stdout(io.StringIO()):
+            self.biblioteca.cargar_usuarios(rutas[0])
+            self.biblioteca.cargar_libros(rutas[1])
+            self.cargados = self.biblioteca.cargar_prestamos(rutas[2])
+    
+    def tearDown(self):
+        self.carpeta.cleanup()
+    
+    def test_discrepancias(self):
+        self.assertEqual(self.cargados, 4)
+        discrepancias = self.biblioteca.discrepancias
+        self.assertEqual(sorted(discrepancias), [
+            ('nombre_usuario', '1', 'María Fernández'),
+            ('nombre_usuario', '2', 'Luis Gomes'),
+            ('titulo_libro', '30', 'El Arbol de la Ciencia'),
+        ])
+        
+        tipeo = discrepancias[('nombre_usuario', '2', 'Luis Gomes')]
+        self.assertEqual((tipeo['catalogo'], tipeo['sugerencia_id'], tipeo['primera_linea'], tipeo['veces']),
+                         ("Luis Gómez", "2", 2, 1))
+        
+        # El nombre es de otro usuario: la sugerencia apunta a ese usuario
+        otro = discrepancias[('nombre_usuario', '1', 'María Fernández')]
+        self.assertEqual((otro['catalogo'], otro['sugerencia_id'], otro['similitud']), ("Ana Pérez", "3", 1.0))
+        self.assertEqual((otro['primera_linea'], otro['veces']), (3, 2))
+    
+    def test_historial_usa_el_catalogo(self):
+        nombres = [prestamo.nombre_usuario for prestamo in self.biblioteca.iterar_prestamos()]
+        self.assertEqual(nombres, ["Ana Pérez", "Luis Gómez", "Ana Pérez", "Ana Pérez"])
+
+if __name__ == "__main__":
+    unittest.main()
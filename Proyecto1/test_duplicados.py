@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import biblioteca_sqlite
+from Biblioteca_dig import BibliotecaDigital
+from biblioteca_sqlite import BibliotecaSQLite
+from indices import MINIMO_PENDIENTES, FiltroDuplicados
+
+USUARIOS = "1,Ana Pérez\n2,Luis Gómez\n"
+LIBROS = "100,Cien Años\n30,Treinta\n"
+# Las líneas 3 y 6 repiten la 1 (la 6 con otra devolución y espacios) y la 5 repite la 4
+PRESTAMOS = (
+    "1,Ana Pérez,100,Cien Años,2024-09-05,2024-09-20\n"
+    "2,Luis Gómez,100,Cien Años,2024-09-05,\n"
+    "1,Ana Pérez,100,Cien Años,2024-09-05,2024-09-20\n"
+    "1,Ana Pérez,30,Treinta,2024-09-05,\n"
+    "1,Ana Pérez,30,Treinta,2024-09-05,\n"
+    "1 , Ana Pérez , 100 , Cien Años , 2024-09-05 , 2024-10-01\n"
+    "1,Ana Pérez,100,Cien Años,2024-09-06,\n"
+)
+LINEAS_DUPLICADAS = [3, 5, 6]
+
+class PruebaFiltroDuplicados(unittest.TestCase):
+    """El filtro exacto responde igual que un conjunto aunque las huellas pasen por varios ordenamientos"""
+    
+    def test_exacto(self):
+        filtro = FiltroDuplicados()
+        claves = [(str(i % 700), str(i % 13), f"2024-01-{1 + i % 28:02d}") for i in range(5 * MINIMO_PENDIENTES)]
+        vistas = set()
+        respuestas, esperadas = [], []
+        for clave in claves:
+            respuestas.append(filtro.repetido(*clave))
+            esperadas.append(clave in vistas)
+            vistas.add(clave)
+        self.assertEqual(respuestas, esperadas)
+        self.assertTrue(any(esperadas))
+        
+        # Las huellas quedan casi todas en el arreglo ordenado, no en el conjunto de pendientes
+        self.assertEqual(len(filtro.huellas) + len(filtro.pendientes), len(vistas))
+        self.assertLess(len(filtro.pendientes), MINIMO_PENDIENTES)
+        self.assertEqual(list(filtro.huellas), sorted(filtro.huellas))
+    
+    def test_bloom_sin_falsos_negativos(self):
+        filtro = FiltroDuplicados(capacidad_bloom=1000)
+        claves = [(str(i), "100", "2024-09-05") for i in range(1000)]
+        for clave in claves:
+            filtro.repetido(*clave)
+        self.assertTrue(all(filtro.repetido(*clave) for clave in claves))
+
+class PruebaDuplicados(unittest.TestCase):
+    """Un préstamo con el mismo usuario, libro y fecha se descarta y se informa con su línea"""
+    
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.rutas = []
+        for nombre, contenido in (("Usuarios.txt", USUARIOS), ("Libros.txt", LIBROS), ("Préstamos.lfa", PRESTAMOS)):
+            ruta = os.path.join(self.carpeta.name, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.rutas.append(ruta)
+    
+    def tearDown(self):
+        self.carpeta.cleanup()
+    
+    def cargar(self, biblioteca, catalogo=True):
+        ruta_usuarios, ruta_libros, ruta_prestamos = self.rutas
+        with redirect_stdout(io.StringIO()):
+            if catalogo:
+                biblioteca.cargar_usuarios(ruta_usuarios)
+                biblioteca.cargar_libros(ruta_libros)
+            self.cargados = biblioteca.cargar_prestamos(ruta_prestamos)
+        return biblioteca
+    
+    def revisar_duplicados(self, biblioteca):
+        self.assertEqual(self.cargados, 4)
+        self.assertEqual(biblioteca.total_duplicados, 3)
+        self.assertEqual([duplicado['linea'] for duplicado in biblioteca.duplicados], LINEAS_DUPLICADAS)
+        # Se conserva el primero: la devolución que vale es la de la línea 1
+        self.assertEqual([(p.id_libro, p.fecha_prestamo, p.fecha_devolucion) for p in biblioteca.iterar_prestamos()
+                          if p.id_usuario == "1"],
+                         [("100", "2024-09-05", "2024-09-20"), ("30", "2024-09-05", ""), ("100", "2024-09-06", "")])
+    
+    def test_memoria(self):
+        self.revisar_duplicados(self.cargar(BibliotecaDigital()))
+    
+    def test_memoria_bloom(self):
+        self.revisar_duplicados(self.cargar(BibliotecaDigital(capacidad_bloom=100)))
+    
+    def test_sqlite(self):
+        biblioteca = self.cargar(BibliotecaSQLite(os.path.join(self.carpeta.name, "biblioteca.db")))
+        try:
+            self.revisar_duplicados(biblioteca)
+        finally:
+            biblioteca.cerrar()
+    
+    def test_sqlite_entre_lotes(self):
+        # Con lotes de 2 los duplicados caen en el mismo lote que el original y en lotes posteriores
+        with mock.patch.object(biblioteca_sqlite, 'TAMANO_LOTE', 2):
+            biblioteca = self.cargar(BibliotecaSQLite(os.path.join(self.carpeta.name, "biblioteca.db")))
+            try:
+                self.revisar_duplicados(biblioteca)
+            finally:
+                biblioteca.cerrar()
+    
+    def test_sqlite_otra_sesion(self):
+        # Al volver a abrir la base los préstamos guardados cuentan como ya cargados
+        ruta_db = os.path.join(self.carpeta.name, "biblioteca.db")
+        self.cargar(BibliotecaSQLite(ruta_db)).cerrar()
+        biblioteca = self.cargar(BibliotecaSQLite(ruta_db), catalogo=False)
+        try:
+            self.assertEqual(self.cargados, 0)
+            self.assertEqual(biblioteca.total_duplicados, 7)
+            self.assertEqual([duplicado['linea'] for duplicado in biblioteca.duplicados], list(range(1, 8)))
+            self.assertEqual(len(list(biblioteca.iterar_prestamos())), 4)
+        finally:
+            biblioteca.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+
+from Biblioteca_dig import BibliotecaDigital
+from biblioteca_sqlite import BibliotecaSQLite
+from indices import SIN_FIN, IndiceIntervalos, barrer_periodos
+
+USUARIOS = "1,Ana Pérez\n2,Luis Gómez\n"
+LIBROS = "100,Cien Años\n30,Treinta\n9,Nueve\n"
+# Libro 100: el préstamo del 5 se devuelve el mismo día y el del 10 empieza el día en que vuelve
+# el del 1, así que ninguno de los dos se superpone; el del 14 (cargado antes que el del 12)
+# llega a 3 simultáneos. El del 1 de agosto tiene la devolución antes del préstamo.
+PRESTAMOS = (
+    "1,Ana Pérez,100,Cien Años,2024-09-01,2024-09-10\n"
+    "2,Luis Gómez,100,Cien Años,2024-09-05,2024-09-05\n"
+    "2,Luis Gómez,100,Cien Años,2024-09-10,2024-09-15\n"
+    "1,Ana Pérez,100,Cien Años,2024-09-14,2024-09-20\n"
+    "1,Ana Pérez,100,Cien Años,2024-09-12,\n"
+    "2,Luis Gómez,100,Cien Años,2024-08-01,2024-07-01\n"
+    "1,Ana Pérez,30,Treinta,2024-09-01,2024-09-03\n"
+    "2,Luis Gómez,30,Treinta,2024-09-03,\n"
+    "1,Ana Pérez,9,Nueve,2024-10-01,2024-10-09\n"
+    "2,Luis Gómez,9,Nueve,2024-10-08,2024-10-20\n"
+)
+
+def ordinal(fecha):
+    return date.fromisoformat(fecha).toordinal()
+
+class PruebaBarrerPeriodos(unittest.TestCase):
+    """Los períodos son [inicio, fin): el día de la devolución el libro ya no cuenta como prestado"""
+    
+    def test_semiabiertos(self):
+        self.assertEqual(barrer_periodos([(1, 5, 'a'), (5, 9, 'b'), (9, SIN_FIN, 'c')]), (1, 1, []))
+    
+    def test_mismo_dia(self):
+        self.assertEqual(barrer_periodos([(1, 5, 'a'), (3, 3, 'b')]), (1, 1, []))
+    
+    def test_pico_y_superpuestos(self):
+        # Cada superpuesto se informa con el préstamo en curso que termina primero
+        pico, inicio_pico, superpuestos = barrer_periodos([(1, 10, 'a'), (2, 4, 'b'), (3, 8, 'c'), (4, 6, 'd')])
+        self.assertEqual((pico, inicio_pico), (3, 3))
+        self.assertEqual(superpuestos, [('b', 'a', 2), ('c', 'b', 3), ('d', 'c', 3)])
+    
+    def test_vacio(self):
+        self.assertEqual(barrer_periodos([]), (0, None, []))
+
+class PruebaIndiceIntervalos(unittest.TestCase):
+    """Los simultáneos a una fecha salen de las búsquedas binarias sobre inicios y fines de cada libro"""
+    
+    def setUp(self):
+        self.indice = IndiceIntervalos()
+        periodos = (("2024-09-01", "2024-09-10"), ("2024-09-05", "2024-09-05"), ("2024-09-10", "2024-09-15"),
+                    ("2024-09-14", "2024-09-20"), ("2024-09-12", None), ("2024-08-01", "2024-07-01"))
+        for fila, (prestamo, devolucion) in enumerate(periodos):
+            self.indice.agregar(fila, "100", ordinal(prestamo), ordinal(devolucion) if devolucion else None)
+    
+    def test_simultaneos(self):
+        casos = {"2024-07-31": 0, "2024-08-01": 0, "2024-09-05": 1, "2024-09-10": 1,
+                 "2024-09-14": 3, "2024-09-15": 2, "2024-09-20": 1, "2030-01-01": 1}
+        for fecha, esperado in casos.items():
+            with self.subTest(fecha=fecha):
+                self.assertEqual(self.indice.simultaneos("100", ordinal(fecha)), esperado)
+        self.assertEqual(self.indice.simultaneos("30", ordinal("2024-09-14")), 0)
+    
+    def test_agregar_despues_de_consultar(self):
+        self.assertEqual(self.indice.simultaneos("100", ordinal("2024-09-16")), 2)
+        self.indice.agregar(6, "100", ordinal("2024-09-16"), None)
+        self.assertEqual(self.indice.simultaneos("100", ordinal("2024-09-16")), 3)
+        self.assertEqual(self.indice.barrer("100")[:2], (3, ordinal("2024-09-14")))
+
+class PruebaPrestamosSimultaneos(unittest.TestCase):
+    """El pico de cada libro y sus préstamos superpuestos son iguales en memoria y con SQLite"""
+    
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.rutas = []
+        for nombre, contenido in (("Usuarios.txt", USUARIOS), ("Libros.txt", LIBROS), ("Préstamos.lfa", PRESTAMOS)):
+            ruta = os.path.join(self.carpeta.name, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.rutas.append(ruta)
+    
+    def tearDown(self):
+        self.carpeta.cleanup()
+    
+    def cargar(self, biblioteca):
+        ruta_usuarios, ruta_libros, ruta_prestamos = self.rutas
+        with redirect_stdout(io.StringIO()):
+            biblioteca.cargar_usuarios(ruta_usuarios)
+            biblioteca.cargar_libros(ruta_libros)
+            biblioteca.cargar_prestamos(ruta_prestamos)
+        return biblioteca
+    
+    def revisar_simultaneos(self, biblioteca):
+        self.assertEqual(biblioteca.obtener_uso_libros(), [
+            ("100", "Cien Años", 6, 3, "2024-09-14", 2),
+            ("9", "Nueve", 2, 2, "2024-10-08", 1),
+            ("30", "Treinta", 2, 1, "2024-09-01", 0),
+        ])
+        superpuestos = [(prestamo.fecha_prestamo, en_curso.fecha_prestamo, en_curso.id_usuario, cantidad)
+                        for prestamo, en_curso, cantidad in biblioteca.obtener_superpuestos_libro("100")]
+        self.assertEqual(superpuestos, [("2024-09-12", "2024-09-10", "2", 2), ("2024-09-14", "2024-09-10", "2", 3)])
+        self.assertEqual(biblioteca.obtener_superpuestos_libro("30"), [])
+        
+        for fecha, esperado in (("2024-09-10", 1), ("2024-09-14", 3), ("2024-09-15", 2), ("2024-08-01", 0)):
+            with self.subTest(fecha=fecha):
+                self.assertEqual(biblioteca.obtener_prestamos_simultaneos("100", fecha), esperado)
+    
+    def test_memoria(self):
+        self.revisar_simultaneos(self.cargar(BibliotecaDigital()))
+    
+    def test_sqlite(self):
+        biblioteca = self.cargar(BibliotecaSQLite(os.path.join(self.carpeta.name, "biblioteca.db")))
+        try:
+            self.revisar_simultaneos(biblioteca)
+        finally:
+            biblioteca.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
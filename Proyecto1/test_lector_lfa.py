@@ -0,0 +1,86 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from Biblioteca_dig import BibliotecaDigital
+from lector_lfa import CAMPOS_PRESTAMO, diagnosticar_prestamo, separar_prestamo
+
+class PruebaSepararPrestamo(unittest.TestCase):
+    """Un registro válido se separa en sus seis campos sin los espacios alrededor de las comas"""
+    
+    def test_registro_valido(self):
+        self.assertEqual(separar_prestamo("1,Ana Pérez,100,Cien Años,2024-09-05,2024-09-20"),
+                         ("1", "Ana Pérez", "100", "Cien Años", "2024-09-05", "2024-09-20"))
+        # La fecha de devolución es opcional
+        self.assertEqual(separar_prestamo("1,Ana Pérez,100,Cien Años,2024-09-05,")[-1], "")
+    
+    def test_espacios_alrededor_de_comas(self):
+        self.assertEqual(separar_prestamo("1 , Ana Pérez ,100,\tCien Años (2a. ed.) , 2024-09-05 ,"),
+                         ("1", "Ana Pérez", "100", "Cien Años (2a. ed.)", "2024-09-05", ""))
+    
+    def test_registro_invalido(self):
+        for linea in ("1,Ana P@rez,100,Cien Años,2024-09-05,", "1,Ana,100,Cien,2024-9-05,",
+                      "1,Ana,100,Cien,2024-09-05", "x,Ana,100,Cien,2024-09-05,"):
+            with self.subTest(linea=linea):
+                self.assertIsNone(separar_prestamo(linea))
+
+class PruebaDiagnosticarPrestamo(unittest.TestCase):
+    """El error se ubica en la columna del primer carácter que no cumple la expresión del campo"""
+    
+    def test_columna_del_error(self):
+        casos = (
+            ("1,Ana P@rez,100,Cien,2024-09-05,", 8, "Carácter inválido", "Carácter inválido '@' en nombre de usuario"),
+            ("1,Ana,1x0,Cien,2024-09-05,", 8, "ID inválido", "ID de libro inválido '1x0'"),
+            ("1,Ana,100,Cien,2024-9-05,", 16, "Fecha inválida", "Fecha de préstamo inválida '2024-9-05'"),
+            ("1,Ana,100,Cien,2024-09-05, ayer", 28, "Fecha inválida", "Fecha de devolución inválida 'ayer'"),
+        )
+        for linea, columna, clase, mensaje in casos:
+            with self.subTest(linea=linea):
+                self.assertEqual(diagnosticar_prestamo(linea), (None, (columna, clase, mensaje)))
+    
+    def test_columna_inicial(self):
+        # Las columnas se cuentan desde donde empieza el registro en la línea original
+        campos, (columna, _, _) = diagnosticar_prestamo("1,Ana P@rez,100,Cien,2024-09-05,", 3)
+        self.assertIsNone(campos)
+        self.assertEqual(columna, 10)
+    
+    def test_cantidad_de_campos(self):
+        self.assertEqual(diagnosticar_prestamo("1,Ana,100,Cien,2024-09-05"),
+                         (None, (None, "Formato incorrecto",
+                                 f"Se esperaban {len(CAMPOS_PRESTAMO)} campos, se encontraron 5")))
+    
+    def test_valido_con_espacios_poco_comunes(self):
+        # El patrón solo acepta espacios y tabulaciones junto a las comas; campo por campo se aceptan otros
+        linea = "1\x0b,Ana,100,Cien,2024-09-05,"
+        self.assertIsNone(separar_prestamo(linea))
+        self.assertEqual(diagnosticar_prestamo(linea), (("1", "Ana", "100", "Cien", "2024-09-05", ""), None))
+
+class PruebaErroresDeLectura(unittest.TestCase):
+    """Al cargar un archivo los errores de formato se informan con línea y columna"""
+    
+    def test_carga(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            rutas = []
+            for nombre, contenido in (("Usuarios.txt", "1,Ana Pérez\n"), ("Libros.txt", "100,Cien Años\n"),
+                                      ("Préstamos.lfa", "1,Ana Pérez,100,Cien Años,2024-09-05,\n"
+                                                        "  1,Ana P@rez,100,Cien Años,2024-09-06,\n"
+                                                        "1,Ana Pérez,100,Cien Años\n")):
+                ruta = os.path.join(carpeta, nombre)
+                with open(ruta, 'w', encoding='utf-8') as archivo:
+                    archivo.write(contenido)
+                rutas.append(ruta)
+            
+            biblioteca = BibliotecaDigital()
+            with redirect_stdout(io.StringIO()):
+                biblioteca.cargar_usuarios(rutas[0])
+                biblioteca.cargar_libros(rutas[1])
+                cargados = biblioteca.cargar_prestamos(rutas[2])
+        
+        self.assertEqual(cargados, 1)
+        self.assertEqual([(error['linea'], error['columna'], error['clase']) for error in biblioteca.errores_lectura],
+                         [(2, 10, "Carácter inválido"), (3, None, "Formato incorrecto")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from Biblioteca_dig import BibliotecaDigital
+from biblioteca_sqlite import BibliotecaSQLite
+
+USUARIOS = "1,Ana Pérez\n2,Luis Gómez\n"
+LIBROS = "100,Cien Años\n30,Treinta\n9,Nueve\n"
+# Cada libro tiene 2 préstamos en la semana ISO 2024-W36 (del 2 al 8 de septiembre).
+# Se cargan de ID mayor a menor y los de ID menor son los más antiguos, así el orden
+# de carga y el orden por fecha no coinciden con el orden por ID
+PRESTAMOS = (
+    "1,Ana Pérez,100,Cien Años,2024-09-05,2024-09-20\n"
+    "2,Luis Gómez,100,Cien Años,2024-09-06,\n"
+    "1,Ana Pérez,30,Treinta,2024-09-04,2024-09-10\n"
+    "2,Luis Gómez,30,Treinta,2024-09-07,\n"
+    "1,Ana Pérez,9,Nueve,2024-09-02,2024-09-03\n"
+    "2,Luis Gómez,9,Nueve,2024-09-03,\n"
+)
+
+# Periodos que pasan por cada camino de obtener_mas_prestados
+PERIODOS = {
+    'todo el registro': (None, None),
+    'mes completo': ("2024-09-01", "2024-09-30"),
+    'semana ISO': ("2024-09-02", "2024-09-08"),
+    'parte de un mes': ("2024-09-02", "2024-09-20"),
+}
+
+class PruebaEmpatesRanking(unittest.TestCase):
+    """Los empates del top-K salen en el mismo orden (ID menor primero) por cualquier camino"""
+    
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.rutas = []
+        for nombre, contenido in (("Usuarios.txt", USUARIOS), ("Libros.txt", LIBROS), ("Préstamos.lfa", PRESTAMOS)):
+            ruta = os.path.join(self.carpeta.name, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.rutas.append(ruta)
+    
+    def tearDown(self):
+        self.carpeta.cleanup()
+    
+    def cargar(self, biblioteca):
+        ruta_usuarios, ruta_libros, ruta_prestamos = self.rutas
+        with redirect_stdout(io.StringIO()):
+            biblioteca.cargar_usuarios(ruta_usuarios)
+            biblioteca.cargar_libros(ruta_libros)
+            biblioteca.cargar_prestamos(ruta_prestamos)
+        return biblioteca
+    
+    def revisar_empates(self, biblioteca):
+        for descripcion, (desde, hasta) in PERIODOS.items():
+            with self.subTest(periodo=descripcion):
+                ids = [fila[0] for fila in biblioteca.obtener_mas_prestados('libros', 10, desde, hasta)]
+                self.assertEqual(ids, ["9", "30", "100"])
+                ids = [fila[0] for fila in biblioteca.obtener_mas_prestados('libros', 2, desde, hasta)]
+                self.assertEqual(ids, ["9", "30"])
+        
+        (mes, libros, usuarios), = biblioteca.obtener_ranking_mensual()
+        self.assertEqual(mes, "2024-09")
+        self.assertEqual([fila[0] for fila in libros], ["9", "30", "100"])
+        self.assertEqual([fila[0] for fila in usuarios], ["1", "2"])
+    
+    def test_memoria(self):
+        self.revisar_empates(self.cargar(BibliotecaDigital()))
+    
+    def test_sqlite(self):
+        biblioteca = self.cargar(BibliotecaSQLite(os.path.join(self.carpeta.name, "biblioteca.db")))
+        try:
+            self.revisar_empates(biblioteca)
+        finally:
+            biblioteca.cerrar()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import random
+from collections import Counter
+
+LIMITE_PRIMEROS = 100  # errores que se guardan completos, en el orden en que aparecen
+TAMANO_MUESTRA = 20    # errores elegidos al azar entre todos para dar una idea del resto
+
+class ColectorErrores:
+    """Cuenta los errores por clase y guarda solo los primeros y una muestra, con memoria acotada"""
+    
+    def __init__(self, limite_primeros=LIMITE_PRIMEROS, tamano_muestra=TAMANO_MUESTRA, semilla=None):
+        self.limite_primeros = limite_primeros
+        self.tamano_muestra = tamano_muestra
+        self.conteos = Counter()  # clase -> cantidad de errores
+        self.primeros = []        # los primeros errores, con su ubicación
+        self.muestra = []         # muestreo de reservorio sobre todos los errores
+        self.total = 0
+        self.aleatorio = random.Random(semilla)
+    
+    def __len__(self):
+        return self.total
+    
+    def __bool__(self):
+        return self.total > 0
+    
+    def __iter__(self):
+        """Recorre los errores guardados en orden de aparición"""
+        return iter(self.primeros)
+    
+    def registrar(self, clase, error):
+        """Cuenta un error; devuelve True si es de los primeros (los que conviene mostrar enseguida)"""
+        self.total += 1
+        self.conteos[clase] += 1
+        
+        # Algoritmo R: el error n-ésimo entra a la muestra con probabilidad tamano_muestra / n
+        if len(self.muestra) < self.tamano_muestra:
+            self.muestra.append(error)
+        else:
+            posicion = self.aleatorio.randrange(self.total)
+            if posicion < self.tamano_muestra:
+                self.muestra[posicion] = error
+        
+        if len(self.primeros) < self.limite_primeros:
+            self.primeros.append(error)
+            return True
+        return False
+    
+    def omitidos(self):
+        """Cantidad de errores que no quedaron entre los primeros"""
+        return self.total - len(self.primeros)
+    
+    def resumen_clases(self):
+        """Pares (clase, cantidad) de la más frecuente a la menos"""
+        return self.conteos.most_common()
@@ -0,0 +1,77 @@
+import re
+from html import escape
+
+PATRON_CAMPO = re.compile(r"\{\{(!?)(\w+)\}\}")
+PATRON_ESPECIALES = re.compile(r"[&<>\"']")
+
+def escapar_html(valor):
+    """Escapa &, <, >, comillas y apóstrofos; el texto sin caracteres especiales se devuelve tal cual"""
+    texto = str(valor)
+    if PATRON_ESPECIALES.search(texto) is None:
+        return texto
+    return escape(texto)
+
+class Plantilla:
+    """Texto con campos {{campo}} (se escapan) y {{!campo}} (van sin escapar), analizado una sola vez"""
+    
+    def __init__(self, texto):
+        self.campos = []  # nombres en orden de primera aparición
+        conversores = []
+        partes = []
+        posicion = 0
+        
+        # Se arma una cadena de formato con campos posicionales: al renderizar
+        # solo queda un str.format, sin volver a buscar las marcas
+        for marca in PATRON_CAMPO.finditer(texto):
+            partes.append(texto[posicion:marca.start()].replace("{", "{{").replace("}", "}}"))
+            sin_escapar, nombre = marca.groups()
+            if nombre not in self.campos:
+                self.campos.append(nombre)
+                conversores.append(str if sin_escapar else escapar_html)
+            partes.append("{%d}" % self.campos.index(nombre))
+            posicion = marca.end()
+        partes.append(texto[posicion:].replace("{", "{{").replace("}", "}}"))
+        
+        self.formato = "".join(partes)
+        self.conversores = tuple(conversores)
+        # Solo los campos que se escapan, separados por un carácter que no aparece en los datos:
+        # si ahí no hay nada que escapar, la fila se formatea directo sin convertir campo por campo
+        self.formato_revision = "\x1f".join("{%d}" % i for i, convertir in enumerate(conversores) if convertir is escapar_html)
+    
+    def renderizar(self, valores=None, **otros):
+        """Devuelve el texto con los campos tomados de un diccionario o de argumentos con nombre"""
+        if valores is None:
+            valores = otros
+        return self.formato.format(*[convertir(valores[nombre]) for nombre, convertir in zip(self.campos, self.conversores)])
+    
+    def escribir(self, archivo, valores=None, **otros):
+        """Escribe la plantilla renderizada en el archivo"""
+        archivo.write(self.renderizar(valores, **otros))
+    
+    def convertir_fila(self, fila):
+        """Valores de la fila con los campos escapados"""
+        return [convertir(valor) for convertir, valor in zip(self.conversores, fila)]
+    
+    def escribir_filas(self, archivo, filas):
+        """Escribe una vez la plantilla por fila; cada fila es una tupla en el orden de self.campos"""
+        formato = self.formato.format
+        if not self.formato_revision:
+            archivo.writelines(formato(*fila) for fila in filas)
+            return
+        
+        revisar = self.formato_revision.format
+        buscar = PATRON_ESPECIALES.search
+        convertir_fila = self.convertir_fila
+        archivo.writelines(
+            formato(*fila) if buscar(revisar(*fila)) is None else formato(*convertir_fila(fila))
+            for fila in filas
+        )
+
+PLANTILLAS = {}  # texto -> Plantilla ya analizada
+
+def plantilla(texto):
+    """Plantilla compilada para el texto; cada texto distinto se analiza una sola vez"""
+    compilada = PLANTILLAS.get(texto)
+    if compilada is None:
+        compilada = PLANTILLAS[texto] = Plantilla(texto)
+    return compilada